@@ -13,6 +13,12 @@ class FoodEmbedding extends Model
         'food_id',
         'dimension',
         'embedding',
+        'vector',
+        'vector_dtype',
+    ];
+
+    protected $hidden = [
+        'vector',
     ];
 
     public function food()
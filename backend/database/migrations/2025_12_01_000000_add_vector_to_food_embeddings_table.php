@@ -0,0 +1,47 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::table('food_embeddings', function (Blueprint $table) {
+            $table->binary('vector')->nullable()->after('embedding');
+            $table->string('vector_dtype', 16)->nullable()->after('vector');
+            $table->longText('embedding')->nullable()->change();
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        // vector만 있는 행은 JSON으로 되돌려 embedding을 다시 NOT NULL로 만들 수 있게 한다 (float32le)
+        DB::table('food_embeddings')
+            ->whereNull('embedding')
+            ->whereNotNull('vector')
+            ->chunkById(500, function ($rows) {
+                foreach ($rows as $row) {
+                    DB::table('food_embeddings')
+                        ->where('id', $row->id)
+                        ->update(['embedding' => json_encode(array_values(unpack('g*', $row->vector)))]);
+                }
+            });
+
+        // 벡터도 JSON도 없는 행은 되돌릴 값이 없다
+        DB::table('food_embeddings')->whereNull('embedding')->delete();
+
+        Schema::table('food_embeddings', function (Blueprint $table) {
+            $table->longText('embedding')->nullable(false)->change();
+            $table->dropColumn(['vector', 'vector_dtype']);
+        });
+    }
+};
@@ -0,0 +1,37 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        // food_matcher의 변경분 갱신(MATCHER_REFRESH_INTERVAL)이 updated_at 범위/최댓값으로 바뀐 행만 찾는다
+        Schema::table('foods', function (Blueprint $table) {
+            $table->index('updated_at');
+        });
+
+        Schema::table('food_embeddings', function (Blueprint $table) {
+            $table->index('updated_at');
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::table('food_embeddings', function (Blueprint $table) {
+            $table->dropIndex(['updated_at']);
+        });
+
+        Schema::table('foods', function (Blueprint $table) {
+            $table->dropIndex(['updated_at']);
+        });
+    }
+};
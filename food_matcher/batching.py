@@ -0,0 +1,145 @@
+import asyncio
+import time
+from contextlib import suppress
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from metrics import STAGE_SECONDS, Histogram
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250)
+STOP_TIMEOUT = 5.0
+
+# 큐에 넣어 워커에게 "여기까지 처리하고 끝내라"를 알리는 표식
+_STOP = object()
+
+
+class MicroBatcher(Generic[Item, Result]):
+    """동시에 들어온 요청을 최대 max_wait_ms 또는 max_batch개까지 모아 handler를 한 번 호출한다.
+
+    handler는 스레드 풀에서 실행되며 입력 순서대로 같은 길이의 결과 리스트를 반환해야 한다.
+    handler가 예외를 던지면 그 배치의 모든 요청에 같은 예외가 전달된다.
+    stop()은 새 요청을 막고 이미 큐에 든 요청까지 처리한 뒤 멈추며, 끝내 처리하지 못한 요청은 RuntimeError로 끝낸다.
+    """
+
+    def __init__(self, handler: Callable[[List[Item]], List[Result]], max_batch: int, max_wait_ms: float):
+        self.handler = handler
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait_ms / 1000
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_depths = Histogram(QUEUE_DEPTH_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self._queue: Optional["asyncio.Queue[Tuple[Item, asyncio.Future, float]]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch: List[Tuple[Item, asyncio.Future, float]] = []
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = STOP_TIMEOUT):
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(asyncio.shield(worker), timeout)
+        except asyncio.TimeoutError:
+            worker.cancel()
+            with suppress(asyncio.CancelledError):
+                await worker
+
+        # 제한 시간 안에 처리하지 못한 요청이 영원히 기다리지 않게 한다
+        error = RuntimeError("마이크로배치 처리기가 중지되었습니다.")
+        pending = self._batch
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for entry in pending:
+            if entry is not _STOP and not entry[1].done():
+                entry[1].set_exception(error)
+        self._batch = []
+
+    async def submit(self, item: Item) -> Result:
+        if self._worker is None:
+            raise RuntimeError("마이크로배치 처리기가 실행 중이 아닙니다.")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> bool:
+        """self._batch를 채운다. 중지 표식을 만나면 False를 반환한다."""
+        first = await self._queue.get()
+        if first is _STOP:
+            return False
+        self._batch = batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            # 이미 쌓여 있는 요청은 기다리지 않고 바로 가져온다
+            if not self._queue.empty():
+                entry = self._queue.get_nowait()
+            else:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if entry is _STOP:
+                # 이번 배치를 처리한 다음 멈추도록 표식을 되돌려 둔다
+                self._queue.put_nowait(entry)
+                break
+            batch.append(entry)
+
+        return True
+
+    async def _run(self):
+        while await self._collect():
+            batch = self._batch
+            dispatched_at = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            self.queue_depths.observe(self._queue.qsize())
+            for _, _, enqueued_at in batch:
+                self.queue_wait_ms.observe((dispatched_at - enqueued_at) * 1000)
+                STAGE_SECONDS.observe("queue_wait", dispatched_at - enqueued_at)
+
+            try:
+                results = await run_in_threadpool(self.handler, [item for item, _, _ in batch])
+            except Exception as exc:
+                self._batch = []
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            # 취소(stop 제한 시간 초과)로 빠져나가면 stop()이 self._batch의 요청을 끝낸다
+            self._batch = []
+
+            for (_, future, _), result in zip(batch, results):
+                # 기다리던 클라이언트가 끊겨 취소된 요청은 건너뛴다
+                if not future.done():
+                    future.set_result(result)
+
+    @property
+    def queue_depth(self) -> int:
+        """아직 배치로 꺼내지 않은 요청 수."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self.queue_depth,
+            "batch_size": self.batch_sizes.stats(),
+            "queue_depth_at_dispatch": self.queue_depths.stats(),
+            "queue_wait_ms": self.queue_wait_ms.stats(),
+        }
@@ -0,0 +1,100 @@
+"""VectorStore.search의 상위 k 선택 마이크로벤치마크.
+
+점수 벡터는 실제 행렬곱 결과와 같은 분포(코사인 유사도)로 생성하고, 기존 전체 정렬 방식과
+select_top_k를 비교한다. 두 방식의 결과가 다르면 즉시 실패한다.
+
+    python bench_search.py --rows 15000 150000 1500000 --limit 5 --threshold 0.4
+
+``--backends``를 주면 임의의 정규화 벡터로 인덱스 백엔드별 쿼리 1건 검색 시간과 1차 스캔이 읽는 데이터 크기도 비교한다.
+
+    python bench_search.py --rows 15000 150000 --backends exact int8 int4 --dim 768
+"""
+
+import argparse
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from indexes import create_index, index_directory
+from ranking import select_top_k
+
+
+def argsort_top_k(scores: np.ndarray, limit: int, threshold: float) -> np.ndarray:
+    # 기존 search 구현과 같은 방식 (동점 순서만 stable로 고정)
+    ranked = np.argsort(-scores, kind="stable")[: limit * 2]
+    return np.array([index for index in ranked if scores[index] >= threshold][:limit], dtype=np.int64)
+
+
+def timeit(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples)) * 1000
+
+
+def bench_backends(rows: int, dimension: int, backends: List[str], limit: int, repeat: int, rng):
+    vectors = rng.normal(size=(rows, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(rows, repeat)]
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in backends:
+            # 서버와 같이 mmap이 필요한 백엔드는 디렉터리에 저장한 뒤 연다
+            index = create_index(backend, vectors, index_directory(directory, backend))
+            index.search(queries[:1], limit, -1.0)
+            samples = []
+            for query in queries:
+                started = time.perf_counter()
+                index.search(query[np.newaxis, :], limit, -1.0)
+                samples.append(time.perf_counter() - started)
+            elapsed = float(np.median(samples)) * 1000
+            baseline = baseline or elapsed
+            scanned = getattr(index, "codes", index.vectors).nbytes / (1 << 20)
+            print(f"{rows:>10} {backend:>10} {elapsed:>10.3f} {elapsed / baseline:>8.2f}x {scanned:>10.1f}")
+            del index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="상위 k 선택 마이크로벤치마크")
+    parser.add_argument("--rows", type=int, nargs="+", default=[15_000, 150_000, 1_500_000])
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", nargs="*", default=[], help="비교할 인덱스 백엔드 (첫 번째가 기준, 예: exact sharded int8 int4)")
+    parser.add_argument("--dim", type=int, default=768, help="--backends 비교에 쓸 벡터 차원")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'rows':>10} {'argsort(ms)':>12} {'top_k(ms)':>10} {'speedup':>8}")
+    for rows in args.rows:
+        scores = rng.normal(0.3, 0.12, size=rows).astype(np.float32)
+        # 동점 처리도 같이 확인하도록 일부 점수를 양자화한다
+        scores[: rows // 10] = np.round(scores[: rows // 10], 2)
+
+        expected = argsort_top_k(scores, args.limit, args.threshold)
+        actual = select_top_k(scores, args.limit, args.threshold)
+        if not np.array_equal(expected, actual):
+            raise SystemExit(f"결과 불일치 (rows={rows}): {expected} != {actual}")
+
+        baseline = timeit(lambda: argsort_top_k(scores, args.limit, args.threshold), args.repeat)
+        partial = timeit(lambda: select_top_k(scores, args.limit, args.threshold), args.repeat)
+        print(f"{rows:>10} {baseline:>12.3f} {partial:>10.3f} {baseline / partial:>7.1f}x")
+
+    if args.backends:
+        print(f"\n{'rows':>10} {'backend':>10} {'query(ms)':>10} {'vs first':>9} {'scan(MB)':>10}")
+        for rows in args.rows:
+            bench_backends(rows, args.dim, args.backends, args.limit, args.repeat, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+
+def normalize_query(text: str) -> str:
+    # 캐시 키가 공백/유니코드 조합형 차이로 갈라지지 않도록 정규화한다
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class LRUCache:
+    """스레드 안전한 크기 제한 LRU 캐시. maxsize가 0이면 캐시하지 않는다."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(maxsize, 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: object):
+        if self.maxsize == 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,258 @@
+import json
+import unicodedata
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+import pymysql
+from dotenv import load_dotenv
+
+from sources import default_source
+
+if TYPE_CHECKING:
+    from records import RecordTable
+
+load_dotenv()
+
+# food_embeddings.vector 컬럼에 저장되는 바이너리 포맷 (little-endian float32)
+VECTOR_DTYPE = "float32le"
+VECTOR_DTYPES = {
+    "float32le": np.dtype("<f4"),
+}
+
+NUTRIENT_FIELDS = (
+    "energy_kcal",
+    "protein_g",
+    "fat_g",
+    "carbohydrate_g",
+    "sugars_g",
+    "dietary_fiber_g",
+    "sodium_mg",
+)
+
+CATALOG_COLUMNS_SQL = """
+    SELECT f.id,
+           f.food_code,
+           f.food_name,
+           f.common_name,
+           f.serving_size,
+           f.energy_kcal,
+           f.protein_g,
+           f.fat_g,
+           f.carbohydrate_g,
+           f.sugars_g,
+           f.dietary_fiber_g,
+           f.sodium_mg,
+           fe.dimension,
+           fe.vector,
+           fe.vector_dtype,
+           -- JSON 텍스트는 BLOB이 없는(마이그레이션 전) 행만 받는다
+           CASE WHEN fe.vector IS NULL THEN fe.embedding END AS embedding
+    FROM food_embeddings fe
+    JOIN foods f ON f.id = fe.food_id
+"""
+
+CATALOG_SQL = CATALOG_COLUMNS_SQL + " ORDER BY f.id"
+
+# 마지막 로드 이후 바뀐 행. 경계 시각과 같은 초에 바뀐 행은 BOUNDARY_SQL로 따로 찾는다.
+# 조인한 두 테이블에 걸친 OR 조건은 updated_at 인덱스를 못 타므로 테이블별 조건으로 나눠 두 번 읽는다
+EMBEDDING_CHANGES_SQL = CATALOG_COLUMNS_SQL + " WHERE fe.updated_at > %s"
+FOOD_CHANGES_SQL = CATALOG_COLUMNS_SQL + " WHERE f.updated_at > %s"
+
+# MAX는 각 테이블의 updated_at 인덱스 끝만 읽는다
+SIGNATURE_SQL = """
+    SELECT (SELECT COUNT(*) FROM food_embeddings) AS count,
+           (SELECT MAX(updated_at) FROM food_embeddings) AS embeddings_updated_at,
+           (SELECT MAX(updated_at) FROM foods) AS foods_updated_at
+"""
+
+# 최종 수정 시각과 같은 시각을 가진 행. embed_foods.py는 배치 하나를 같은 시각으로 쓰므로 수천 행이 될 수 있다
+BOUNDARY_SQL = """
+    SELECT fe.food_id
+    FROM food_embeddings fe
+    JOIN foods f ON f.id = fe.food_id
+    WHERE fe.updated_at = %s
+    UNION
+    SELECT fe.food_id
+    FROM food_embeddings fe
+    JOIN foods f ON f.id = fe.food_id
+    WHERE f.updated_at = %s
+    ORDER BY food_id
+"""
+
+IDS_SQL = """
+    SELECT fe.food_id
+    FROM food_embeddings fe
+    JOIN foods f ON f.id = fe.food_id
+    ORDER BY fe.food_id
+"""
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def normalize_component(value: Optional[str]) -> str:
+    if not value:
+        return ""
+
+    text = value.replace("_", " ").replace("/", " ")
+    return " ".join(text.split())
+
+
+def name_key(value: Optional[str]) -> str:
+    """음식명 정확 일치 비교용 키. embed_foods.py의 임베딩 텍스트와 같은 규칙에 NFC/대소문자 정리만 더한다."""
+    return normalize_component(unicodedata.normalize("NFC", value or "")).casefold()
+
+
+def pack_vector(vector: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vector, dtype=VECTOR_DTYPES[VECTOR_DTYPE]).tobytes()
+
+
+def unpack_vector(row: dict) -> np.ndarray:
+    """vector(BLOB) 컬럼을 우선 사용하고, 마이그레이션 전 행은 JSON 텍스트로 해석한다."""
+    blob = row.get("vector")
+    if blob is None:
+        return np.asarray(json.loads(row["embedding"]), dtype=np.float32)
+
+    dtype_name = row.get("vector_dtype") or VECTOR_DTYPE
+    dtype = VECTOR_DTYPES.get(dtype_name)
+    if dtype is None:
+        raise RuntimeError(f"지원하지 않는 벡터 dtype입니다: {dtype_name}")
+
+    # 복사 없이 BLOB 버퍼를 그대로 바라보는 뷰
+    return np.frombuffer(blob, dtype=dtype)
+
+
+def build_record(row: dict) -> Dict:
+    # drop nulls
+    nutrients = {key: float(row[key]) for key in NUTRIENT_FIELDS if row[key] is not None}
+
+    return {
+        "id": row["id"],
+        "food_code": row["food_code"],
+        "food_name": row["food_name"],
+        "common_name": row["common_name"],
+        "serving_size": row["serving_size"],
+        "nutrients": nutrients,
+    }
+
+
+def decode_rows(rows: List[dict]) -> Tuple[np.ndarray, List[Dict]]:
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32), []
+
+    dimension = int(rows[0]["dimension"])
+    vectors = np.empty((len(rows), dimension), dtype=np.float32)
+    records: List[Dict] = []
+
+    for index, row in enumerate(rows):
+        vector = unpack_vector(row)
+        if vector.shape[0] != dimension:
+            raise RuntimeError(
+                f"임베딩 차원이 일치하지 않습니다 (food_id={row['id']}: {vector.shape[0]} != {dimension})."
+            )
+        vectors[index] = vector
+        records.append(build_record(row))
+
+    return vectors, records
+
+
+def fetch_catalog(connection, capacity: Optional[int] = None) -> Tuple[np.ndarray, "RecordTable"]:
+    """전체 카탈로그를 (벡터 행렬, ``records.RecordTable``)로 읽는다.
+
+    서버 측 커서(``SSDictCursor``)로 행을 하나씩 받아 미리 잡아 둔 벡터 행렬과 컬럼 배열에 바로 채운다.
+    결과 전체를 ``fetchall()``로 받아 두지 않으므로 로드 중 최대 메모리가 최종 크기와 비슷하게 유지된다.
+    ``capacity``는 미리 잡을 행 수다. 방금 조회한 시그니처의 ``count``를 넘기면 행 수를 다시 세지 않는다.
+    """
+    # records가 이 모듈의 NUTRIENT_FIELDS를 가져다 쓰므로 순환 import를 피해 여기서 가져온다
+    from records import RecordTableBuilder
+
+    if capacity is None:
+        capacity = int(fetch_signature(connection)["count"])
+    builder = RecordTableBuilder(capacity)
+    vectors: Optional[np.ndarray] = None
+
+    with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+        cursor.execute(CATALOG_SQL)
+        for row in cursor:
+            vector = unpack_vector(row)
+            if vectors is None:
+                vectors = np.empty((max(capacity, 1), int(row["dimension"])), dtype=np.float32)
+            if vector.shape[0] != vectors.shape[1]:
+                raise RuntimeError(
+                    f"임베딩 차원이 일치하지 않습니다 (food_id={row['id']}: {vector.shape[0]} != {vectors.shape[1]})."
+                )
+            if builder.count == vectors.shape[0]:
+                # 행 수를 센 뒤에 추가된 행
+                vectors = np.concatenate([vectors, np.empty_like(vectors)])
+            vectors[builder.count] = vector
+            builder.append(row)
+
+    if vectors is None:
+        raise RuntimeError("food_embeddings 테이블이 비어 있습니다. embed_foods.py를 먼저 실행하세요.")
+
+    return vectors[: builder.count], builder.build()
+
+
+def fetch_signature(connection) -> Dict:
+    """행 수, 최종 수정 시각, 그 시각에 수정된 food_id 목록. 이전 값과 같으면 카탈로그가 바뀌지 않은 것으로 본다.
+
+    ``boundary_ids``는 다음 ``fetch_changes``가 경계 시각의 행을 다시 읽지 않는 데 쓰인다. 카탈로그를 읽기 전에
+    조회하므로 여기에 든 행은 모두 이어서 읽는 데이터에 포함된다.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(SIGNATURE_SQL)
+        signature = dict(cursor.fetchone())
+        cursor.execute(BOUNDARY_SQL, (signature["embeddings_updated_at"], signature["foods_updated_at"]))
+        signature["boundary_ids"] = [row["food_id"] for row in cursor.fetchall()]
+    return signature
+
+
+def fetch_changes(
+    connection,
+    since: Dict,
+    known_ids: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
+    """since 시그니처 이후 바뀐 행만 읽는다.
+
+    반환값은 (현재 존재하는 food_id 전체, 바뀐 행의 벡터, 바뀐 행의 레코드)이다. 수정 시각이 경계 시각보다 뒤인 행,
+    경계 시각과 같지만 since의 ``boundary_ids``에 없던(같은 초에 뒤늦게 쓰인) 행, 수정 시각이 없는 새 행을 읽는다.
+    """
+    boundary = (since["embeddings_updated_at"] or EPOCH, since["foods_updated_at"] or EPOCH)
+    with connection.cursor() as cursor:
+        cursor.execute(IDS_SQL)
+        current_ids = np.fromiter((row["food_id"] for row in cursor.fetchall()), dtype=np.int64)
+
+        cursor.execute(EMBEDDING_CHANGES_SQL, boundary[:1])
+        changed = {row["id"]: row for row in cursor.fetchall()}
+        cursor.execute(FOOD_CHANGES_SQL, boundary[1:])
+        changed.update((row["id"], row) for row in cursor.fetchall())
+        rows = list(changed.values())
+
+        cursor.execute(BOUNDARY_SQL, boundary)
+        at_boundary = np.fromiter((row["food_id"] for row in cursor.fetchall()), dtype=np.int64)
+        late = np.setdiff1d(at_boundary, np.asarray(since.get("boundary_ids", []), dtype=np.int64))
+
+        fetched = np.fromiter((row["id"] for row in rows), dtype=np.int64, count=len(rows))
+        missing = np.setdiff1d(np.union1d(np.setdiff1d(current_ids, known_ids), late), fetched)
+        for start in range(0, missing.size, 1000):
+            chunk = missing[start : start + 1000].tolist()
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(CATALOG_COLUMNS_SQL + f" WHERE f.id IN ({placeholders})", chunk)
+            rows.extend(cursor.fetchall())
+
+    rows.sort(key=lambda row: row["id"])
+    vectors, records = decode_rows(rows)
+    return current_ids, vectors, records
+
+
+def connect():
+    """``MATCHER_SOURCE``(기본 mysql)의 연결. SQLite/Parquet 소스도 같은 SQL과 dict 행으로 읽는다."""
+    return default_source().connect()
+
+
+def load_catalog() -> Tuple[np.ndarray, "RecordTable"]:
+    connection = connect()
+    try:
+        return fetch_catalog(connection)
+    finally:
+        connection.close()
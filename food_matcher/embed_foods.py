@@ -1,33 +1,50 @@
-import json
+import argparse
 import math
 import os
 from datetime import datetime
 
 import numpy as np
-import pymysql
 from dotenv import load_dotenv
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+from catalog import VECTOR_DTYPE, fetch_catalog, normalize_component, pack_vector, unpack_vector
+from projection import PROJECTION_DIM, PROJECTION_METHODS, PROJECTION_PATH, fit_projection, save_projection
+from sources import DataSource, default_source, parse_source
+
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "127.0.0.1"),
-    "port": int(os.getenv("DB_PORT", "3306")),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASSWORD", ""),
-    "database": os.getenv("DB_NAME", "foodscan"),
-    "charset": "utf8mb4",
-    "cursorclass": pymysql.cursors.DictCursor,
-    "autocommit": False,
+UPSERT_SQL = {
+    "mysql": """
+        INSERT INTO food_embeddings (food_id, dimension, embedding, vector, vector_dtype, created_at, updated_at)
+        VALUES (%s, %s, NULL, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            dimension = VALUES(dimension),
+            embedding = NULL,
+            vector = VALUES(vector),
+            vector_dtype = VALUES(vector_dtype),
+            updated_at = VALUES(updated_at)
+    """,
+    "sqlite": """
+        INSERT INTO food_embeddings (food_id, dimension, embedding, vector, vector_dtype, created_at, updated_at)
+        VALUES (%s, %s, NULL, %s, %s, %s, %s)
+        ON CONFLICT (food_id) DO UPDATE SET
+            dimension = excluded.dimension,
+            embedding = NULL,
+            vector = excluded.vector,
+            vector_dtype = excluded.vector_dtype,
+            updated_at = excluded.updated_at
+    """,
 }
 
 MODEL_NAME = os.getenv("MATCHER_MODEL_NAME", "BM-K/KoSimCSE-roberta-multitask")
 BATCH_SIZE = int(os.getenv("MATCHER_BATCH_SIZE", "128"))
 
 
-def connect():
-    return pymysql.connect(**DB_CONFIG)
+def connect(source: DataSource):
+    if not source.writable:
+        raise SystemExit(f"{source.describe()} 소스는 읽기 전용입니다. mysql 또는 sqlite 소스를 지정하세요.")
+    return source.connect()
 
 
 def fetch_foods(conn):
@@ -42,14 +59,6 @@ def fetch_foods(conn):
         return cursor.fetchall()
 
 
-def normalize_component(value: str | None) -> str:
-    if not value:
-        return ""
-
-    text = value.replace("_", " ").replace("/", " ")
-    return " ".join(text.split())
-
-
 def build_text(row: dict) -> str:
     parts: list[str] = []
 
@@ -72,24 +81,18 @@ def normalize_vector(vector: np.ndarray) -> np.ndarray:
     return vector / norm
 
 
-def upsert_embeddings(conn, payloads):
+def upsert_embeddings(conn, payloads, dialect: str):
     if not payloads:
         return
 
-    sql = """
-        INSERT INTO food_embeddings (food_id, dimension, embedding, created_at, updated_at)
-        VALUES (%s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE
-            dimension = VALUES(dimension),
-            embedding = VALUES(embedding),
-            updated_at = VALUES(updated_at)
-    """
+    sql = UPSERT_SQL[dialect]
     now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
     data = [
         (
             row["food_id"],
             row["dimension"],
-            row["embedding"],
+            row["vector"],
+            VECTOR_DTYPE,
             now,
             now,
         )
@@ -101,8 +104,100 @@ def upsert_embeddings(conn, payloads):
     conn.commit()
 
 
+def migrate_json_embeddings(conn, dialect: str):
+    """모델을 다시 돌리지 않고 기존 JSON 임베딩 행을 float32 BLOB으로 변환한다."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT food_id, dimension, embedding
+            FROM food_embeddings
+            WHERE vector IS NULL AND embedding IS NOT NULL
+            ORDER BY food_id
+            """
+        )
+        rows = cursor.fetchall()
+
+    if not rows:
+        print("변환할 JSON 임베딩이 없습니다.")
+        return
+
+    payloads = []
+    for row in tqdm(rows, desc="Migrating"):
+        vector = unpack_vector(row)
+        payloads.append(
+            {
+                "food_id": row["food_id"],
+                "dimension": len(vector),
+                "vector": pack_vector(vector),
+            }
+        )
+
+        if len(payloads) >= 1000:
+            upsert_embeddings(conn, payloads, dialect)
+            payloads = []
+
+    if payloads:
+        upsert_embeddings(conn, payloads, dialect)
+
+    print(f"{len(rows)}개의 JSON 임베딩을 바이너리 포맷으로 변환했습니다.")
+
+
+def write_projection(vectors: np.ndarray, args):
+    """검색 1차(저차원) 스캔에 쓸 투영 행렬을 임베딩과 함께 저장한다."""
+    if args.projection == "none":
+        return
+
+    components = fit_projection(vectors, args.projection_dim, args.projection)
+    save_projection(args.projection_path, components, args.projection, MODEL_NAME)
+    print(f"{args.projection} 투영({components.shape[0]} -> {components.shape[1]}차원)을 {args.projection_path}에 저장했습니다.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="foods 테이블을 임베딩해 food_embeddings에 저장합니다.")
+    parser.add_argument(
+        "--migrate-json",
+        action="store_true",
+        help="새로 임베딩하지 않고 기존 JSON 임베딩을 float32 BLOB으로 변환만 합니다.",
+    )
+    parser.add_argument(
+        "--projection",
+        choices=PROJECTION_METHODS + ("none",),
+        default="pca",
+        help="저차원 1차 검색용 투영 방식 (pca: 비중심 SVD, truncate: 앞쪽 차원만 사용)",
+    )
+    parser.add_argument("--projection-dim", type=int, default=PROJECTION_DIM)
+    parser.add_argument("--projection-path", default=PROJECTION_PATH)
+    parser.add_argument(
+        "--projection-only",
+        action="store_true",
+        help="임베딩은 그대로 두고 food_embeddings에 저장된 벡터로 투영 행렬만 다시 계산합니다.",
+    )
+    parser.add_argument(
+        "--source",
+        default=None,
+        help="데이터 소스 (mysql, sqlite:<파일>). 지정하지 않으면 MATCHER_SOURCE를 사용합니다.",
+    )
+    return parser.parse_args()
+
+
 def main():
-    conn = connect()
+    args = parse_args()
+    source = parse_source(args.source) if args.source else default_source()
+
+    if args.projection_only:
+        conn = source.connect()
+        vectors, _ = fetch_catalog(conn)
+        conn.close()
+        write_projection(vectors, args)
+        return
+
+    conn = connect(source)
+
+    if args.migrate_json:
+        migrate_json_embeddings(conn, source.kind)
+        conn.close()
+        return
+
     foods = fetch_foods(conn)
 
     if not foods:
@@ -115,6 +210,7 @@ def main():
     texts = [build_text(row) for row in foods]
     total_batches = math.ceil(len(texts) / BATCH_SIZE)
     payloads = []
+    batches = []
 
     for batch_index in tqdm(range(total_batches), desc="Embedding"):
         start = batch_index * BATCH_SIZE
@@ -128,26 +224,29 @@ def main():
             batch_size=min(BATCH_SIZE, 64),
             convert_to_numpy=True,
         )
+        batches.append(embeddings.astype(np.float32))
 
         for food_row, vector in zip(chunk_foods, embeddings):
             payloads.append(
                 {
                     "food_id": food_row["id"],
                     "dimension": len(vector),
-                    "embedding": json.dumps(vector.tolist(), ensure_ascii=False),
+                    "vector": pack_vector(vector),
                 }
             )
 
         if len(payloads) >= 1000:
-            upsert_embeddings(conn, payloads)
+            upsert_embeddings(conn, payloads, source.kind)
             payloads = []
 
     if payloads:
-        upsert_embeddings(conn, payloads)
+        upsert_embeddings(conn, payloads, source.kind)
 
     conn.close()
     print("food_embeddings 테이블 갱신이 완료되었습니다.")
 
+    write_projection(np.vstack(batches), args)
+
 
 if __name__ == "__main__":
     main()
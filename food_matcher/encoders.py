@@ -0,0 +1,104 @@
+import json
+import os
+import time
+from typing import List, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+from metrics import STAGE_SECONDS
+
+load_dotenv()
+
+MODEL_NAME = os.getenv("MATCHER_MODEL_NAME", "BM-K/KoSimCSE-roberta-multitask")
+MODEL_DEVICE = os.getenv("MATCHER_DEVICE", "cpu")
+ENCODER_BACKEND = os.getenv("MATCHER_BACKEND", "torch")
+ONNX_DIR = os.getenv("MATCHER_ONNX_DIR", "onnx")
+ONNX_THREADS = int(os.getenv("MATCHER_ONNX_THREADS", "0"))  # 0이면 onnxruntime 기본값
+
+ONNX_META_FILE = "encoder.json"
+ONNX_MODEL_FILE = "model.int8.onnx"
+
+
+class OnnxEncoder:
+    """export_onnx.py로 내보낸 int8 ONNX 모델을 SentenceTransformer.encode와 같은 방식으로 호출한다."""
+
+    def __init__(self, directory: str, model_name: str, threads: int = 0):
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+        except ImportError as exc:
+            raise RuntimeError("onnx 백엔드를 사용하려면 onnxruntime이 필요합니다 (`pip install -r requirements-optional.txt`).") from exc
+
+        meta_path = os.path.join(directory, ONNX_META_FILE)
+        if not os.path.exists(meta_path):
+            raise RuntimeError(f"ONNX 모델이 없습니다: {directory} (python export_onnx.py export를 먼저 실행하세요.)")
+        with open(meta_path, encoding="utf-8") as handle:
+            self.meta = json.load(handle)
+
+        if self.meta["model_name"] != model_name:
+            raise RuntimeError(
+                f"ONNX 모델({self.meta['model_name']})과 서버 모델({model_name})이 다릅니다. export_onnx.py를 다시 실행하세요."
+            )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(directory, self.meta.get("model_file", ONNX_MODEL_FILE)),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+        self.input_names = [item.name for item in self.session.get_inputs()]
+        self.pooling = self.meta["pooling"]
+        self.max_seq_length = self.meta["max_seq_length"]
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **_,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        started = time.perf_counter()
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        inputs = {name: tokens[name].astype(np.int64) for name in self.input_names}
+        STAGE_SECONDS.observe("tokenize", time.perf_counter() - started)
+        hidden = self.session.run(None, inputs)[0]
+
+        if self.pooling == "cls":
+            embeddings = hidden[:, 0]
+        else:
+            mask = inputs["attention_mask"][:, :, np.newaxis].astype(np.float32)
+            embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        embeddings = embeddings.astype(np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(backend: str = ENCODER_BACKEND):
+    """MATCHER_BACKEND에 따라 PyTorch SentenceTransformer 또는 ONNX Runtime 인코더를 만든다."""
+    if backend == "onnx":
+        return OnnxEncoder(ONNX_DIR, MODEL_NAME, ONNX_THREADS)
+    if backend != "torch":
+        raise RuntimeError(f"알 수 없는 인코더 백엔드입니다: {backend} (지원: torch, onnx)")
+
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(MODEL_NAME, device=MODEL_DEVICE)
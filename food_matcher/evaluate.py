@@ -0,0 +1,213 @@
+"""라벨이 붙은 쿼리로 검색 모드별 정확도와 지연 시간을 나란히 비교한다.
+
+카탈로그와 인코더는 서버와 같은 경로(``MATCHER_SOURCE``/스냅샷/공유 메모리, ``MATCHER_BACKEND``)로 한 번만 올리고,
+모드마다 ``server.VectorStore``의 세대를 새로 만들어 /match와 같은 코드로 검색한다.
+
+    python evaluate.py --labels eval_queries.tsv
+    python evaluate.py --synthetic 500 --modes exact int8 hybrid exact_name --min-recall 0.9
+
+라벨 파일은 ``쿼리<TAB>food_code[,food_code...]`` 형식의 UTF-8 TSV다(``#``으로 시작하는 줄은 무시).
+``--synthetic N``은 카탈로그에서 N개 행을 골라 이름을 변형한 쿼리(띄어쓰기 제거, 별칭, 한 글자 누락)를 만든다.
+
+출력 항목: recall@k(정답 코드가 상위 k개 안에 있는 비율), mrr, 쿼리당 p50/p99 지연(ms, 인코딩 포함),
+인덱스 생성 시간과 세대가 붙잡고 있는 메모리(MB, tracemalloc 기준이라 hnswlib 같은 네이티브 할당은 빠진다).
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+import server
+from cache import normalize_query
+from catalog import name_key, normalize_component
+from encoders import load_encoder
+
+LabeledQuery = Tuple[str, Set[str]]
+
+# 모드 이름 -> 서버 설정. 값은 server 모듈의 같은 이름 전역을 덮어쓴다
+MODES: Dict[str, Dict] = {
+    "exact": {"INDEX_BACKEND": "exact"},
+    "int8": {"INDEX_BACKEND": "int8"},
+    "int4": {"INDEX_BACKEND": "int4"},
+    "hnsw": {"INDEX_BACKEND": "hnsw"},
+    "ivf": {"INDEX_BACKEND": "ivf"},
+    "hybrid": {"INDEX_BACKEND": "exact", "HYBRID": True, "FUZZY": True},
+    "exact_name": {"INDEX_BACKEND": "exact", "EXACT_MATCH": True},
+}
+
+DEFAULT_MODES = ("exact", "int8", "hnsw", "hybrid", "exact_name")
+BASELINE = {"INDEX_BACKEND": "exact", "HYBRID": False, "FUZZY": False, "EXACT_MATCH": False}
+
+
+def read_labels(path: str) -> List[LabeledQuery]:
+    labeled = []
+    with open(path, encoding="utf-8-sig") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            query, _, codes = line.partition("\t")
+            expected = {code.strip() for code in codes.split(",") if code.strip()}
+            if not query.strip() or not expected:
+                raise SystemExit(f"{path}:{line_number}: '쿼리<TAB>food_code' 형식이 아닙니다.")
+            labeled.append((query.strip(), expected))
+    return labeled
+
+
+def synthetic_labels(records, count: int, seed: int = 0) -> List[LabeledQuery]:
+    """카탈로그 이름을 살짝 바꾼 쿼리. 같은 이름 키를 가진 행의 코드는 모두 정답으로 친다."""
+    codes = records.strings("food_code")
+    names = records.strings("food_name")
+    aliases = records.strings("common_name")
+
+    by_name: Dict[str, Set[str]] = {}
+    for code, name in zip(codes, names):
+        by_name.setdefault(name_key(name), set()).add(code)
+
+    rng = np.random.default_rng(seed)
+    labeled = []
+    for position, row in enumerate(rng.choice(len(records), min(count, len(records)), replace=False).tolist()):
+        name = normalize_component(names[row])
+        if not name:
+            continue
+        variant = position % 3
+        if variant == 0:
+            query = name.replace(" ", "")
+        elif variant == 1 and aliases[row]:
+            query = normalize_component(aliases[row])
+        elif len(name) > 3:
+            drop = int(rng.integers(1, len(name) - 1))
+            query = name[:drop] + name[drop + 1 :]
+        else:
+            query = name
+        labeled.append((query, by_name[name_key(names[row])]))
+    return labeled
+
+
+@contextmanager
+def configured(settings: Dict) -> Iterator[None]:
+    """블록 안에서만 server 전역을 ``BASELINE`` + ``settings``로 바꾸고, 나올 때 원래 값으로 되돌린다.
+
+    바꾸는 전역은 모두 먼저 읽어 두므로(없는 이름이면 아무것도 바꾸지 않고 AttributeError) 설정 도중이나 블록 안에서
+    예외가 나도 건드린 전역은 빠짐없이 되돌아간다.
+    """
+    values = {**BASELINE, **settings}
+    previous = {key: getattr(server, key) for key in values}
+    try:
+        for key, value in values.items():
+            setattr(server, key, value)
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(server, key, value)
+
+
+def build_store(encoder, base: server.StoreGeneration) -> Tuple[server.VectorStore, float, float]:
+    """현재 server 전역 설정으로 ``base``의 벡터/레코드를 다시 발행한 저장소. ``configured`` 안에서 부른다."""
+    store = server.VectorStore()
+    store.model = encoder
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        store._publish(base.vectors, base.records, base.source, base.signature)
+        seconds = time.perf_counter() - started
+        # 공유하는 벡터/레코드는 이미 할당되어 있으므로 이 모드가 새로 붙잡은 메모리만 잡힌다
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return store, seconds, retained / (1 << 20)
+
+
+def ranked_codes(store: server.VectorStore, query: str, limit: int, threshold: float) -> List[str]:
+    # /match와 같은 순서: 정확한 이름 빠른 경로(꺼져 있으면 None) 다음 임베딩 검색. 지연 시간에 응답 직렬화도 포함된다
+    query = normalize_query(query)
+    body = store.match_exact(query, limit) or store.match_body(query, limit, threshold)
+    return [match["food"]["food_code"] for match in json.loads(body)["matches"]]
+
+
+def evaluate_mode(
+    mode: str,
+    encoder,
+    base: server.StoreGeneration,
+    labeled: List[LabeledQuery],
+    ks: List[int],
+    threshold: float,
+) -> Dict:
+    limit = max(ks)
+    latencies = []
+    ranks: List[Optional[int]] = []
+    # 검색 경로도 server 전역(HYBRID, FUZZY 등)을 읽으므로 평가가 끝날 때까지 설정을 유지한다
+    with configured(MODES[mode]):
+        try:
+            store, build_seconds, memory_mb = build_store(encoder, base)
+        except RuntimeError as exc:
+            # hnswlib 미설치처럼 이 환경에서 만들 수 없는 모드는 건너뛰고 이유를 남긴다
+            return {"mode": mode, "skipped": str(exc)}
+
+        for query, expected in labeled:
+            started = time.perf_counter()
+            codes = ranked_codes(store, query, limit, threshold)
+            latencies.append((time.perf_counter() - started) * 1000)
+            ranks.append(next((rank for rank, code in enumerate(codes, start=1) if code in expected), None))
+
+    row = {"mode": mode, "queries": len(labeled)}
+    for k in ks:
+        row[f"recall@{k}"] = round(sum(rank is not None and rank <= k for rank in ranks) / len(ranks), 4)
+    row["mrr"] = round(sum(1.0 / rank for rank in ranks if rank is not None) / len(ranks), 4)
+    row["p50_ms"] = round(float(np.percentile(latencies, 50)), 3)
+    row["p99_ms"] = round(float(np.percentile(latencies, 99)), 3)
+    row["build_s"] = round(build_seconds, 2)
+    row["memory_mb"] = round(memory_mb, 1)
+    return row
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="라벨 쿼리로 검색 모드별 recall/MRR/지연 시간/메모리를 비교합니다.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--labels", help="쿼리<TAB>food_code[,food_code...] 형식의 TSV")
+    source.add_argument("--synthetic", type=int, help="카탈로그 이름을 변형해 만들 쿼리 수")
+    parser.add_argument("--modes", nargs="+", choices=tuple(MODES), default=list(DEFAULT_MODES))
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--threshold", type=float, default=-1.0, help="검색 threshold (기본: 제한 없음)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--min-recall",
+        type=float,
+        default=None,
+        help="가장 큰 k의 recall이 이 값보다 낮은 모드가 있으면 종료 코드 1로 끝낸다 (CI 확인용)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    loader = server.VectorStore()
+    with configured({}):
+        loader.load()
+    base = loader.generation
+    encoder = load_encoder()
+
+    labeled = read_labels(args.labels) if args.labels else synthetic_labels(base.records, args.synthetic, args.seed)
+    if not labeled:
+        raise SystemExit("평가할 쿼리가 없습니다.")
+
+    failed = []
+    for mode in args.modes:
+        row = evaluate_mode(mode, encoder, base, labeled, args.k, args.threshold)
+        print(json.dumps(row, ensure_ascii=False), flush=True)
+        if args.min_recall is not None and "skipped" not in row and row[f"recall@{max(args.k)}"] < args.min_recall:
+            failed.append(mode)
+
+    if failed:
+        raise SystemExit(f"recall 기준({args.min_recall}) 미달: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
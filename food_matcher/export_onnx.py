@@ -0,0 +1,170 @@
+"""쿼리 인코더를 ONNX로 내보내고 동적 int8 양자화한다.
+
+    python export_onnx.py export                 # MATCHER_MODEL_NAME -> onnx/model.int8.onnx
+    python export_onnx.py compare --min-cosine 0.99
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import List
+
+import numpy as np
+
+from encoders import MODEL_NAME, ONNX_DIR, ONNX_META_FILE, ONNX_MODEL_FILE, OnnxEncoder, load_encoder
+
+FLOAT_MODEL_FILE = "model.onnx"
+ONNX_OPSET = 14
+
+# compare 기본 문장: GPT가 돌려주는 짧은 요리명과 설명형 문장을 섞는다
+SAMPLE_TEXTS = [
+    "김치찌개",
+    "비빔밥",
+    "된장국",
+    "짜장면",
+    "돈가스",
+    "모둠 초밥",
+    "프라이드 치킨",
+    "계란이 올려진 매콤한 비빔냉면",
+    "계란이 올라간 얼큰한 라면",
+    "새콤달콤 양파와 튀김이 어우러진 탕수육",
+    "윤기 흐르는 짜장면",
+    "피자_치킨 피자 기준량 100g",
+]
+
+
+def pooling_mode(model) -> str:
+    pooling = model[1]
+    if getattr(pooling, "pooling_mode_cls_token", False):
+        return "cls"
+    if getattr(pooling, "pooling_mode_mean_tokens", False):
+        return "mean"
+    raise RuntimeError("cls/mean 이외의 pooling은 ONNX 백엔드에서 지원하지 않습니다.")
+
+
+def export(output_dir: str):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(MODEL_NAME, device="cpu")
+    transformer = model[0]
+    tokenizer = transformer.tokenizer
+    auto_model = transformer.auto_model.eval()
+
+    input_names = [name for name in tokenizer.model_input_names if name in ("input_ids", "attention_mask", "token_type_ids")]
+
+    class HiddenStates(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = auto_model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    sample = tokenizer(["김치찌개", "계란이 올려진 비빔냉면"], padding=True, return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    os.makedirs(output_dir, exist_ok=True)
+    float_path = os.path.join(output_dir, FLOAT_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            HiddenStates(),
+            tuple(sample[name] for name in input_names),
+            float_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+
+    quantize_dynamic(float_path, os.path.join(output_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(output_dir)
+
+    meta = {
+        "model_name": MODEL_NAME,
+        "model_file": ONNX_MODEL_FILE,
+        "pooling": pooling_mode(model),
+        "max_seq_length": model.max_seq_length,
+        "quantization": "dynamic-int8",
+        "opset": ONNX_OPSET,
+    }
+    with open(os.path.join(output_dir, ONNX_META_FILE), "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, ensure_ascii=False, indent=2)
+
+    print(f"{MODEL_NAME} -> {os.path.join(output_dir, ONNX_MODEL_FILE)} ({meta['pooling']} pooling)")
+
+
+def _latency_ms(encode, texts: List[str], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        for text in texts:
+            started = time.perf_counter()
+            encode(text)
+            samples.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(samples, 50))
+
+
+def compare(output_dir: str, texts: List[str], repeat: int, min_cosine: float):
+    torch_encoder = load_encoder("torch")
+    onnx_encoder = OnnxEncoder(output_dir, MODEL_NAME)
+
+    def encode_torch(batch):
+        return torch_encoder.encode(batch, convert_to_numpy=True, normalize_embeddings=True)
+
+    def encode_onnx(batch):
+        return onnx_encoder.encode(batch, convert_to_numpy=True, normalize_embeddings=True)
+
+    reference = encode_torch(texts)
+    candidate = encode_onnx(texts)
+    cosines = np.sum(reference * candidate, axis=1)
+
+    # 검색 결과 관점에서도 비교: 문장 간 유사도 순위가 같은지
+    same_neighbor = np.mean(
+        np.argsort(-(reference @ reference.T), axis=1)[:, 1] == np.argsort(-(candidate @ candidate.T), axis=1)[:, 1]
+    )
+
+    encode_torch(texts[0])
+    encode_onnx(texts[0])
+    report = {
+        "texts": len(texts),
+        "cosine_min": round(float(cosines.min()), 5),
+        "cosine_mean": round(float(cosines.mean()), 5),
+        "nearest_neighbor_agreement": round(float(same_neighbor), 4),
+        "torch_p50_ms": round(_latency_ms(encode_torch, texts, repeat), 3),
+        "onnx_p50_ms": round(_latency_ms(encode_onnx, texts, repeat), 3),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if report["cosine_min"] < min_cosine:
+        raise SystemExit(f"cosine 최소값 {report['cosine_min']} < 기준 {min_cosine}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="쿼리 인코더 ONNX 내보내기/검증")
+    parser.add_argument("command", choices=("export", "compare"))
+    parser.add_argument("--dir", default=ONNX_DIR)
+    parser.add_argument("--texts", help="비교에 쓸 문장 파일 (한 줄에 하나)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "export":
+        export(args.dir)
+        return
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts, encoding="utf-8-sig") as handle:
+            texts = [line.strip() for line in handle if line.strip()]
+    compare(args.dir, texts, args.repeat, args.min_cosine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""foods / food_embeddings를 로컬 파일로 내보낸다.
+
+MySQL 없이 서버·부하 테스트·프로파일링·CI를 돌리기 위한 용도다. 원본은 ``MATCHER_SOURCE``(기본 mysql) 또는 ``--from``.
+
+    python export_source.py sqlite catalog.db          # MATCHER_SOURCE=sqlite:catalog.db
+    python export_source.py parquet catalog_parquet    # MATCHER_SOURCE=parquet:catalog_parquet (pyarrow 필요)
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Tuple
+
+import pymysql
+
+from sources import TABLES, DataSource, create_tables, default_source, parse_source
+
+EXPORT_BATCH = 1000
+
+ORDER_BY = {"foods": "id", "food_embeddings": "food_id"}
+
+PARQUET_TYPES = {
+    "INTEGER": "int64",
+    "REAL": "float64",
+    "TEXT": "string",
+    "BLOB": "binary",
+}
+
+
+def _value(value):
+    # SQLite/Parquet에 그대로 넣을 수 있는 값으로 바꾼다. 시각은 MySQL DATETIME과 같은 문자열로 두어 크기 비교가 유지된다
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def read_batches(connection, table: str) -> Iterator[List[Tuple]]:
+    names = [name for name, _ in TABLES[table]]
+    with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+        cursor.execute(f"SELECT {', '.join(names)} FROM {table} ORDER BY {ORDER_BY[table]}")
+        batch: List[Tuple] = []
+        for row in cursor:
+            batch.append(tuple(_value(row[name]) for name in names))
+            if len(batch) >= EXPORT_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def export_sqlite(source: DataSource, path: str) -> Dict[str, int]:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, staging = tempfile.mkstemp(dir=directory, prefix=".export-", suffix=".db")
+    os.close(fd)
+
+    counts = {}
+    try:
+        target = sqlite3.connect(staging)
+        create_tables(target)
+        connection = source.connect()
+        try:
+            for table, columns in TABLES.items():
+                names = [name for name, _ in columns]
+                insert = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['?'] * len(names))})"
+                counts[table] = 0
+                for batch in read_batches(connection, table):
+                    target.executemany(insert, batch)
+                    counts[table] += len(batch)
+        finally:
+            connection.close()
+        target.commit()
+        target.close()
+        os.replace(staging, path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.unlink(staging)
+        raise
+    return counts
+
+
+def export_parquet(source: DataSource, directory: str) -> Dict[str, int]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise SystemExit("parquet로 내보내려면 pyarrow가 필요합니다 (`pip install -r requirements-optional.txt`).") from exc
+
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    connection = source.connect()
+    try:
+        for table, columns in TABLES.items():
+            schema = pa.schema([(name, PARQUET_TYPES[kind.split()[0]]) for name, kind in columns])
+            path = os.path.join(directory, f"{table}.parquet")
+            staging = f"{path}.tmp-{os.getpid()}"
+            counts[table] = 0
+            try:
+                with pq.ParquetWriter(staging, schema) as writer:
+                    for batch in read_batches(connection, table):
+                        writer.write_table(pa.Table.from_pylist([dict(zip(schema.names, row)) for row in batch], schema))
+                        counts[table] += len(batch)
+                os.replace(staging, path)
+            except BaseException:
+                if os.path.exists(staging):
+                    os.unlink(staging)
+                raise
+    finally:
+        connection.close()
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="foods / food_embeddings를 SQLite 또는 Parquet 파일로 내보냅니다.")
+    parser.add_argument("format", choices=("sqlite", "parquet"))
+    parser.add_argument("target", help="SQLite 파일 경로 또는 Parquet 디렉터리")
+    parser.add_argument(
+        "--from",
+        dest="source",
+        default=None,
+        help="원본 데이터 소스 (mysql, sqlite:<파일>, parquet:<디렉터리>). 지정하지 않으면 MATCHER_SOURCE를 사용합니다.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    source = parse_source(args.source) if args.source else default_source()
+
+    if args.format == "sqlite":
+        counts = export_sqlite(source, args.target)
+    else:
+        counts = export_parquet(source, args.target)
+
+    summary = ", ".join(f"{table} {count}건" for table, count in counts.items())
+    print(f"{source.describe()} -> {args.format}:{args.target} 내보내기 완료 ({summary})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""`/match` 사전 필터 (food_code 접두사, 영양 성분 범위, 성분 유무).
+
+세대를 만들 때 food_code 계열(``D101``, ``D202`` 같은 첫 구간)과 성분 유무를 행 단위 비트마스크(``np.packbits``)로,
+영양 성분은 (행 x 성분) float64 컬럼(null은 NaN)으로 준비해 둔다. 계열이 아닌 접두사는 RecordTable의 food_code
+바이트 버퍼와 오프셋에서 직접 비교한다. 필터는 이 배열들의 논리 연산으로 평가하고, 살아남은 행만 채점한다.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from catalog import NUTRIENT_FIELDS
+from records import RecordTable
+
+NutrientRange = Tuple[Optional[float], Optional[float]]
+
+
+class FilterColumns:
+    def __init__(self, code_data: np.ndarray, code_offsets: np.ndarray, nutrients: np.ndarray):
+        # food_code는 RecordTable 컬럼(UTF-8 버퍼 + 행 경계 오프셋)을 복사 없이 그대로 쓴다
+        self.count = int(code_offsets.shape[0]) - 1
+        self.code_data = code_data
+        self.code_offsets = code_offsets
+        self.nutrients = nutrients
+
+        # 계열은 첫 '-' 앞까지, '-'가 없으면 코드 전체다
+        starts, ends = code_offsets[:-1], code_offsets[1:]
+        dashes = np.flatnonzero(code_data == ord("-"))
+        following = np.searchsorted(dashes, starts)
+        dash_at = dashes[np.minimum(following, dashes.size - 1)] if dashes.size else ends
+        family_ends = np.where((following < dashes.size) & (dash_at < ends), dash_at, ends)
+        families = np.asarray(
+            [code_data[start:end].tobytes().decode("utf-8") for start, end in zip(starts, family_ends)]
+        )
+        self.families = {str(family): np.packbits(families == family) for family in np.unique(families)}
+        self.present = {
+            name: np.packbits(~np.isnan(nutrients[:, position])) for position, name in enumerate(NUTRIENT_FIELDS)
+        }
+
+    @classmethod
+    def from_records(cls, records: RecordTable) -> "FilterColumns":
+        # 영양 성분도 테이블의 컬럼을 복사 없이 그대로 쓴다
+        return cls(records.columns["food_code.data"], records.columns["food_code.offsets"], records.nutrients)
+
+    def _startswith(self, prefix: str) -> np.ndarray:
+        needle = np.frombuffer(prefix.encode("utf-8"), dtype=np.uint8)
+        selected = np.zeros(self.count, dtype=bool)
+        rows = np.flatnonzero(np.diff(self.code_offsets) >= needle.size)
+        # 길이가 충분한 행마다 앞 len(prefix)바이트를 모아 한 번에 비교한다
+        heads = self.code_data[self.code_offsets[rows, np.newaxis] + np.arange(needle.size)]
+        selected[rows[(heads == needle).all(axis=1)]] = True
+        return selected
+
+    def _unpack(self, packed: np.ndarray) -> np.ndarray:
+        return np.unpackbits(packed, count=self.count).view(bool)
+
+    def mask(
+        self,
+        prefixes: List[str],
+        ranges: Dict[str, NutrientRange],
+        required: List[str],
+    ) -> np.ndarray:
+        """조건을 모두 만족하는 행의 bool 마스크. 접두사 여러 개는 OR, 나머지 조건은 AND로 묶는다."""
+        mask = np.ones(self.count, dtype=bool)
+
+        if prefixes:
+            selected = np.zeros(self.count, dtype=bool)
+            for prefix in prefixes:
+                packed = self.families.get(prefix)
+                if packed is not None:
+                    selected |= self._unpack(packed)
+                else:
+                    selected |= self._startswith(prefix)
+            mask &= selected
+
+        for name in required:
+            mask &= self._unpack(self.present[name])
+
+        for name, (low, high) in ranges.items():
+            # NaN(값 없음)은 어떤 비교도 만족하지 않으므로 범위 조건이 있으면 자동으로 빠진다
+            column = self.nutrients[:, NUTRIENT_FIELDS.index(name)]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+
+        return mask
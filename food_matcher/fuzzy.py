@@ -0,0 +1,132 @@
+"""자모 단위 오타 허용 이름 색인 (SymSpell 방식).
+
+"김치찌게"와 "김치찌개"는 음절로는 한 글자가 다르지만 자모로 풀면 ㅔ/ㅐ 하나 차이다. 음식명을 NFD로 자모 분해한 뒤
+앞부분(prefix)에서 최대 ``max_distance``개 문자를 지운 변형들을 미리 색인해 두고, 쿼리도 같은 방식으로 변형을 만들어
+사전 조회만으로 후보를 찾는다. 후보는 전체 문자열의 편집 거리로 다시 확인한다.
+
+변형 문자열을 dict로 들고 있으면 이름 수만 건에도 수십 MB가 들어, 변형의 해시(int64)와 이름 번호를 정렬된
+NumPy 배열로 보관하고 ``searchsorted``로 찾는다. 해시 충돌로 섞인 후보는 편집 거리 확인에서 걸러진다.
+"""
+
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from catalog import name_key
+
+FUZZY_PREFIX_LENGTH = 7
+
+
+def to_jamo(text: Optional[str]) -> str:
+    # 한글 음절은 NFD에서 초성/중성/종성 자모로 분해된다. 공백과 기호는 오타 비교에서 뺀다
+    return "".join(char for char in unicodedata.normalize("NFD", name_key(text)) if char.isalnum())
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {item[:position] + item[position + 1 :] for item in frontier for position in range(len(item))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(left: str, right: str, limit: int) -> int:
+    """Levenshtein 거리. limit을 넘는 것이 확실해지면 limit + 1을 반환한다."""
+    if abs(len(left) - len(right)) > limit:
+        return limit + 1
+
+    previous = list(range(len(right) + 1))
+    for row, left_char in enumerate(left, start=1):
+        current = [row]
+        for column, right_char in enumerate(right, start=1):
+            current.append(
+                min(
+                    previous[column] + 1,
+                    current[column - 1] + 1,
+                    previous[column - 1] + (left_char != right_char),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    def __init__(self, max_distance: int, prefix_length: int = FUZZY_PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.terms: List[str] = []
+        self.rows: List[Tuple[int, ...]] = []
+        self.hashes = np.empty(0, dtype=np.int64)
+        self.term_ids = np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def build(cls, names: List[List[Optional[str]]], max_distance: int) -> "FuzzyIndex":
+        """``names[row]``는 그 행의 이름 후보들(food_name, common_name)이다."""
+        index = cls(max_distance)
+        term_ids: Dict[str, int] = {}
+        term_rows: List[Dict[int, None]] = []
+
+        for row, values in enumerate(names):
+            for value in values:
+                term = to_jamo(value)
+                if not term:
+                    continue
+                if term not in term_ids:
+                    term_ids[term] = len(index.terms)
+                    index.terms.append(term)
+                    term_rows.append({})
+                term_rows[term_ids[term]][row] = None
+
+        index.rows = [tuple(rows) for rows in term_rows]
+
+        hashes: List[int] = []
+        owners: List[int] = []
+        for term_id, term in enumerate(index.terms):
+            variants = _deletes(term[: index.prefix_length], max_distance)
+            hashes.extend(hash(variant) for variant in variants)
+            owners.extend([term_id] * len(variants))
+
+        hashes_array = np.asarray(hashes, dtype=np.int64)
+        order = np.argsort(hashes_array, kind="stable")
+        index.hashes = hashes_array[order]
+        index.term_ids = np.asarray(owners, dtype=np.int32)[order]
+        return index
+
+    def search(self, query: str, limit: int) -> List[Tuple[int, int]]:
+        """편집 거리 이내 이름을 가진 행을 (행 번호, 거리)로 거리 오름차순 최대 limit개 반환한다."""
+        term = to_jamo(query)
+        if not term:
+            return []
+        # 짧은 이름은 자모 하나만 바뀌어도 전혀 다른 음식이 되므로 길이에 비례해 허용 거리를 줄인다
+        distance = min(self.max_distance, len(term) // 4)
+
+        variants = np.fromiter(
+            (hash(variant) for variant in _deletes(term[: self.prefix_length], distance)), dtype=np.int64
+        )
+        starts = np.searchsorted(self.hashes, variants, side="left")
+        ends = np.searchsorted(self.hashes, variants, side="right")
+        candidates = set()
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            candidates.update(self.term_ids[start:end].tolist())
+
+        matches = []
+        for term_id in candidates:
+            found = edit_distance(term, self.terms[term_id], distance)
+            if found <= distance:
+                matches.append((found, term_id))
+        matches.sort()
+
+        results: List[Tuple[int, int]] = []
+        seen = set()
+        for found, term_id in matches:
+            for row in self.rows[term_id]:
+                if row not in seen:
+                    seen.add(row)
+                    results.append((row, found))
+                    if len(results) >= limit:
+                        return results
+        return results
@@ -0,0 +1,768 @@
+"""VectorStore 검색 백엔드 (exact / sharded / hnsw / ivf / int8 / int4 / projected).
+
+모든 백엔드는 같은 인터페이스를 가진다.
+
+- ``build(vectors)``: 정규화된 float32 행렬로 인덱스를 만든다.
+- ``save(directory)`` / ``load(directory, vectors)``: 인덱스를 디스크에 저장하고 다시 연다.
+- ``search(query_vectors, k, threshold)``: 쿼리마다 (인덱스 배열, 점수 배열)을 점수 내림차순으로 반환한다.
+  점수는 항상 float32 원본 벡터와의 내적이라 백엔드가 달라도 같은 스케일이다.
+
+근사 백엔드의 정확도는 아래 명령으로 exact 검색과 비교한다.
+
+    python indexes.py recall --backends hnsw ivf int8 --k 1 5 10 --min-recall 0.95
+"""
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from catalog import load_catalog
+from metrics import STAGE_SECONDS
+from projection import PROJECTION_DIM, fit_projection
+from ranking import select_top_k
+from snapshot import MODEL_NAME, SNAPSHOT_DIR, read_snapshot
+
+load_dotenv()
+
+INDEX_BACKEND = os.getenv("MATCHER_INDEX_BACKEND", "exact")
+INDEX_DIR = os.getenv("MATCHER_INDEX_DIR", "")
+# MATCHER_INDEX_DIR이 비어 있어도 float32 벡터를 mmap으로 열어야 하는 백엔드(int8/int4)가 쓰는 위치
+DEFAULT_INDEX_DIR = "indexes"
+
+HNSW_M = int(os.getenv("MATCHER_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("MATCHER_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("MATCHER_HNSW_EF_SEARCH", "64"))
+
+# /match의 limit 상한. HNSW 탐색 폭(ef)은 이 값보다 작게 두지 않는다
+MAX_LIMIT = 10
+
+IVF_NLIST = int(os.getenv("MATCHER_IVF_NLIST", "0"))  # 0이면 4*sqrt(N)
+IVF_NPROBE = int(os.getenv("MATCHER_IVF_NPROBE", "8"))
+IVF_TRAIN_ITERATIONS = 10
+
+# sharded: 행렬을 몇 조각으로 나눠 동시에 채점할지. 0이면 CPU 코어 수
+SHARDS = int(os.getenv("MATCHER_SHARDS", "0"))
+
+QUANT_RESCORE_POOL = int(os.getenv("MATCHER_QUANT_RESCORE_POOL", "256"))
+RERANK_POOL = int(os.getenv("MATCHER_RERANK_POOL", "200"))
+
+# 스캔 버퍼(행 x 차원 float32)가 CPU 캐시에 머무르도록 작게 잡는다
+QUANT_SCAN_CHUNK = 256
+
+META_FILE = "index.json"
+
+SearchResult = Tuple[np.ndarray, np.ndarray]
+
+
+def fingerprint(vectors: np.ndarray) -> str:
+    # 저장된 인덱스가 지금 로드한 벡터로 만들어졌는지 확인하는 용도
+    return hashlib.sha1(np.ascontiguousarray(vectors)).hexdigest()
+
+
+class VectorIndex:
+    name = ""
+    # True면 저장 디렉터리의 float32 벡터를 mmap으로 열어야 메모리 이점이 생긴다 (index_directory 참고)
+    mapped = False
+
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None
+        # 벡터 fingerprint(None이면 다음 기동 때 재사용하지 않는다)와 저장할 때마다 새로 정하는 빌드 id. index.json에 함께 남긴다
+        self.fingerprint: Optional[str] = None
+        self.build_id = ""
+
+    def build(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            "backend": self.name,
+            "count": int(self.vectors.shape[0]),
+            "dimension": int(self.vectors.shape[1]),
+            "fingerprint": self.fingerprint,
+            "build_id": self.build_id,
+            "params": self.params(),
+        }
+        with open(os.path.join(directory, META_FILE), "w", encoding="utf-8") as handle:
+            json.dump(meta, handle, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, vectors: np.ndarray) -> "VectorIndex":
+        index = cls()
+        index.vectors = vectors
+        return index
+
+    def params(self) -> Dict:
+        return {}
+
+    def attach(self, directory: str):
+        """save() 이후 디스크에 저장된 파일을 바라보도록 전환한다 (필요한 백엔드만)."""
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        raise NotImplementedError
+
+    def _rescore(self, query_vector: np.ndarray, candidates: np.ndarray, k: int, threshold: float) -> SearchResult:
+        # 후보를 인덱스 순으로 정렬해 두면 동점 처리 순서가 exact 검색과 같아진다
+        candidates = np.unique(candidates[candidates >= 0])
+        scores = np.dot(self.vectors[candidates], query_vector)
+        selected = select_top_k(scores, k, threshold)
+        return candidates[selected], scores[selected]
+
+
+class ExactIndex(VectorIndex):
+    name = "exact"
+
+    def save(self, directory: str):
+        # 원본 행렬 자체가 인덱스라 따로 저장할 것이 없다
+        pass
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        # (queries x dim) @ (dim x records)
+        started = time.perf_counter()
+        scores = np.dot(query_vectors, self.vectors.T)
+        scored = time.perf_counter()
+        results = []
+        for row in scores:
+            selected = select_top_k(row, k, threshold)
+            results.append((selected, row[selected]))
+        STAGE_SECONDS.observe("score", scored - started)
+        STAGE_SECONDS.observe("topk", time.perf_counter() - scored)
+        return results
+
+
+_shard_pools: Dict[int, ThreadPoolExecutor] = {}
+_shard_pool_lock = threading.Lock()
+
+
+def shard_pool(workers: int) -> ThreadPoolExecutor:
+    # 세대가 바뀔 때마다 스레드를 새로 만들지 않도록 워커 수별로 하나씩 프로세스에 둔다
+    with _shard_pool_lock:
+        pool = _shard_pools.get(workers)
+        if pool is None:
+            pool = _shard_pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"shard{workers}")
+        return pool
+
+
+class ShardedIndex(ExactIndex):
+    """행렬을 연속된 행 구간(shard)으로 나눠 스레드 풀에서 동시에 채점하는 exact 검색.
+
+    NumPy 행렬곱은 BLAS 안에서 GIL을 놓으므로 shard마다 코어 하나를 쓴다. shard별 상위 k개는 이미
+    (점수 내림차순, 인덱스 오름차순)으로 정렬되어 있어 ``heapq.merge``로 합친 앞 k개가 exact 검색 결과와 같다.
+    """
+
+    name = "sharded"
+
+    def __init__(self, shards: int = 0):
+        super().__init__()
+        self.shards = shards or SHARDS or os.cpu_count() or 1
+        self.bounds: List[Tuple[int, int]] = []
+
+    def build(self, vectors: np.ndarray):
+        super().build(vectors)
+        size = -(-vectors.shape[0] // self.shards)
+        # 행 구간 슬라이스는 복사 없는 연속 뷰다
+        self.bounds = [(start, min(start + size, vectors.shape[0])) for start in range(0, vectors.shape[0], max(size, 1))]
+
+    @classmethod
+    def load(cls, directory: str, vectors: np.ndarray) -> "ShardedIndex":
+        index = cls()
+        index.build(vectors)
+        return index
+
+    def params(self) -> Dict:
+        return {"shards": len(self.bounds)}
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        if len(self.bounds) <= 1:
+            return super().search(query_vectors, k, threshold)
+
+        pool = shard_pool(self.shards)
+        partials = list(
+            pool.map(lambda bounds: self._search_shard(bounds, query_vectors, k, threshold), self.bounds)
+        )
+
+        results = []
+        for position in range(query_vectors.shape[0]):
+            runs = [
+                zip((-scores).tolist(), indices.tolist(), scores)
+                for indices, scores in (partial[position] for partial in partials)
+            ]
+            top = list(itertools.islice(heapq.merge(*runs), k))
+            results.append(
+                (
+                    np.fromiter((index for _, index, _ in top), dtype=np.int64, count=len(top)),
+                    np.fromiter((score for _, _, score in top), dtype=np.float32, count=len(top)),
+                )
+            )
+        return results
+
+    def _search_shard(
+        self,
+        bounds: Tuple[int, int],
+        query_vectors: np.ndarray,
+        k: int,
+        threshold: float,
+    ) -> List[SearchResult]:
+        start, stop = bounds
+        scores = np.dot(query_vectors, self.vectors[start:stop].T)
+        results = []
+        for row in scores:
+            selected = select_top_k(row, k, threshold)
+            results.append((selected + start, row[selected]))
+        return results
+
+
+class HNSWIndex(VectorIndex):
+    name = "hnsw"
+    filename = "hnsw.bin"
+
+    def __init__(self):
+        super().__init__()
+        self.graph = None
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError as exc:
+            raise RuntimeError("hnsw 백엔드를 사용하려면 hnswlib이 필요합니다 (`pip install -r requirements-optional.txt`).") from exc
+        return hnswlib
+
+    def params(self) -> Dict:
+        return {"M": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": self.ef_search()}
+
+    @staticmethod
+    def ef_search() -> int:
+        # ef는 그래프 전체에 걸리는 값이라 요청마다 바꾸면 동시에 도는 knn_query끼리 서로의 탐색 폭을 바꾼다.
+        # 빌드/로드 때 한 번만 정하고, 이보다 큰 k는 hnswlib이 max(ef, k)로 탐색한다
+        return max(HNSW_EF_SEARCH, MAX_LIMIT)
+
+    def build(self, vectors: np.ndarray):
+        super().build(vectors)
+        hnswlib = self._hnswlib()
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.init_index(max_elements=vectors.shape[0], ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        graph.add_items(vectors, np.arange(vectors.shape[0]))
+        graph.set_ef(self.ef_search())
+        self.graph = graph
+
+    def save(self, directory: str):
+        super().save(directory)
+        self.graph.save_index(os.path.join(directory, self.filename))
+
+    @classmethod
+    def load(cls, directory: str, vectors: np.ndarray) -> "HNSWIndex":
+        index = super().load(directory, vectors)
+        hnswlib = cls._hnswlib()
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.load_index(os.path.join(directory, cls.filename), max_elements=vectors.shape[0])
+        graph.set_ef(cls.ef_search())
+        index.graph = graph
+        return index
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        k = min(k, self.vectors.shape[0])
+        labels, _ = self.graph.knn_query(query_vectors, k=k)
+        return [
+            self._rescore(query_vector, row.astype(np.int64), k, threshold)
+            for query_vector, row in zip(query_vectors, labels)
+        ]
+
+
+class IVFIndex(VectorIndex):
+    """k-means 코어스 양자화기 + 역색인. 가까운 nprobe개 클러스터만 정확히 채점한다."""
+
+    name = "ivf"
+    filename = "ivf.npz"
+
+    def __init__(self):
+        super().__init__()
+        self.centroids: Optional[np.ndarray] = None
+        self.order: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+
+    def params(self) -> Dict:
+        return {"nlist": int(self.centroids.shape[0]), "nprobe": IVF_NPROBE}
+
+    def build(self, vectors: np.ndarray):
+        super().build(vectors)
+        count = vectors.shape[0]
+        nlist = IVF_NLIST or max(1, int(4 * np.sqrt(count)))
+        nlist = min(nlist, count)
+
+        rng = np.random.default_rng(0)
+        sample_size = min(count, max(nlist * 32, 50_000))
+        sample = np.asarray(vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        # spherical k-means: 정규화된 벡터이므로 내적이 가장 큰 중심으로 할당한다
+        for _ in range(IVF_TRAIN_ITERATIONS):
+            assignment = self._assign(sample, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=nlist)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts)))[filled]
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            centroids[filled] = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+
+        assignment = self._assign(vectors, centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.order = np.argsort(assignment, kind="stable").astype(np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=nlist)))).astype(np.int64)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        assignment = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], chunk):
+            block = np.asarray(vectors[start : start + chunk])
+            assignment[start : start + chunk] = np.argmax(np.dot(block, centroids.T), axis=1)
+        return assignment
+
+    def save(self, directory: str):
+        super().save(directory)
+        np.savez(
+            os.path.join(directory, self.filename),
+            centroids=self.centroids,
+            order=self.order,
+            offsets=self.offsets,
+        )
+
+    @classmethod
+    def load(cls, directory: str, vectors: np.ndarray) -> "IVFIndex":
+        index = super().load(directory, vectors)
+        with np.load(os.path.join(directory, cls.filename)) as data:
+            index.centroids = data["centroids"]
+            index.order = data["order"]
+            index.offsets = data["offsets"]
+        return index
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        nlist = self.centroids.shape[0]
+        nprobe = min(IVF_NPROBE, nlist)
+        centroid_scores = np.dot(query_vectors, self.centroids.T)
+
+        results = []
+        for query_vector, row in zip(query_vectors, centroid_scores):
+            probe = np.argpartition(-row, nprobe - 1)[:nprobe] if nprobe < nlist else np.arange(nlist)
+            candidates = np.concatenate([self.order[self.offsets[cell] : self.offsets[cell + 1]] for cell in probe])
+            results.append(self._rescore(query_vector, candidates, k, threshold))
+        return results
+
+
+class QuantizedIndex(VectorIndex):
+    """int8 스칼라 양자화 1차 스캔 + float32 재채점.
+
+    차원별 대칭 스케일로 양자화한 코드만 메모리에 두고 전체를 훑은 뒤, 상위 ``QUANT_RESCORE_POOL``개
+    후보만 float32 벡터로 다시 채점한다. float32 벡터는 저장 디렉터리(또는 스냅샷)의 .npy를 mmap으로
+    열어 필요한 행만 읽는다.
+
+    메모리를 줄이기 위한 백엔드이고 검색이 빨라지지는 않는다. NumPy에는 int8 GEMM이 없어(정수 행렬곱은
+    BLAS를 거치지 않아 float32보다 2~3배 느리다) 스캔은 캐시 크기 블록을 float32로 옮겨 BLAS로 곱하므로,
+    1차 스캔 비용은 exact 검색과 비슷하고 재채점만큼 더 든다.
+    """
+
+    name = "int8"
+    mapped = True
+    bits = 8
+    code_dtype = np.int8
+    codes_file = "codes.npy"
+    scales_file = "scales.npy"
+    vectors_file = "vectors.npy"
+
+    def __init__(self):
+        super().__init__()
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+
+    @property
+    def levels(self) -> int:
+        return 2 ** (self.bits - 1) - 1
+
+    def params(self) -> Dict:
+        return {"bits": self.bits, "rescore_pool": QUANT_RESCORE_POOL}
+
+    def build(self, vectors: np.ndarray, chunk: int = 65536):
+        super().build(vectors)
+        count, dimension = vectors.shape
+
+        max_abs = np.zeros(dimension, dtype=np.float32)
+        for start in range(0, count, chunk):
+            np.maximum(max_abs, np.abs(vectors[start : start + chunk]).max(axis=0), out=max_abs)
+        self.scales = np.where(max_abs > 0, max_abs / self.levels, 1.0).astype(np.float32)
+
+        codes = np.empty((count, self._code_width(dimension)), dtype=self.code_dtype)
+        for start in range(0, count, chunk):
+            block = np.rint(vectors[start : start + chunk] / self.scales)
+            codes[start : start + chunk] = self._encode(np.clip(block, -self.levels, self.levels).astype(np.int8))
+        self.codes = codes
+
+    def _code_width(self, dimension: int) -> int:
+        return dimension
+
+    def _encode(self, codes: np.ndarray) -> np.ndarray:
+        return codes
+
+    def _decode_into(self, codes: np.ndarray, out: np.ndarray):
+        """``_encode``의 역변환. ``out``(행 x 차원)에 양자화 레벨 값을 쓴다."""
+        np.copyto(out, codes, casting="unsafe")
+
+    def _scan_width(self, dimension: int) -> int:
+        return dimension
+
+    def _scan_weights(self, weighted: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(스캔 버퍼와 곱할 쿼리 가중치, 쿼리별 상수항). int8은 레벨 값 그대로 곱한다."""
+        return weighted, np.zeros(weighted.shape[0], dtype=np.float32)
+
+    def _scan_into(self, codes: np.ndarray, out: np.ndarray):
+        self._decode_into(codes, out)
+
+    def save(self, directory: str):
+        super().save(directory)
+        np.save(os.path.join(directory, self.codes_file), self.codes)
+        np.save(os.path.join(directory, self.scales_file), self.scales)
+        # 스냅샷에서 온 벡터는 이미 mmap이므로 중복 저장하지 않는다
+        if not isinstance(self.vectors, np.memmap):
+            np.save(os.path.join(directory, self.vectors_file), np.ascontiguousarray(self.vectors, dtype=np.float32))
+
+    def attach(self, directory: str):
+        self.codes = np.load(os.path.join(directory, self.codes_file), mmap_mode="r")
+        vectors_path = os.path.join(directory, self.vectors_file)
+        if os.path.exists(vectors_path):
+            self.vectors = np.load(vectors_path, mmap_mode="r")
+
+    @classmethod
+    def load(cls, directory: str, vectors: np.ndarray) -> "QuantizedIndex":
+        index = super().load(directory, vectors)
+        index.scales = np.load(os.path.join(directory, cls.scales_file))
+        index.attach(directory)
+        return index
+
+    def approximate_scores(self, query_vectors: np.ndarray) -> np.ndarray:
+        """(records x queries) 근사 점수. q·v ≈ (q * scale)·code"""
+        count, width = self.codes.shape[0], self._scan_width(self.scales.shape[0])
+        weights, offsets = self._scan_weights((query_vectors * self.scales).astype(np.float32))
+        scores = np.empty((count, weights.shape[0]), dtype=np.float32)
+        buffer = np.empty((QUANT_SCAN_CHUNK, width), dtype=np.float32)
+
+        for start in range(0, count, QUANT_SCAN_CHUNK):
+            block = self.codes[start : start + QUANT_SCAN_CHUNK]
+            rows = block.shape[0]
+            self._scan_into(block, buffer[:rows])
+            np.dot(buffer[:rows], weights.T, out=scores[start : start + rows])
+        scores += offsets
+        return scores
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        count = self.codes.shape[0]
+        pool = min(max(QUANT_RESCORE_POOL, k), count)
+        approximate = self.approximate_scores(query_vectors)
+
+        results = []
+        for query_vector, column in zip(query_vectors, approximate.T):
+            candidates = np.argpartition(-column, pool - 1)[:pool] if pool < count else np.arange(count)
+            results.append(self._rescore(query_vector, candidates, k, threshold))
+        return results
+
+
+class Int4QuantizedIndex(QuantizedIndex):
+    """4비트 코드를 한 바이트에 두 개씩 담는다 (int8 대비 메모리 절반, 정확도는 더 낮음).
+
+    스캔은 니블을 풀지 않는다. 바이트 b = lo + 16*hi(각 레벨 + 8)이므로
+    w_lo*(lo-8) + w_hi*(hi-8) = w_lo*b + (w_hi - 16*w_lo)*hi - 8*(w_lo + w_hi)이고, 버퍼에는 b와 b >> 4만 옮기면 된다.
+    """
+
+    name = "int4"
+    bits = 4
+    code_dtype = np.uint8
+
+    def _code_width(self, dimension: int) -> int:
+        return (dimension + 1) // 2
+
+    def _encode(self, codes: np.ndarray) -> np.ndarray:
+        shifted = (codes.astype(np.int16) + 8).astype(np.uint8)
+        if shifted.shape[1] % 2:
+            shifted = np.pad(shifted, ((0, 0), (0, 1)), constant_values=8)
+        return shifted[:, 0::2] | (shifted[:, 1::2] << 4)
+
+    def _decode_into(self, codes: np.ndarray, out: np.ndarray):
+        dimension = out.shape[1]
+        out[:, 0::2] = (codes & 0x0F)[:, : (dimension + 1) // 2]
+        out[:, 1::2] = (codes >> 4)[:, : dimension // 2]
+        out -= 8
+
+    def _scan_width(self, dimension: int) -> int:
+        return 2 * self._code_width(dimension)
+
+    def _scan_weights(self, weighted: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if weighted.shape[1] % 2:
+            # 홀수 차원의 패딩 니블(레벨 0)은 가중치 0으로 둔다
+            weighted = np.pad(weighted, ((0, 0), (0, 1)))
+        low, high = weighted[:, 0::2], weighted[:, 1::2]
+        return np.concatenate([low, high - 16 * low], axis=1), -8 * weighted.sum(axis=1)
+
+    def _scan_into(self, codes: np.ndarray, out: np.ndarray):
+        width = codes.shape[1]
+        np.copyto(out[:, :width], codes, casting="unsafe")
+        np.copyto(out[:, width:], codes >> 4, casting="unsafe")
+
+
+class ProjectedIndex(VectorIndex):
+    """저차원(PCA/절단) 투영 공간에서 1차 스캔 후, 후보 ``RERANK_POOL``개만 원본 차원으로 재정렬한다.
+
+    투영 행렬은 embed_foods.py가 임베딩과 함께 저장한 것을 쓰고, 없으면 로드한 벡터로 바로 계산한다.
+    """
+
+    name = "projected"
+    components_file = "components.npy"
+    reduced_file = "reduced.npy"
+
+    def __init__(self, projection: Optional[np.ndarray] = None):
+        super().__init__()
+        self.projection = projection
+        self.reduced: Optional[np.ndarray] = None
+
+    def params(self) -> Dict:
+        return {"dimension": int(self.projection.shape[1]), "rerank_pool": RERANK_POOL}
+
+    def build(self, vectors: np.ndarray, chunk: int = 65536):
+        super().build(vectors)
+        if self.projection is None:
+            self.projection = fit_projection(vectors, PROJECTION_DIM)
+
+        reduced = np.empty((vectors.shape[0], self.projection.shape[1]), dtype=np.float32)
+        for start in range(0, vectors.shape[0], chunk):
+            np.dot(vectors[start : start + chunk], self.projection, out=reduced[start : start + chunk])
+        self.reduced = reduced
+
+    def save(self, directory: str):
+        super().save(directory)
+        np.save(os.path.join(directory, self.components_file), self.projection)
+        np.save(os.path.join(directory, self.reduced_file), self.reduced)
+
+    def attach(self, directory: str):
+        self.reduced = np.load(os.path.join(directory, self.reduced_file), mmap_mode="r")
+
+    @classmethod
+    def load(cls, directory: str, vectors: np.ndarray) -> "ProjectedIndex":
+        index = super().load(directory, vectors)
+        index.projection = np.load(os.path.join(directory, cls.components_file))
+        index.attach(directory)
+        return index
+
+    def search(self, query_vectors: np.ndarray, k: int, threshold: float) -> List[SearchResult]:
+        count = self.reduced.shape[0]
+        pool = min(max(RERANK_POOL, k), count)
+        coarse = np.dot(np.dot(query_vectors, self.projection), self.reduced.T)
+
+        results = []
+        for query_vector, row in zip(query_vectors, coarse):
+            candidates = np.argpartition(-row, pool - 1)[:pool] if pool < count else np.arange(count)
+            results.append(self._rescore(query_vector, candidates, k, threshold))
+        return results
+
+
+BACKENDS = {
+    ExactIndex.name: ExactIndex,
+    ShardedIndex.name: ShardedIndex,
+    HNSWIndex.name: HNSWIndex,
+    IVFIndex.name: IVFIndex,
+    QuantizedIndex.name: QuantizedIndex,
+    Int4QuantizedIndex.name: Int4QuantizedIndex,
+    ProjectedIndex.name: ProjectedIndex,
+}
+
+
+def index_directory(root: str, backend: str) -> str:
+    """``root/<backend>``. root가 비어 있으면 mmap이 필요한 백엔드만 ``DEFAULT_INDEX_DIR``을 쓴다.
+
+    양자화 백엔드를 디렉터리 없이 만들면 재채점용 float32 행렬을 메모리에 그대로 둔 채 코드까지 더 들고 있게 된다.
+    """
+    index_cls = BACKENDS.get(backend)
+    if not root and index_cls is not None and index_cls.mapped:
+        root = DEFAULT_INDEX_DIR
+    return os.path.join(root, backend) if root else ""
+
+
+def _read_meta(directory: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(directory, META_FILE), encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def create_index(
+    backend: str,
+    vectors: np.ndarray,
+    directory: str = "",
+    projection: Optional[np.ndarray] = None,
+    reuse: bool = True,
+    vectors_fingerprint: Optional[str] = None,
+) -> VectorIndex:
+    """저장된 인덱스가 현재 벡터와 일치하면 열고, 아니면 새로 만들어 저장한다.
+
+    ``projection``은 projected 백엔드에서만 쓰는 (원본 차원 x 축소 차원) 투영 행렬이다. ``reuse=False``는 방금 메모리에서
+    병합한 벡터처럼 저장된 인덱스와 일치할 수 없는 경우다. 행렬 전체를 해시하지 않고 바로 만들며, mmap이 필요한 백엔드만
+    저장한다(fingerprint 없이 저장하므로 다음 기동 때 재사용되지 않는다). ``vectors_fingerprint``를 주면(스냅샷 manifest)
+    mmap한 행렬 전체를 읽어 해시하지 않는다.
+    """
+    index_cls = BACKENDS.get(backend)
+    if index_cls is None:
+        raise RuntimeError(f"알 수 없는 인덱스 백엔드입니다: {backend} (지원: {', '.join(BACKENDS)})")
+
+    if issubclass(index_cls, ExactIndex):
+        # exact/sharded는 원본 행렬 자체가 인덱스라 저장하거나 다시 열 것이 없다
+        index = index_cls()
+        index.build(vectors)
+        return index
+
+    if not (directory and reuse):
+        vectors_fingerprint = None
+    elif vectors_fingerprint is None:
+        vectors_fingerprint = fingerprint(vectors)
+        meta = _read_meta(directory)
+        if meta and meta["backend"] == backend and meta["fingerprint"] == vectors_fingerprint:
+            index = index_cls.load(directory, vectors)
+            # 투영 행렬이 새로 계산되었다면 저장된 축소 벡터는 쓸 수 없다
+            if projection is None or not isinstance(index, ProjectedIndex) or np.array_equal(index.projection, projection):
+                index.fingerprint = vectors_fingerprint
+                return index
+
+    index = ProjectedIndex(projection) if index_cls is ProjectedIndex else index_cls()
+    index.build(vectors)
+    if directory and (reuse or index.mapped):
+        index.fingerprint = vectors_fingerprint
+        if _save_atomic(index, directory):
+            index.attach(directory)
+    return index
+
+
+def _save_atomic(index: VectorIndex, directory: str) -> bool:
+    """여러 워커가 동시에 만들어도 완성된 디렉터리만 보이도록 임시 경로에 쓴 뒤 교체한다.
+
+    교체 뒤 ``directory``의 index.json이 이 빌드(빌드 id, fingerprint)의 것일 때만 True다. 교체에 실패하면
+    그 자리에는 다른 워커나 이전 세대의 인덱스, 지우다 만 디렉터리(Windows에서 mmap 중인 파일)가 남아 있을 수 있고,
+    이때 attach하면 메모리의 코드/레코드와 다른 행렬을 읽게 되므로 호출자는 메모리의 배열을 그대로 쓴다.
+    """
+    index.build_id = uuid.uuid4().hex
+    staging = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    index.save(staging)
+    shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    meta = _read_meta(directory)
+    return meta is not None and meta.get("build_id") == index.build_id and meta.get("fingerprint") == index.fingerprint
+
+
+def recall_report(
+    vectors: np.ndarray,
+    backends: List[str],
+    ks: List[int],
+    queries: np.ndarray,
+) -> List[Dict]:
+    exact = create_index(ExactIndex.name, vectors)
+    max_k = max(ks)
+    truth = [indices for indices, _ in exact.search(queries, max_k, -1.0)]
+
+    rows = []
+    for backend in backends:
+        started = time.perf_counter()
+        index = create_index(backend, vectors)
+        build_seconds = time.perf_counter() - started
+
+        latencies = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            indices, _ = index.search(query[np.newaxis, :], max_k, -1.0)[0]
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append(indices)
+
+        row = {
+            "backend": backend,
+            "build_s": round(build_seconds, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        }
+        for k in ks:
+            hits = [len(set(expected[:k]) & set(actual[:k])) / min(k, len(expected)) for expected, actual in zip(truth, found)]
+            row[f"recall@{k}"] = round(float(np.mean(hits)), 4)
+        rows.append(row)
+    return rows
+
+
+def sample_queries(vectors: np.ndarray, count: int, noise: float, seed: int = 0) -> np.ndarray:
+    # 카탈로그 벡터에 잡음을 섞어 "비슷하지만 똑같지는 않은" 쿼리를 만든다
+    rng = np.random.default_rng(seed)
+    picked = np.asarray(vectors[rng.choice(vectors.shape[0], min(count, vectors.shape[0]), replace=False)])
+    queries = picked + rng.normal(0, noise, size=picked.shape).astype(np.float32)
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="근사 검색 백엔드의 recall@k를 exact 검색과 비교합니다.")
+    parser.add_argument("command", choices=("recall", "build"))
+    parser.add_argument("--backends", nargs="+", default=[HNSWIndex.name, IVFIndex.name])
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--queries", type=int, default=500, help="카탈로그에서 뽑을 쿼리 수")
+    parser.add_argument("--noise", type=float, default=0.02, help="쿼리 벡터에 섞을 가우시안 잡음 표준편차")
+    parser.add_argument("--dir", default=INDEX_DIR, help="build 시 인덱스를 저장할 디렉터리")
+    parser.add_argument(
+        "--min-recall",
+        type=float,
+        default=None,
+        help="가장 큰 k의 recall이 이 값보다 낮은 백엔드가 있으면 종료 코드 1로 끝낸다 (CI 확인용)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    vectors_fingerprint = None
+    if SNAPSHOT_DIR:
+        vectors, _, manifest = read_snapshot(SNAPSHOT_DIR, MODEL_NAME)
+        vectors_fingerprint = manifest.get("fingerprint")
+    else:
+        vectors, _ = load_catalog()
+
+    if args.command == "build":
+        for backend in args.backends:
+            create_index(
+                backend,
+                vectors,
+                os.path.join(args.dir or DEFAULT_INDEX_DIR, backend),
+                vectors_fingerprint=vectors_fingerprint,
+            )
+            print(f"{backend} 인덱스 저장 완료")
+        return
+
+    queries = sample_queries(vectors, args.queries, args.noise)
+    failed = []
+    for row in recall_report(vectors, args.backends, args.k, queries):
+        print(json.dumps(row, ensure_ascii=False))
+        if args.min_recall is not None and row[f"recall@{max(args.k)}"] < args.min_recall:
+            failed.append(row["backend"])
+
+    if failed:
+        raise SystemExit(f"recall 기준({args.min_recall}) 미달: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""음식명 음절 bigram 역색인 + BM25.
+
+짧은 한국어 음식명은 임베딩보다 글자 겹침이 더 정확한 경우가 많아, 로드 시점에 ``food_name``/``common_name``으로
+역색인을 만들어 두고 dense 검색 결과와 RRF(reciprocal rank fusion)로 합친다. 띄어쓰기 차이("김치 찌개")에
+흔들리지 않도록 문자/숫자 이외는 모두 지운 뒤 bigram을 만든다.
+"""
+
+import unicodedata
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ranking import select_top_k
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+
+    compact = "".join(char for char in unicodedata.normalize("NFC", text).lower() if char.isalnum())
+    if len(compact) < 2:
+        return [compact] if compact else []
+    return [compact[start : start + 2] for start in range(len(compact) - 1)]
+
+
+class LexicalIndex:
+    """CSR 형태의 역색인. 게시 목록마다 BM25의 문서 쪽 가중치를 미리 계산해 두고 쿼리 시에는 idf만 곱한다."""
+
+    def __init__(self, vocabulary, offsets: np.ndarray, documents: np.ndarray, weights: np.ndarray, idf: np.ndarray):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.documents = documents
+        self.weights = weights
+        self.idf = idf
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = BM25_K1, b: float = BM25_B) -> "LexicalIndex":
+        vocabulary = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        frequencies: List[int] = []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc, text in enumerate(texts):
+            grams = tokenize(text)
+            lengths[doc] = len(grams)
+            for gram, count in Counter(grams).items():
+                term_ids.append(vocabulary.setdefault(gram, len(vocabulary)))
+                doc_ids.append(doc)
+                frequencies.append(count)
+
+        terms = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        documents = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(frequencies, dtype=np.float32)[order]
+
+        document_frequency = np.bincount(terms, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=offsets[1:])
+
+        average = float(lengths.mean()) if len(texts) and lengths.mean() > 0 else 1.0
+        norm = k1 * (1.0 - b + b * lengths[documents] / average)
+        weights = (tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+        idf = np.log1p((len(texts) - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+
+        return cls(vocabulary, offsets, documents, weights, idf)
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 상위 k개의 (문서 인덱스, 점수)를 점수 내림차순으로 반환한다. 쿼리 bigram의 게시 목록만 읽는다."""
+        term_ids = [self.vocabulary[gram] for gram in set(tokenize(query)) if gram in self.vocabulary]
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        documents = np.concatenate([self.documents[self.offsets[term] : self.offsets[term + 1]] for term in term_ids])
+        contributions = np.concatenate(
+            [self.weights[self.offsets[term] : self.offsets[term + 1]] * self.idf[term] for term in term_ids]
+        )
+        candidates, inverse = np.unique(documents, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions).astype(np.float32)
+
+        selected = select_top_k(scores, k, 0.0)
+        return candidates[selected].astype(np.int64), scores[selected]
+
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int) -> List[int]:
+    """여러 순위 목록을 RRF 점수(sum 1 / (k + rank)) 내림차순으로 합친다. 동점은 먼저 나온 목록의 순서를 따른다."""
+    fused = {}
+    for ranking in rankings:
+        for rank, index in enumerate(ranking, start=1):
+            fused[index] = fused.get(index, 0.0) + 1.0 / (k + rank)
+    return sorted(fused, key=lambda index: -fused[index])
@@ -0,0 +1,140 @@
+"""/health 통계와 /metrics(Prometheus 텍스트 포맷)에 쓰는 가벼운 수집기.
+
+hot path에서는 ``time.perf_counter()`` 차이를 ``observe``에 넘기기만 하고, 문자열 렌더링은 스크레이프 때만 한다.
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# /match 단계별 소요 시간(초) 버킷
+STAGE_SECONDS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels.items():
+        text = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{text}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """고정 버킷 히스토그램. 버킷 경계는 상한(이하)이며 마지막에 +Inf 버킷이 붙는다."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.count += 1
+            self.sum += value
+
+    def stats(self) -> Dict:
+        labels = [f"le_{bound:g}" for bound in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 4) if self.count else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        """Prometheus 히스토그램 샘플 줄 (누적 버킷, _sum, _count)."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+            value_sum = self.sum
+
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            bucket_labels = format_labels({**labels, "le": format_value(float(bound))})
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(labels)} {format_value(value_sum)}")
+        lines.append(f"{name}_count{format_labels(labels)} {total}")
+        return lines
+
+
+class HistogramFamily:
+    """라벨 하나(예: stage)로 나뉜 히스토그램 묶음."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self.children: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, value: str) -> Histogram:
+        child = self.children.get(value)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(value, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: str, amount: float):
+        self.labels(value).observe(amount)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for value, child in sorted(self.children.items()):
+            lines.extend(child.samples(self.name, {self.label: value}))
+        return lines
+
+
+def render_metric(name: str, kind: str, help_text: str, samples: Sequence[Tuple[Dict[str, str], float]]) -> List[str]:
+    """gauge/counter 한 종류를 렌더링한다. samples는 (라벨, 값) 목록이다."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {format_value(value)}" for labels, value in samples)
+    return lines
+
+
+# /match 경로 전체에서 공유하는 단계별 타이머. 렌더링은 server.py의 /metrics가 한다
+STAGE_SECONDS = HistogramFamily(
+    "food_matcher_stage_seconds",
+    "Time spent in each /match stage.",
+    "stage",
+    STAGE_SECONDS_BUCKETS,
+)
+
+
+class HitCounter:
+    """빠른 경로 적중률 같은 hit/miss 카운터."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,58 @@
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECTION_PATH = os.getenv("MATCHER_PROJECTION_PATH", "projection.npz")
+PROJECTION_DIM = int(os.getenv("MATCHER_PROJECTION_DIM", "128"))
+PROJECTION_METHODS = ("pca", "truncate")
+
+# SVD에 쓰는 최대 표본 수 (카탈로그가 커져도 학습 시간이 일정하도록)
+FIT_SAMPLE_SIZE = 50_000
+
+
+def fit_projection(vectors: np.ndarray, dimension: int, method: str = "pca") -> np.ndarray:
+    """(원본 차원 x 축소 차원) 투영 행렬을 만든다.
+
+    중심화하지 않은 SVD를 쓴다. 내적 순위를 보존하려면 평균을 빼지 않아야 q·v ≈ (qP)·(vP)가 성립한다.
+    ``truncate``는 Matryoshka 계열 모델처럼 앞쪽 차원만 잘라 쓰는 경우다.
+    """
+    full_dimension = vectors.shape[1]
+    dimension = min(dimension, full_dimension)
+
+    if method == "truncate":
+        return np.eye(full_dimension, dimension, dtype=np.float32)
+    if method != "pca":
+        raise RuntimeError(f"알 수 없는 투영 방식입니다: {method} (지원: {', '.join(PROJECTION_METHODS)})")
+
+    rng = np.random.default_rng(0)
+    count = vectors.shape[0]
+    rows = np.sort(rng.choice(count, FIT_SAMPLE_SIZE, replace=False)) if count > FIT_SAMPLE_SIZE else slice(None)
+    sample = np.asarray(vectors[rows], dtype=np.float32)
+    _, _, vt = np.linalg.svd(sample, full_matrices=False)
+    return np.ascontiguousarray(vt[:dimension].T, dtype=np.float32)
+
+
+def save_projection(path: str, components: np.ndarray, method: str, model_name: str):
+    meta = {
+        "method": method,
+        "model_name": model_name,
+        "input_dimension": int(components.shape[0]),
+        "dimension": int(components.shape[1]),
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "wb") as handle:
+        np.savez(handle, components=components, meta=np.array(json.dumps(meta)))
+
+
+def load_projection(path: str) -> Optional[Tuple[np.ndarray, Dict]]:
+    if not path or not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        return data["components"], json.loads(str(data["meta"]))
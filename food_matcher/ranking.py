@@ -0,0 +1,24 @@
+import numpy as np
+
+
+def select_top_k(scores: np.ndarray, limit: int, threshold: float) -> np.ndarray:
+    """threshold 이상인 점수 중 상위 limit개의 인덱스를 점수 내림차순으로 반환한다.
+
+    전체 정렬 대신 argpartition으로 후보만 고른다. 동점은 인덱스 오름차순으로 정렬해
+    ``np.argsort(-scores, kind="stable")``을 threshold로 거른 결과와 항상 같다.
+    """
+    candidates = np.flatnonzero(scores >= threshold)
+    if candidates.size == 0 or limit <= 0:
+        return candidates[:0]
+
+    candidate_scores = scores[candidates]
+    if candidates.size > limit:
+        partitioned = np.argpartition(-candidate_scores, limit - 1)[:limit]
+        kth_score = candidate_scores[partitioned].min()
+        # 경계 점수와 동점인 후보를 모두 남겨야 정렬 결과가 결정적이다
+        keep = candidate_scores >= kth_score
+        candidates = candidates[keep]
+        candidate_scores = candidate_scores[keep]
+
+    order = np.lexsort((candidates, -candidate_scores))
+    return candidates[order[:limit]]
@@ -0,0 +1,188 @@
+"""음식 레코드를 컬럼 단위 NumPy 배열로 보관하는 테이블.
+
+행마다 dict를 두는 대신 영양 성분은 (행 x 성분) float64 행렬(null은 NaN), 문자열은 UTF-8 바이트 버퍼 + 오프셋 배열로
+저장한다. 모든 컬럼이 평범한 배열이라 공유 메모리나 파일에 그대로 올릴 수 있고, ``table[i]``로 접근할 때만
+``build_record()``와 같은 모양의 dict를 만든다.
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from catalog import NUTRIENT_FIELDS
+
+STRING_FIELDS = ("food_code", "food_name", "common_name", "serving_size")
+
+
+class RecordTable:
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.ids = columns["id"]
+        self.nutrients = columns["nutrients"]
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def __getitem__(self, row: int) -> Dict:
+        values = self.nutrients[row].tolist()
+        return {
+            "id": int(self.ids[row]),
+            "food_code": self.string("food_code", row),
+            "food_name": self.string("food_name", row),
+            "common_name": self.string("common_name", row),
+            "serving_size": self.string("serving_size", row),
+            # drop nulls (NaN)
+            "nutrients": {key: value for key, value in zip(NUTRIENT_FIELDS, values) if value == value},
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def string(self, field: str, row: int) -> Optional[str]:
+        if not self.columns[f"{field}.valid"][row]:
+            return None
+        offsets = self.columns[f"{field}.offsets"]
+        return self.columns[f"{field}.data"][offsets[row] : offsets[row + 1]].tobytes().decode("utf-8")
+
+    def strings(self, field: str) -> List[Optional[str]]:
+        # 색인을 만들 때처럼 한 컬럼만 필요할 때 레코드 dict를 만들지 않고 읽는다
+        return [self.string(field, row) for row in range(len(self))]
+
+    def nutrient(self, name: str) -> np.ndarray:
+        return self.nutrients[:, NUTRIENT_FIELDS.index(name)]
+
+    def take(self, rows: np.ndarray) -> "RecordTable":
+        """``rows`` 순서대로 행을 골라 새 테이블을 만든다. 문자열 버퍼도 배열 연산으로 모은다."""
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = {"id": self.ids[rows], "nutrients": self.nutrients[rows]}
+        for field in STRING_FIELDS:
+            offsets = self.columns[f"{field}.offsets"]
+            starts = offsets[rows]
+            lengths = offsets[rows + 1] - starts
+            taken = np.zeros(rows.size + 1, dtype=np.int64)
+            np.cumsum(lengths, out=taken[1:])
+            # 새 버퍼의 각 바이트가 원래 버퍼의 어느 위치에서 오는지
+            source = np.arange(taken[-1], dtype=np.int64) + np.repeat(starts - taken[:-1], lengths)
+            columns[f"{field}.data"] = self.columns[f"{field}.data"][source]
+            columns[f"{field}.offsets"] = taken
+            columns[f"{field}.valid"] = self.columns[f"{field}.valid"][rows]
+        return RecordTable(columns)
+
+    @classmethod
+    def concat(cls, tables: Sequence["RecordTable"]) -> "RecordTable":
+        columns = {
+            "id": np.concatenate([table.ids for table in tables]),
+            "nutrients": np.concatenate([table.nutrients for table in tables]),
+        }
+        for field in STRING_FIELDS:
+            offsets = [np.zeros(1, dtype=np.int64)]
+            base = 0
+            for table in tables:
+                table_offsets = table.columns[f"{field}.offsets"]
+                offsets.append(table_offsets[1:] + base)
+                base += int(table_offsets[-1])
+            columns[f"{field}.data"] = np.concatenate([table.columns[f"{field}.data"] for table in tables])
+            columns[f"{field}.offsets"] = np.concatenate(offsets)
+            columns[f"{field}.valid"] = np.concatenate([table.columns[f"{field}.valid"] for table in tables])
+        return cls(columns)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "RecordTable":
+        count = len(records)
+        columns = {
+            "id": np.fromiter((record["id"] for record in records), dtype=np.int64, count=count),
+            "nutrients": np.full((count, len(NUTRIENT_FIELDS)), np.nan, dtype=np.float64),
+        }
+        for row, record in enumerate(records):
+            for position, key in enumerate(NUTRIENT_FIELDS):
+                value = record["nutrients"].get(key)
+                if value is not None:
+                    columns["nutrients"][row, position] = value
+
+        for field in STRING_FIELDS:
+            encoded = [None if record[field] is None else record[field].encode("utf-8") for record in records]
+            lengths = np.fromiter((len(value or b"") for value in encoded), dtype=np.int64, count=count)
+            offsets = np.zeros(count + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            columns[f"{field}.data"] = np.frombuffer(b"".join(value or b"" for value in encoded), dtype=np.uint8)
+            columns[f"{field}.offsets"] = offsets
+            columns[f"{field}.valid"] = np.fromiter((value is not None for value in encoded), dtype=bool, count=count)
+
+        return cls(columns)
+
+
+class RecordTableBuilder:
+    """DB 행(``catalog.CATALOG_SQL``의 컬럼)을 한 줄씩 받아 RecordTable 컬럼을 채운다.
+
+    행 dict를 모아 두지 않고 바로 미리 잡아 둔 배열과 바이트 버퍼에 쓰므로, 로드 중 메모리가 최종 테이블 크기에 가깝다.
+    capacity보다 행이 많으면 배열을 늘린다.
+    """
+
+    def __init__(self, capacity: int):
+        self.count = 0
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.nutrients = np.full((capacity, len(NUTRIENT_FIELDS)), np.nan, dtype=np.float64)
+        self.strings = {field: (bytearray(), array("q", [0]), bytearray()) for field in STRING_FIELDS}
+
+    def append(self, row: Dict):
+        if self.count == self.ids.shape[0]:
+            self._grow()
+
+        self.ids[self.count] = row["id"]
+        for position, key in enumerate(NUTRIENT_FIELDS):
+            value = row[key]
+            if value is not None:
+                self.nutrients[self.count, position] = float(value)
+        for field, (data, offsets, valid) in self.strings.items():
+            value = row[field]
+            if value is not None:
+                data += value.encode("utf-8")
+            offsets.append(len(data))
+            valid.append(value is not None)
+        self.count += 1
+
+    def _grow(self):
+        capacity = max(self.ids.shape[0] * 2, 1024)
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[: self.count] = self.ids
+        nutrients = np.full((capacity, len(NUTRIENT_FIELDS)), np.nan, dtype=np.float64)
+        nutrients[: self.count] = self.nutrients
+        self.ids, self.nutrients = ids, nutrients
+
+    def build(self) -> RecordTable:
+        columns = {"id": self.ids[: self.count], "nutrients": self.nutrients[: self.count]}
+        for field, (data, offsets, valid) in self.strings.items():
+            # 버퍼를 복사하지 않고 그대로 감싼다 (이후 builder에 행을 더 넣을 수 없다)
+            columns[f"{field}.data"] = np.frombuffer(data, dtype=np.uint8)
+            columns[f"{field}.offsets"] = np.frombuffer(offsets, dtype=np.int64)
+            columns[f"{field}.valid"] = np.frombuffer(valid, dtype=bool)
+        return RecordTable(columns)
+
+
+def merge_tables(
+    vectors: np.ndarray,
+    table: RecordTable,
+    current_ids: np.ndarray,
+    changed_vectors: np.ndarray,
+    changed: RecordTable,
+) -> Tuple[np.ndarray, RecordTable]:
+    """기존 카탈로그에 변경분을 반영한 새 (벡터, 테이블)을 food_id 순으로 만든다. 입력은 건드리지 않는다."""
+    # 읽는 사이에 삭제된 행은 변경분에서도 뺀다
+    changed_rows = np.flatnonzero(np.isin(changed.ids, current_ids))
+    changed_ids = changed.ids[changed_rows]
+
+    kept_rows = np.flatnonzero(np.isin(table.ids, current_ids) & ~np.isin(table.ids, changed_ids))
+    merged_ids = np.concatenate([table.ids[kept_rows], changed_ids])
+    order = np.argsort(merged_ids, kind="stable")
+    positions = np.empty_like(order)
+    positions[order] = np.arange(order.size)
+
+    merged_vectors = np.empty((merged_ids.size, vectors.shape[1]), dtype=np.float32)
+    merged_vectors[positions[: kept_rows.size]] = vectors[kept_rows]
+    if changed_rows.size:
+        merged_vectors[positions[kept_rows.size :]] = changed_vectors[changed_rows]
+
+    merged = RecordTable.concat([table.take(kept_rows), changed.take(changed_rows)]).take(order)
+    return merged_vectors, merged
@@ -1,38 +1,103 @@
 import json
+import logging
 import os
-from typing import Dict, List, Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
-import pymysql
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from sentence_transformers import SentenceTransformer
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, Field, field_validator
+from starlette.concurrency import run_in_threadpool
+
+from batching import MicroBatcher
+from cache import LRUCache, normalize_query
+from catalog import NUTRIENT_FIELDS, connect, fetch_catalog, fetch_changes, fetch_signature, name_key
+from encoders import ENCODER_BACKEND, load_encoder
+from filters import FilterColumns
+from fuzzy import FuzzyIndex
+from indexes import INDEX_BACKEND, INDEX_DIR, MAX_LIMIT, ProjectedIndex, VectorIndex, create_index, index_directory
+from lexical import LexicalIndex, reciprocal_rank_fusion
+from metrics import STAGE_SECONDS, HitCounter, render_metric
+from projection import PROJECTION_PATH, load_projection
+from ranking import select_top_k
+from records import RecordTable, merge_tables
+from shared_store import SHM_NAME, attach_store, read_generation
+from snapshot import PROJECTION_FILE, current_version, read_snapshot
+from sources import default_source
 
 load_dotenv()
 
-DB_CONFIG = {
-    "host": os.getenv("DB_HOST", "127.0.0.1"),
-    "port": int(os.getenv("DB_PORT", "3306")),
-    "user": os.getenv("DB_USER", "root"),
-    "password": os.getenv("DB_PASSWORD", ""),
-    "database": os.getenv("DB_NAME", "foodscan"),
-    "charset": "utf8mb4",
-    "cursorclass": pymysql.cursors.DictCursor,
-}
-
 MODEL_NAME = os.getenv("MATCHER_MODEL_NAME", "BM-K/KoSimCSE-roberta-multitask")
-MODEL_DEVICE = os.getenv("MATCHER_DEVICE", "cpu")
 DEFAULT_TOP_K = int(os.getenv("MATCHER_TOP_K", "5"))
 DEFAULT_THRESHOLD = float(os.getenv("MATCHER_THRESHOLD", "0.4"))
+MAX_BATCH_QUERIES = int(os.getenv("MATCHER_MAX_BATCH_QUERIES", "64"))
+QUERY_CACHE_SIZE = int(os.getenv("MATCHER_QUERY_CACHE_SIZE", "4096"))
+RESPONSE_CACHE_SIZE = int(os.getenv("MATCHER_RESPONSE_CACHE_SIZE", "2048"))
+SNAPSHOT_DIR = os.getenv("MATCHER_SNAPSHOT_DIR", "")
+SNAPSHOT_VERIFY = os.getenv("MATCHER_SNAPSHOT_VERIFY", "0") == "1"
+REFRESH_INTERVAL = float(os.getenv("MATCHER_REFRESH_INTERVAL", "0"))
+# 레코드 JSON 조각을 미리 만들어 두고 응답을 바이트 연결로 조립한다 (Pydantic 검증/직렬화 생략)
+FAST_JSON = os.getenv("MATCHER_FAST_JSON", "0") == "1"
+MICROBATCH = os.getenv("MATCHER_MICROBATCH", "0") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MATCHER_MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MATCHER_MICROBATCH_MAX_WAIT_MS", "5"))
+STARTUP_RETRY_AFTER = int(os.getenv("MATCHER_STARTUP_RETRY_AFTER", "5"))
+# 음절 bigram BM25 후보를 dense 결과와 RRF로 합친다
+HYBRID = os.getenv("MATCHER_HYBRID", "0") == "1"
+LEXICAL_POOL = int(os.getenv("MATCHER_LEXICAL_POOL", "10"))
+RRF_K = int(os.getenv("MATCHER_RRF_K", "60"))
+# 자모 편집 거리 이내의 이름을 가진 행을 오타 구제 후보로 RRF에 더한다
+FUZZY = os.getenv("MATCHER_FUZZY", "0") == "1"
+FUZZY_DISTANCE = int(os.getenv("MATCHER_FUZZY_DISTANCE", "2"))
+FUZZY_POOL = int(os.getenv("MATCHER_FUZZY_POOL", "5"))
+# 정규화한 쿼리가 food_name/common_name과 정확히 같으면 인코더 없이 바로 응답한다
+EXACT_MATCH = os.getenv("MATCHER_EXACT_MATCH", "0") == "1"
+
+logger = logging.getLogger("food_matcher")
 
 app = FastAPI(title="Food Matcher Service", version="0.1.0")
 
 
+class NutrientRange(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+
+class MatchFilters(BaseModel):
+    food_code_prefixes: List[str] = Field([], description="food_code 접두사 (예: D101, D202). 여러 개면 OR")
+    nutrients: Dict[str, NutrientRange] = Field({}, description="영양 성분 범위 (예: energy_kcal)")
+    has_nutrients: List[str] = Field([], description="값이 있어야 하는 영양 성분")
+
+    @field_validator("nutrients", "has_nutrients")
+    @classmethod
+    def known_nutrients(cls, value):
+        unknown = [name for name in value if name not in NUTRIENT_FIELDS]
+        if unknown:
+            raise ValueError(f"알 수 없는 영양 성분입니다: {', '.join(unknown)}")
+        return value
+
+    def is_empty(self) -> bool:
+        return not self.food_code_prefixes and not self.has_nutrients and all(
+            bounds.min is None and bounds.max is None for bounds in self.nutrients.values()
+        )
+
+
 class MatchRequest(BaseModel):
     query: str = Field(..., description="GPT 멀티모달이 반환한 음식명/설명")
-    limit: int = Field(DEFAULT_TOP_K, ge=1, le=10)
+    limit: int = Field(DEFAULT_TOP_K, ge=1, le=MAX_LIMIT)
     threshold: float = Field(DEFAULT_THRESHOLD, ge=0.0, le=1.0)
+    filters: Optional[MatchFilters] = None
+
+    @field_validator("filters")
+    @classmethod
+    def drop_empty_filters(cls, value):
+        # 조건이 하나도 없는 필터는 필터 없음과 같다. 마스크를 만들지 않고 응답 캐시 키도 필터 없는 요청과 같게 한다
+        if value is None or value.is_empty():
+            return None
+        return value
 
 
 class FoodRecord(BaseModel):
@@ -53,134 +118,829 @@ class MatchPayload(BaseModel):
     matches: List[MatchResponse]
 
 
+class BatchMatchRequest(BaseModel):
+    queries: List[MatchRequest] = Field(..., min_length=1, max_length=MAX_BATCH_QUERIES)
+
+
+class BatchMatchPayload(BaseModel):
+    results: List[MatchPayload]
+
+
+Hit = Tuple[int, float]
+
+
+def render_float(value: float) -> str:
+    """Pydantic(model_dump_json)과 같은 float 표기.
+
+    자릿수는 repr과 같지만 1e-5 이상은 소수로 쓰고(repr은 1e-4 미만부터 지수 표기) 지수를 0으로 채우지 않는다.
+    """
+    text = repr(float(value))
+    mantissa, marker, exponent = text.partition("e")
+    if not marker:
+        return text
+    power = int(exponent)
+    if power == -5:
+        sign = "-" if mantissa.startswith("-") else ""
+        return f"{sign}0.0000{mantissa.lstrip('-').replace('.', '')}"
+    return f"{mantissa}e{'+' if power > 0 else '-'}{abs(power)}"
+
+
+def render_record(record: Dict) -> bytes:
+    # FoodRecord와 같은 키 순서/형식의 JSON 조각. 영양소 float은 Pydantic 표기를 따른다.
+    head = json.dumps(
+        {key: value for key, value in record.items() if key != "nutrients"}, ensure_ascii=False, separators=(",", ":")
+    )
+    nutrients = ",".join(f'"{key}":{render_float(value)}' for key, value in record["nutrients"].items())
+    return (head[:-1] + ',"nutrients":{' + nutrients + "}}").encode("utf-8")
+
+
+def render_payload(records: RecordTable, hits: List[Hit]) -> bytes:
+    """MatchPayload.model_dump_json()과 같은 바이트를 만든다. 레코드 JSON은 결과에 든 행만 그때 만든다."""
+    matches = b",".join(
+        b'{"score":' + render_float(score).encode("ascii") + b',"food":' + render_record(records[index]) + b"}"
+        for index, score in hits
+    )
+    return b'{"matches":[' + matches + b"]}"
+
+
+@dataclass(frozen=True)
+class StoreGeneration:
+    """한 번 만들어지면 바뀌지 않는 검색 데이터 묶음.
+
+    갱신은 새 세대를 만든 뒤 참조 하나를 바꾸는 것으로 끝나므로, 진행 중인 요청은 항상 한 세대만 본다.
+    """
+
+    version: int
+    source: str
+    vectors: np.ndarray
+    # 행마다 dict를 두지 않고 컬럼 배열로 보관한다. 검색 결과에 든 행만 dict/JSON으로 만든다
+    records: RecordTable
+    food_ids: np.ndarray
+    index: VectorIndex
+    signature: Dict
+    lexical: Optional[LexicalIndex] = None
+    fuzzy: Optional[FuzzyIndex] = None
+    names: Optional[Dict[str, Tuple[int, ...]]] = None
+    columns: Optional[FilterColumns] = None
+    # 공유 메모리 모드의 데이터 세그먼트. 위 배열들이 모두 해제된 뒤 닫히도록 마지막 필드로 둔다
+    segment: Optional[object] = None
+
+
 class VectorStore:
+    STARTUP_COMPONENTS = ("model", "vectors")
+
     def __init__(self):
-        self.vectors = None
-        self.records: List[Dict] = []
-        self.model = SentenceTransformer(MODEL_NAME, device=MODEL_DEVICE)
+        self.generation: Optional[StoreGeneration] = None
+        # 모델은 start_loading()이 백그라운드 스레드에서 올린다 (import 시점에 막히지 않도록)
+        self.model = None
+        self.startup = {
+            name: {"state": "pending", "stage": None, "started_at": None, "seconds": None, "error": None}
+            for name in self.STARTUP_COMPONENTS
+        }
+        self.query_cache = LRUCache(QUERY_CACHE_SIZE)
+        self.response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+        self.exact_matches = HitCounter()
+        self.fuzzy_matches = HitCounter()
+        # load/refresh가 동시에 새 세대를 만들지 않도록 막는다 (검색은 잠그지 않는다)
+        self._reload_lock = threading.RLock()
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        return self.generation.vectors if self.generation else None
+
+    @property
+    def records(self) -> Sequence[Dict]:
+        return self.generation.records if self.generation else []
+
+    @property
+    def source(self) -> Optional[str]:
+        return self.generation.source if self.generation else None
+
+    @property
+    def version(self) -> int:
+        # 세대마다 증가한다. 응답 캐시 키에 포함되어 이전 데이터로 만든 응답을 무효화한다.
+        return self.generation.version if self.generation else 0
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None and self.generation is not None
+
+    def start_loading(self) -> List[threading.Thread]:
+        """인코더 모델과 벡터를 각각의 스레드에서 동시에 로드한다. 서버는 그동안 요청을 받는다."""
+        threads = [
+            threading.Thread(target=self._load_component, args=("model", self.load_model), name="load-model", daemon=True),
+            threading.Thread(target=self._load_component, args=("vectors", self.load), name="load-vectors", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _load_component(self, name: str, target):
+        status = self.startup[name]
+        status.update(state="loading", started_at=time.time())
+        started = time.perf_counter()
+        try:
+            target()
+        except Exception as exc:  # 실패해도 프로세스는 살려 두고 /health에 원인을 보여 준다
+            logger.exception("startup component %s failed", name)
+            status.update(state="failed", error=str(exc))
+        else:
+            status.update(state="ready", stage=None)
+        finally:
+            status["seconds"] = round(time.perf_counter() - started, 3)
+
+    def _stage(self, name: str, stage: str):
+        status = self.startup[name]
+        if status["state"] == "loading":
+            status["stage"] = stage
+
+    def load_model(self):
+        # MATCHER_BACKEND=onnx면 int8 ONNX Runtime 인코더 (encode 시그니처는 같다)
+        self.model = load_encoder()
 
     def load(self):
-        connection = pymysql.connect(**DB_CONFIG)
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute(
-                    """
-                    SELECT f.id,
-                           f.food_code,
-                           f.food_name,
-                           f.common_name,
-                           f.serving_size,
-                           f.energy_kcal,
-                           f.protein_g,
-                           f.fat_g,
-                           f.carbohydrate_g,
-                           f.sugars_g,
-                           f.dietary_fiber_g,
-                           f.sodium_mg,
-                           fe.embedding
-                    FROM food_embeddings fe
-                    JOIN foods f ON f.id = fe.food_id
-                    ORDER BY f.id
-                    """
+        with self._reload_lock:
+            if SNAPSHOT_DIR:
+                self._stage("vectors", "snapshot")
+                # 스냅샷이 있으면 DB를 거치지 않고 벡터와 레코드 컬럼을 mmap으로 연다 (워커 간 페이지 캐시 공유)
+                vectors, table, manifest = read_snapshot(SNAPSHOT_DIR, MODEL_NAME, verify=SNAPSHOT_VERIFY)
+                self._publish(
+                    vectors,
+                    table,
+                    f"snapshot:{manifest['version']}",
+                    {"snapshot": manifest["version"]},
+                    vectors_fingerprint=manifest.get("fingerprint"),
                 )
-                rows = cursor.fetchall()
-
-            if not rows:
-                raise RuntimeError("food_embeddings 테이블이 비어 있습니다. embed_foods.py를 먼저 실행하세요.")
-
-            embeddings = []
-            records = []
-
-            for row in rows:
-                vector = json.loads(row["embedding"])
-                embeddings.append(np.array(vector, dtype=np.float32))
-                nutrients = {
-                    "energy_kcal": row["energy_kcal"],
-                    "protein_g": row["protein_g"],
-                    "fat_g": row["fat_g"],
-                    "carbohydrate_g": row["carbohydrate_g"],
-                    "sugars_g": row["sugars_g"],
-                    "dietary_fiber_g": row["dietary_fiber_g"],
-                    "sodium_mg": row["sodium_mg"],
-                }
-                # drop nulls
-                nutrients = {k: float(v) for k, v in nutrients.items() if v is not None}
-
-                records.append(
-                    {
-                        "id": row["id"],
-                        "food_code": row["food_code"],
-                        "food_name": row["food_name"],
-                        "common_name": row["common_name"],
-                        "serving_size": row["serving_size"],
-                        "nutrients": nutrients,
-                    }
+                return
+
+            if SHM_NAME:
+                # 로더 프로세스(shared_store.py serve)가 올린 세그먼트에 읽기 전용으로 붙는다
+                self._stage("vectors", "shared_memory")
+                vectors, table, header, segment = attach_store(SHM_NAME)
+                if header["model_name"] != MODEL_NAME:
+                    raise RuntimeError(
+                        f"공유 메모리 모델({header['model_name']})과 서버 모델({MODEL_NAME})이 다릅니다."
+                    )
+                generation = header["generation"]
+                self._publish(vectors, table, f"shm:{generation}", {"shm": generation}, segment)
+                return
+
+            self._stage("vectors", default_source().kind)
+            connection = connect()
+            try:
+                signature = fetch_signature(connection)
+                vectors, table = fetch_catalog(connection, capacity=int(signature["count"]))
+            finally:
+                connection.close()
+            self._publish(vectors, table, default_source().describe(), signature)
+
+    def refresh(self) -> Optional[Dict]:
+        """바뀐 행만 읽어 새 세대를 만들고 교체한다. 변경이 없으면 None을 반환한다.
+
+        DB 읽기는 변경분에 비례하지만(삭제 확인용 food_id 목록만 전체를 읽는다) 벡터/레코드 병합과 ``_publish``는 전체 행을
+        다룬다. 근사 인덱스와 BM25/오타/이름 색인은 처음부터 다시 만들고, 저장된 인덱스와 비교하는 전체 행렬 해시는 건너뛴다.
+        """
+        with self._reload_lock:
+            current = self.generation
+            if current is None:
+                self.load()
+                return {"full": True}
+
+            if SNAPSHOT_DIR:
+                if current_version(SNAPSHOT_DIR) == current.signature["snapshot"]:
+                    return None
+                self.load()
+                return {"full": True}
+
+            if SHM_NAME:
+                if read_generation(SHM_NAME) == current.signature["shm"]:
+                    return None
+                self.load()
+                return {"full": True}
+
+            connection = connect()
+            try:
+                signature = fetch_signature(connection)
+                if signature == current.signature:
+                    return None
+                current_ids, changed_vectors, changed_records = fetch_changes(
+                    connection, current.signature, current.food_ids
                 )
+            finally:
+                connection.close()
+
+            if changed_records and changed_vectors.shape[1] != current.vectors.shape[1]:
+                # 모델이 바뀌어 차원이 달라졌다면 변경분 병합이 아니라 전체를 다시 읽는다
+                self.load()
+                return {"full": True}
+
+            vectors, table = merge_tables(
+                current.vectors,
+                current.records,
+                current_ids,
+                changed_vectors,
+                RecordTable.from_records(changed_records),
+            )
+            self._publish(vectors, table, default_source().describe(), signature, reuse_index=False)
+            return {
+                "full": False,
+                "changed": len(changed_records),
+                "deleted": int(np.isin(current.food_ids, current_ids, invert=True).sum()),
+            }
+
+    def _publish(
+        self,
+        vectors: np.ndarray,
+        records: RecordTable,
+        source: str,
+        signature: Dict,
+        segment: Optional[object] = None,
+        reuse_index: bool = True,
+        vectors_fingerprint: Optional[str] = None,
+    ):
+        """새 세대를 만들어 교체한다. ``reuse_index=False``면 저장된 인덱스를 찾지 않는다(변경분을 병합한 벡터).
+
+        ``vectors_fingerprint``는 스냅샷 manifest처럼 미리 계산해 둔 벡터 fingerprint로, 있으면 행렬을 다시 해시하지 않는다.
+        """
+        if SNAPSHOT_DIR:
+            # 근사 인덱스는 스냅샷 버전 디렉터리 안에 함께 보관한다
+            snapshot_dir = os.path.join(SNAPSHOT_DIR, signature["snapshot"])
+            index_dir = os.path.join(snapshot_dir, f"index-{INDEX_BACKEND}")
+            projection_path = os.path.join(snapshot_dir, PROJECTION_FILE)
+        else:
+            index_dir = index_directory(INDEX_DIR, INDEX_BACKEND)
+            projection_path = PROJECTION_PATH
+
+        self._stage("vectors", "index")
+        projection = None
+        if INDEX_BACKEND == ProjectedIndex.name:
+            projection = self._load_projection(projection_path, vectors.shape[1])
+        index = create_index(
+            INDEX_BACKEND, vectors, index_dir, projection, reuse=reuse_index, vectors_fingerprint=vectors_fingerprint
+        )
 
-            self.vectors = np.vstack(embeddings)
-            self.records = records
-        finally:
-            connection.close()
+        lexical = None
+        if HYBRID:
+            self._stage("vectors", "lexical")
+            lexical = LexicalIndex.build(
+                [
+                    " ".join(filter(None, names))
+                    for names in zip(records.strings("food_name"), records.strings("common_name"))
+                ]
+            )
+
+        fuzzy = None
+        if FUZZY:
+            self._stage("vectors", "fuzzy")
+            fuzzy = FuzzyIndex.build(
+                list(zip(records.strings("food_name"), records.strings("common_name"))),
+                FUZZY_DISTANCE,
+            )
+
+        names = None
+        if EXACT_MATCH:
+            names = self._build_names(records)
+
+        self.generation = StoreGeneration(
+            version=self.version + 1,
+            source=source,
+            # 양자화 인덱스는 float32 벡터를 mmap으로 다시 열기 때문에 메모리에 올린 원본은 놓아 준다
+            vectors=index.vectors,
+            records=records,
+            food_ids=records.ids,
+            index=index,
+            signature=signature,
+            lexical=lexical,
+            fuzzy=fuzzy,
+            names=names,
+            columns=FilterColumns.from_records(records),
+            segment=segment,
+        )
+        self.response_cache.clear()
+
+    @staticmethod
+    def _build_names(records: RecordTable) -> Dict[str, Tuple[int, ...]]:
+        # 이름 키 -> 행 번호. food_name 일치를 common_name 일치보다 앞에 두고, 같은 조건에서는 food_id 순이다
+        names: Dict[str, Dict[int, None]] = {}
+        for field in ("food_name", "common_name"):
+            for row, value in enumerate(records.strings(field)):
+                key = name_key(value)
+                if key:
+                    names.setdefault(key, {})[row] = None
+        return {key: tuple(rows) for key, rows in names.items()}
+
+    def _load_projection(self, path: str, dimension: int) -> Optional[np.ndarray]:
+        loaded = load_projection(path)
+        if loaded is None:
+            return None
+
+        components, meta = loaded
+        # 모델이나 차원이 다른 투영 행렬은 쓰지 않고 인덱스가 로드한 벡터로 새로 계산하게 둔다
+        if meta["model_name"] != MODEL_NAME or components.shape[0] != dimension:
+            return None
+        return components
 
     def embed_query(self, text: str) -> np.ndarray:
+        text = normalize_query(text)
+        key = (MODEL_NAME, text)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
         embedding = self.model.encode(
             text,
             convert_to_numpy=True,
             normalize_embeddings=True,
+        ).astype(np.float32)
+        STAGE_SECONDS.observe("encode", time.perf_counter() - started)
+        embedding.flags.writeable = False
+        self.query_cache.put(key, embedding)
+        return embedding
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        keys = [(MODEL_NAME, normalize_query(text)) for text in texts]
+        cached = [self.query_cache.get(key) for key in keys]
+        # 캐시에 없는 문장만 중복 없이 한 번에 인코딩한다
+        missing = list(dict.fromkeys(key for key, vector in zip(keys, cached) if vector is None))
+
+        encoded = {}
+        if missing:
+            started = time.perf_counter()
+            embeddings = self.model.encode(
+                [text for _, text in missing],
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            ).astype(np.float32)
+            STAGE_SECONDS.observe("encode", time.perf_counter() - started)
+            for key, embedding in zip(missing, embeddings):
+                embedding.flags.writeable = False
+                self.query_cache.put(key, embedding)
+                encoded[key] = embedding
+
+        return np.vstack(
+            [vector if vector is not None else encoded[key] for key, vector in zip(keys, cached)]
         )
-        return embedding.astype(np.float32)
 
     def search(self, query_vector: np.ndarray, limit: int, threshold: float) -> List[MatchResponse]:
-        if self.vectors is None or not self.records:
+        return self.search_many(query_vector[np.newaxis, :], [limit], [threshold])[0]
+
+    def search_many(
+        self,
+        query_vectors: np.ndarray,
+        limits: List[int],
+        thresholds: List[float],
+        queries: Optional[List[str]] = None,
+        filters: Optional[List[Optional[MatchFilters]]] = None,
+    ) -> List[List[MatchResponse]]:
+        generation, hits = self.search_hits(query_vectors, limits, thresholds, queries, filters)
+        return [
+            [
+                MatchResponse(score=score, food=FoodRecord(**generation.records[index]))
+                for index, score in row
+            ]
+            for row in hits
+        ]
+
+    def match_exact(self, query: str, limit: int, filters: Optional[MatchFilters] = None) -> Optional[bytes]:
+        """이름이 정확히 일치하는 레코드를 점수 1.0으로 응답한다. 일치하는(필터를 통과한) 이름이 없으면 None."""
+        generation = self.generation
+        if generation is None or generation.names is None:
+            return None
+
+        rows = generation.names.get(name_key(query))
+        if rows is not None and filters is not None:
+            allowed = self._filter_mask(generation, filters)
+            rows = tuple(row for row in rows if allowed[row]) or None
+        if rows is None:
+            self.exact_matches.miss()
+            return None
+
+        self.exact_matches.hit()
+        return self._render_hits(generation, [[(row, 1.0) for row in rows[:limit]]])[0]
+
+    def match_body(
+        self,
+        query: str,
+        limit: int,
+        threshold: float,
+        filters: Optional[MatchFilters] = None,
+    ) -> bytes:
+        vector = self.embed_query(query)
+        return self.render_bodies(vector[np.newaxis, :], [limit], [threshold], [query], [filters])[0]
+
+    def match_bodies(self, requests: List[Tuple[str, int, float, Optional[MatchFilters]]]) -> List[bytes]:
+        """마이크로배치 핸들러: 쿼리 여러 개를 encode 한 번, 행렬곱 한 번으로 처리한다."""
+        queries, limits, thresholds, filters = zip(*requests)
+        vectors = self.embed_queries(list(queries))
+        return self.render_bodies(vectors, list(limits), list(thresholds), list(queries), list(filters))
+
+    def render_bodies(
+        self,
+        query_vectors: np.ndarray,
+        limits: List[int],
+        thresholds: List[float],
+        queries: Optional[List[str]] = None,
+        filters: Optional[List[Optional[MatchFilters]]] = None,
+    ) -> List[bytes]:
+        generation, hits = self.search_hits(query_vectors, limits, thresholds, queries, filters)
+        return self._render_hits(generation, hits)
+
+    @staticmethod
+    def _render_hits(generation: StoreGeneration, hits: List[List[Hit]]) -> List[bytes]:
+        started = time.perf_counter()
+        if FAST_JSON:
+            bodies = [render_payload(generation.records, row) for row in hits]
+        else:
+            bodies = [
+                MatchPayload(
+                    matches=[
+                        MatchResponse(score=score, food=FoodRecord(**generation.records[index])) for index, score in row
+                    ]
+                )
+                .model_dump_json()
+                .encode("utf-8")
+                for row in hits
+            ]
+        STAGE_SECONDS.observe("serialize", time.perf_counter() - started)
+        return bodies
+
+    def search_hits(
+        self,
+        query_vectors: np.ndarray,
+        limits: List[int],
+        thresholds: List[float],
+        queries: Optional[List[str]] = None,
+        filters: Optional[List[Optional[MatchFilters]]] = None,
+    ) -> Tuple[StoreGeneration, List[List[Hit]]]:
+        """``queries``(원문)가 있고 BM25/오타 색인이 켜져 있으면 그 후보를 RRF로 합친다.
+
+        ``filters``가 있는 쿼리는 인덱스를 거치지 않고 필터를 통과한 행만 float32 벡터로 채점한다.
+        """
+        generation = self.generation
+        if generation is None or not generation.records:
             raise RuntimeError("임베딩 데이터가 로드되지 않았습니다.")
 
-        scores = np.dot(self.vectors, query_vector)
-        ranked_indices = np.argsort(-scores)[: limit * 2]
-
-        matches: List[MatchResponse] = []
-        for index in ranked_indices:
-            score = float(scores[index])
-            if score < threshold:
-                continue
+        masks = [None if item is None else self._filter_mask(generation, item) for item in filters or [None] * len(limits)]
+        plain = [position for position, mask in enumerate(masks) if mask is None]
+
+        results = [None] * len(limits)
+        if plain:
+            # 가장 넓은 조건으로 한 번 검색하고, 쿼리별 limit/threshold는 정렬된 결과의 앞부분으로 자른다
+            started = time.perf_counter()
+            searched = generation.index.search(
+                query_vectors if len(plain) == len(limits) else query_vectors[plain],
+                max(limits[position] for position in plain),
+                min(thresholds[position] for position in plain),
+            )
+            STAGE_SECONDS.observe("search", time.perf_counter() - started)
+            for position, result in zip(plain, searched):
+                results[position] = result
+        for position, mask in enumerate(masks):
+            if mask is not None:
+                results[position] = self._search_rows(
+                    generation, query_vectors[position], np.flatnonzero(mask), limits[position], thresholds[position]
+                )
 
-            record = self.records[index]
-            matches.append(
-                MatchResponse(
-                    score=score,
-                    food=FoodRecord(**record),
+        if queries is not None and (generation.lexical is not None or generation.fuzzy is not None):
+            hits = [
+                self._fuse_hits(generation, query_vector, query, indices, scores, limit, threshold, mask)
+                for query_vector, query, (indices, scores), limit, threshold, mask in zip(
+                    query_vectors, queries, results, limits, thresholds, masks
                 )
-            )
+            ]
+            return generation, hits
+
+        hits = [
+            self._trim_hits(indices, scores, limit, threshold)
+            for (indices, scores), limit, threshold in zip(results, limits, thresholds)
+        ]
+        return generation, hits
+
+    @staticmethod
+    def _filter_mask(generation: StoreGeneration, filters: MatchFilters) -> np.ndarray:
+        return generation.columns.mask(
+            filters.food_code_prefixes,
+            {name: (bounds.min, bounds.max) for name, bounds in filters.nutrients.items()},
+            filters.has_nutrients,
+        )
 
-            if len(matches) >= limit:
+    @staticmethod
+    def _search_rows(
+        generation: StoreGeneration,
+        query_vector: np.ndarray,
+        rows: np.ndarray,
+        limit: int,
+        threshold: float,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        started = time.perf_counter()
+        if rows.size * 2 > generation.vectors.shape[0]:
+            # 대부분의 행이 남으면 골라 복사하는 것보다 전체 행렬곱 후 고르는 편이 싸다
+            scores = (generation.vectors @ query_vector)[rows]
+        else:
+            scores = generation.vectors[rows] @ query_vector
+        scored = time.perf_counter()
+        selected = select_top_k(scores, limit, threshold)
+        STAGE_SECONDS.observe("score", scored - started)
+        STAGE_SECONDS.observe("topk", time.perf_counter() - scored)
+        return rows[selected], scores[selected]
+
+    def _fuse_hits(
+        self,
+        generation: StoreGeneration,
+        query_vector: np.ndarray,
+        query: str,
+        indices: np.ndarray,
+        scores: np.ndarray,
+        limit: int,
+        threshold: float,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[Hit]:
+        """dense 순위에 BM25·자모 오타 후보 순위를 RRF로 합친다. 응답 점수와 threshold는 그대로 코사인 유사도를 쓴다.
+
+        색인에서만 나온 후보는 해당 행만 내적해 코사인을 구하므로 dense 검색 폭을 넓히지 않는다.
+        """
+        cosine = dict(zip(indices.tolist(), scores.tolist()))
+        rankings = [[index for index, score in cosine.items() if score >= threshold]]
+
+        candidates: List[List[int]] = []
+        if generation.lexical is not None:
+            candidates.append(generation.lexical.search(query, LEXICAL_POOL)[0].tolist())
+        if generation.fuzzy is not None:
+            fuzzy_rows = [row for row, _ in generation.fuzzy.search(query, FUZZY_POOL)]
+            if fuzzy_rows:
+                self.fuzzy_matches.hit()
+            else:
+                self.fuzzy_matches.miss()
+            candidates.append(fuzzy_rows)
+
+        if allowed is not None:
+            candidates = [[index for index in ranking if allowed[index]] for ranking in candidates]
+
+        missing = list(dict.fromkeys(index for ranking in candidates for index in ranking if index not in cosine))
+        if missing:
+            cosine.update(zip(missing, (generation.vectors[missing] @ query_vector).tolist()))
+        rankings.extend([index for index in ranking if cosine[index] >= threshold] for ranking in candidates)
+
+        ranked = reciprocal_rank_fusion(rankings, RRF_K)
+        return [(index, cosine[index]) for index in ranked[:limit]]
+
+    @staticmethod
+    def _trim_hits(indices: np.ndarray, scores: np.ndarray, limit: int, threshold: float) -> List[Hit]:
+        hits: List[Hit] = []
+        for index, score in zip(indices[:limit].tolist(), scores[:limit].tolist()):
+            if score < threshold:
                 break
-
-        return matches
+            hits.append((index, score))
+
+        return hits
+
+
+class StoreRefresher:
+    """주기적으로 카탈로그 시그니처를 확인해 바뀐 부분만 반영하는 백그라운드 스레드."""
+
+    def __init__(self, store: VectorStore, interval: float):
+        self.store = store
+        self.interval = interval
+        self.checks = 0
+        self.refreshes = 0
+        self.last_checked_at: Optional[float] = None
+        self.last_delta: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="store-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                delta = self.store.refresh()
+                self.last_error = None
+            except Exception as exc:  # 갱신 실패는 현재 세대로 계속 서비스한다
+                logger.exception("vector store refresh failed")
+                self.last_error = str(exc)
+                delta = None
+
+            self.checks += 1
+            self.last_checked_at = time.time()
+            if delta is not None:
+                self.refreshes += 1
+                self.last_delta = delta
+                logger.info("vector store refreshed to version %s: %s", self.store.version, delta)
+
+    def stats(self) -> Dict:
+        return {
+            "interval": self.interval,
+            "checks": self.checks,
+            "refreshes": self.refreshes,
+            "last_checked_at": self.last_checked_at,
+            "last_delta": self.last_delta,
+            "last_error": self.last_error,
+        }
 
 
 store = VectorStore()
+refresher = StoreRefresher(store, REFRESH_INTERVAL)
+batcher = MicroBatcher(store.match_bodies, MICROBATCH_MAX_SIZE, MICROBATCH_MAX_WAIT_MS)
+
+
+def ensure_ready():
+    if not store.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="모델/임베딩 데이터를 로드하는 중입니다.",
+            headers={"Retry-After": str(STARTUP_RETRY_AFTER)},
+        )
 
 
 @app.on_event("startup")
 def startup_event():
-    store.load()
+    store.start_loading()
+    if REFRESH_INTERVAL > 0:
+        refresher.start()
+
+
+@app.on_event("startup")
+async def start_batcher():
+    if MICROBATCH:
+        batcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await batcher.stop()
+    refresher.stop()
 
 
 @app.get("/health")
 def health():
-    status = store.vectors is not None
-    return {"status": "ok" if status else "loading", "records": len(store.records)}
+    if store.ready:
+        status = "ok"
+    elif any(component["state"] == "failed" for component in store.startup.values()):
+        status = "failed"
+    else:
+        status = "loading"
+
+    return {
+        "status": status,
+        "startup": store.startup,
+        "records": len(store.records),
+        "source": store.source,
+        "version": store.version,
+        "encoder": ENCODER_BACKEND,
+        "index": INDEX_BACKEND,
+        "query_cache": store.query_cache.stats(),
+        "response_cache": store.response_cache.stats(),
+        "exact_match": store.exact_matches.stats() if EXACT_MATCH else None,
+        "fuzzy_match": store.fuzzy_matches.stats() if FUZZY else None,
+        "refresh": refresher.stats() if REFRESH_INTERVAL > 0 else None,
+        "microbatch": batcher.stats() if batcher.running else None,
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus 텍스트 포맷. 단계별 히스토그램은 수집해 둔 값을 렌더링만 하므로 스크레이프가 hot path를 막지 않는다."""
+    generation = store.generation
+    caches = {"query": store.query_cache, "response": store.response_cache}
+    counters = {"query": store.query_cache, "response": store.response_cache}
+    if EXACT_MATCH:
+        counters["exact"] = store.exact_matches
+    if FUZZY:
+        counters["fuzzy"] = store.fuzzy_matches
+
+    lines = STAGE_SECONDS.render()
+    lines += render_metric("food_matcher_ready", "gauge", "1 when the model and vectors are loaded.", [({}, int(store.ready))])
+    lines += render_metric(
+        "food_matcher_store_records", "gauge", "Records in the current store generation.", [({}, len(store.records))]
+    )
+    lines += render_metric(
+        "food_matcher_store_generation",
+        "gauge",
+        "Version of the current store generation.",
+        [({"source": str(store.source)}, store.version)],
+    )
+    lines += render_metric(
+        "food_matcher_store_vector_bytes",
+        "gauge",
+        "Bytes held by the embedding matrix.",
+        [({}, generation.vectors.nbytes if generation is not None else 0)],
+    )
+    lines += render_metric(
+        "food_matcher_cache_entries",
+        "gauge",
+        "Entries held by each LRU cache.",
+        [({"cache": name}, len(cache)) for name, cache in caches.items()],
+    )
+    lines += render_metric(
+        "food_matcher_cache_hit_ratio",
+        "gauge",
+        "Hit ratio of each cache or fast path since startup.",
+        [({"cache": name}, counter.stats()["hit_ratio"]) for name, counter in counters.items()],
+    )
+    lines += render_metric(
+        "food_matcher_cache_hits_total",
+        "counter",
+        "Cache or fast path hits since startup.",
+        [({"cache": name}, counter.hits) for name, counter in counters.items()],
+    )
+    lines += render_metric(
+        "food_matcher_cache_misses_total",
+        "counter",
+        "Cache or fast path misses since startup.",
+        [({"cache": name}, counter.misses) for name, counter in counters.items()],
+    )
+    if batcher.running:
+        lines += render_metric(
+            "food_matcher_microbatch_queue_depth",
+            "gauge",
+            "Requests waiting in the micro-batch queue.",
+            [({}, batcher.queue_depth)],
+        )
+        lines += [
+            "# HELP food_matcher_microbatch_size Requests per micro-batch.",
+            "# TYPE food_matcher_microbatch_size histogram",
+            *batcher.batch_sizes.samples("food_matcher_microbatch_size", {}),
+            "# HELP food_matcher_microbatch_queue_depth_at_dispatch Queued requests left when a batch is dispatched.",
+            "# TYPE food_matcher_microbatch_queue_depth_at_dispatch histogram",
+            *batcher.queue_depths.samples("food_matcher_microbatch_queue_depth_at_dispatch", {}),
+        ]
+    if REFRESH_INTERVAL > 0:
+        lines += render_metric(
+            "food_matcher_refreshes_total", "counter", "Store refreshes applied since startup.", [({}, refresher.refreshes)]
+        )
+
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 
 @app.post("/match", response_model=MatchPayload)
-def match(req: MatchRequest):
-    query = req.query.strip()
+async def match(req: MatchRequest):
+    started = time.perf_counter()
+    try:
+        return await _match(req)
+    finally:
+        STAGE_SECONDS.observe("request", time.perf_counter() - started)
+
+
+async def _match(req: MatchRequest) -> Response:
+    ensure_ready()
+    query = normalize_query(req.query)
     if not query:
         raise HTTPException(status_code=400, detail="query가 비어 있습니다.")
 
+    filters_key = req.filters.model_dump_json() if req.filters else None
+    cache_key = (query, req.limit, req.threshold, filters_key, store.version)
+    cached = store.response_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    body = store.match_exact(query, req.limit, req.filters)
+    if body is not None:
+        store.response_cache.put(cache_key, body)
+        return Response(content=body, media_type="application/json")
+
     try:
-        vector = store.embed_query(query)
-        matches = store.search(vector, req.limit, req.threshold)
+        if batcher.running:
+            body = await batcher.submit((query, req.limit, req.threshold, req.filters))
+        else:
+            body = await run_in_threadpool(store.match_body, query, req.limit, req.threshold, req.filters)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    store.response_cache.put(cache_key, body)
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/match/batch", response_model=BatchMatchPayload)
+def match_batch(req: BatchMatchRequest):
+    ensure_ready()
+    queries = [item.query.strip() for item in req.queries]
+    for position, query in enumerate(queries):
+        if not query:
+            raise HTTPException(status_code=400, detail=f"queries[{position}].query가 비어 있습니다.")
+
+    limits = [item.limit for item in req.queries]
+    thresholds = [item.threshold for item in req.queries]
+    filters = [item.filters for item in req.queries]
+
+    try:
+        vectors = store.embed_queries(queries)
+        if FAST_JSON:
+            payloads = store.render_bodies(vectors, limits, thresholds, queries, filters)
+            return Response(content=b'{"results":[' + b",".join(payloads) + b"]}", media_type="application/json")
+
+        results = store.search_many(vectors, limits, thresholds, queries, filters)
     except RuntimeError as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
 
-    return MatchPayload(matches=matches)
+    # JSONResponse(json.dumps)는 1e-05처럼 repr로 float을 쓰므로 /match와 같은 Pydantic 직렬화로 응답한다.
+    payload = BatchMatchPayload(results=[MatchPayload(matches=matches) for matches in results])
+    return Response(content=payload.model_dump_json(), media_type="application/json")
@@ -0,0 +1,332 @@
+"""멀티 프로세스 서빙용 공유 메모리 벡터 스토어.
+
+스냅샷 파일을 쓸 수 없는 배포에서, 로더 프로세스 하나가 카탈로그를 읽어 벡터 행렬과 컬럼형 레코드 테이블
+(``records.RecordTable``)을 ``multiprocessing.shared_memory`` 세그먼트에 올린다. uvicorn 워커는
+``MATCHER_SHM_NAME``이 지정되면 DB 대신 이 세그먼트에 읽기 전용으로 붙으므로 워커를 늘려도 메모리가 늘지 않는다.
+
+    python shared_store.py serve        # 세그먼트 생성 후 MATCHER_REFRESH_INTERVAL마다 변경분 반영
+    python shared_store.py status       # 현재 세대 정보
+
+세그먼트 구성
+
+- ``<name>``: 제어 세그먼트. 앞 8바이트에 현재 세대 번호(uint64, 0이면 없음)를 둔다.
+- ``<name>-g<세대>``: 데이터 세그먼트. 앞 8바이트는 JSON 헤더 길이, 이어서 헤더(배열별 offset/shape/dtype),
+  그 뒤에 64바이트 정렬된 배열들이 온다.
+
+세대 교체는 새 데이터 세그먼트를 다 채운 뒤 제어 세그먼트의 세대 번호를 바꾸는 것으로 끝난다. 이전 세그먼트는
+``MATCHER_SHM_GRACE``초 뒤 unlink한다. 이미 붙어 있는 워커의 매핑은 unlink 후에도 유효하고, 워커가 다음 세대로
+옮겨 가며 닫을 때 메모리가 반환된다.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from records import RecordTable, merge_tables
+
+load_dotenv()
+
+SHM_NAME = os.getenv("MATCHER_SHM_NAME", "")
+SHM_GRACE = float(os.getenv("MATCHER_SHM_GRACE", "30"))
+REFRESH_INTERVAL = float(os.getenv("MATCHER_REFRESH_INTERVAL", "0"))
+MODEL_NAME = os.getenv("MATCHER_MODEL_NAME", "BM-K/KoSimCSE-roberta-multitask")
+
+CONTROL_SIZE = 4096
+ALIGNMENT = 64
+ATTACH_RETRIES = 5
+
+logger = logging.getLogger("food_matcher.shared_store")
+
+# 이 프로세스의 SharedStoreWriter가 만든 세그먼트. resource_tracker 등록은 writer가 unlink하며 해제한다
+_created = set()
+
+
+def segment_name(name: str, generation: int) -> str:
+    return f"{name}-g{generation}"
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.12 이하는 붙기만 한 프로세스도 종료 시 세그먼트를 unlink하므로 추적을 해제한다
+        segment = shared_memory.SharedMemory(name=name)
+        if os.name == "posix" and name not in _created:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def _create(name: str, size: int) -> shared_memory.SharedMemory:
+    segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _created.add(name)
+    return segment
+
+
+def _unlink(segment: shared_memory.SharedMemory):
+    segment.close()
+    segment.unlink()
+    _created.discard(segment.name)
+
+
+def _data_start(header_size: int) -> int:
+    # 배열 offset은 헤더 뒤 첫 정렬 위치부터 센다 (헤더 길이가 offset에 좌우되지 않도록)
+    return -(-(8 + header_size) // ALIGNMENT) * ALIGNMENT
+
+
+def _layout(arrays: Dict[str, np.ndarray], meta: Dict) -> Tuple[bytes, Dict[str, int], int]:
+    offsets = {}
+    entries = {}
+    position = 0
+    for key, array in arrays.items():
+        offsets[key] = position
+        entries[key] = {"offset": position, "shape": list(array.shape), "dtype": array.dtype.str}
+        position += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({**meta, "arrays": entries}, ensure_ascii=False).encode("utf-8")
+    data_start = _data_start(len(header))
+    return header, {key: data_start + offset for key, offset in offsets.items()}, data_start + position
+
+
+def read_generation(name: str) -> int:
+    """제어 세그먼트의 현재 세대 번호. 로더가 없으면 0."""
+    try:
+        control = _attach(name)
+    except FileNotFoundError:
+        return 0
+    try:
+        return int(np.ndarray((1,), dtype=np.uint64, buffer=control.buf)[0])
+    finally:
+        control.close()
+
+
+def attach_store(name: str) -> Tuple[np.ndarray, RecordTable, Dict, shared_memory.SharedMemory]:
+    """현재 세대의 데이터 세그먼트에 붙어 (벡터, 레코드 테이블, 헤더, 세그먼트)를 반환한다.
+
+    배열은 세그먼트 위의 읽기 전용 뷰다. 세그먼트 객체는 뷰가 모두 사라진 뒤 닫혀야 하므로 호출자가 함께 보관한다.
+    """
+    for _ in range(ATTACH_RETRIES):
+        generation = read_generation(name)
+        if not generation:
+            raise RuntimeError(f"공유 메모리 스토어가 없습니다: {name} (python shared_store.py serve를 먼저 실행하세요.)")
+        try:
+            segment = _attach(segment_name(name, generation))
+            break
+        except FileNotFoundError:
+            # 세대 번호를 읽은 직후 교체·정리된 경우. 새 번호로 다시 시도한다
+            time.sleep(0.05)
+    else:
+        raise RuntimeError(f"공유 메모리 세그먼트에 붙지 못했습니다: {name}")
+
+    header_size = int(np.ndarray((1,), dtype=np.uint64, buffer=segment.buf)[0])
+    header = json.loads(bytes(segment.buf[8 : 8 + header_size]).decode("utf-8"))
+    data_start = _data_start(header_size)
+
+    arrays = {}
+    for key, entry in header["arrays"].items():
+        array = np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]), buffer=segment.buf, offset=data_start + entry["offset"])
+        array.flags.writeable = False
+        arrays[key] = array
+
+    vectors = arrays.pop("vectors")
+    table = RecordTable({key[len("records:") :]: value for key, value in arrays.items()})
+    return vectors, table, header, segment
+
+
+class SharedStoreWriter:
+    """로더 프로세스 쪽. 세그먼트를 만들고 세대를 교체하며, 종료 시 모든 세그먼트를 정리한다."""
+
+    def __init__(self, name: str, grace: float = SHM_GRACE):
+        self.name = name
+        self.grace = grace
+        self.generation = 0
+        self.current: Optional[shared_memory.SharedMemory] = None
+        self.retired: List[Tuple[float, shared_memory.SharedMemory]] = []
+        self.control = self._create_control()
+
+    def _create_control(self) -> shared_memory.SharedMemory:
+        try:
+            return _create(self.name, CONTROL_SIZE)
+        except FileExistsError:
+            # 이전 로더가 비정상 종료하며 남긴 세그먼트. 다른 로더가 살아 있을 수 있으므로 덮어쓰지 않는다
+            raise RuntimeError(
+                f"공유 메모리 세그먼트가 이미 있습니다: {self.name} (다른 로더가 실행 중이 아니라면 `python shared_store.py cleanup`)"
+            ) from None
+
+    def publish(self, vectors: np.ndarray, table: RecordTable, meta: Dict) -> int:
+        generation = self.generation + 1
+        arrays = {"vectors": np.ascontiguousarray(vectors, dtype=np.float32)}
+        arrays.update({f"records:{key}": np.ascontiguousarray(value) for key, value in table.columns.items()})
+
+        header_meta = {
+            **meta,
+            "generation": generation,
+            "count": int(vectors.shape[0]),
+            "dimension": int(vectors.shape[1]),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        header, offsets, size = _layout(arrays, header_meta)
+
+        segment = _create(segment_name(self.name, generation), size)
+        try:
+            np.ndarray((1,), dtype=np.uint64, buffer=segment.buf)[0] = len(header)
+            segment.buf[8 : 8 + len(header)] = header
+            for key, array in arrays.items():
+                target = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf, offset=offsets[key])
+                target[...] = array
+                del target
+        except BaseException:
+            _unlink(segment)
+            raise
+
+        # 데이터를 다 채운 뒤에 세대 번호를 바꾼다 (정렬된 8바이트 쓰기)
+        np.ndarray((1,), dtype=np.uint64, buffer=self.control.buf)[0] = generation
+        if self.current is not None:
+            self.retired.append((time.monotonic(), self.current))
+        self.current = segment
+        self.generation = generation
+        self.reap()
+        return generation
+
+    def reap(self, force: bool = False):
+        now = time.monotonic()
+        kept = []
+        for retired_at, segment in self.retired:
+            if force or now - retired_at >= self.grace:
+                _unlink(segment)
+            else:
+                kept.append((retired_at, segment))
+        self.retired = kept
+
+    def close(self):
+        np.ndarray((1,), dtype=np.uint64, buffer=self.control.buf)[0] = 0
+        self.reap(force=True)
+        if self.current is not None:
+            _unlink(self.current)
+            self.current = None
+        _unlink(self.control)
+
+
+def cleanup(name: str):
+    """비정상 종료한 로더가 남긴 세그먼트를 지운다."""
+    generation = read_generation(name)
+    for candidate in range(1, generation + 1):
+        try:
+            segment = _attach(segment_name(name, candidate))
+        except FileNotFoundError:
+            continue
+        segment.close()
+        segment.unlink()
+    try:
+        control = _attach(name)
+    except FileNotFoundError:
+        return
+    control.close()
+    control.unlink()
+
+
+def load_catalog() -> Tuple[Dict, np.ndarray, RecordTable]:
+    """(시그니처, 벡터, 레코드 테이블) 전체를 읽는다."""
+    from catalog import connect, fetch_catalog, fetch_signature
+
+    connection = connect()
+    try:
+        signature = fetch_signature(connection)
+        vectors, table = fetch_catalog(connection, capacity=int(signature["count"]))
+    finally:
+        connection.close()
+    return signature, vectors, table
+
+
+def refresh_catalog(
+    signature: Dict, vectors: np.ndarray, table: RecordTable
+) -> Optional[Tuple[Dict, np.ndarray, RecordTable]]:
+    """시그니처가 바뀌었으면 변경분을 반영한 (시그니처, 벡터, 테이블)을, 그대로면 None을 반환한다."""
+    from catalog import connect, fetch_changes, fetch_signature
+
+    connection = connect()
+    try:
+        latest = fetch_signature(connection)
+        if latest == signature:
+            return None
+        current_ids, changed_vectors, changed_records = fetch_changes(connection, signature, table.ids)
+    finally:
+        connection.close()
+
+    if changed_records and changed_vectors.shape[1] != vectors.shape[1]:
+        # 임베딩 차원이 바뀌었으면(모델 교체) 전체를 다시 읽는다
+        return load_catalog()
+    vectors, table = merge_tables(
+        vectors, table, current_ids, changed_vectors, RecordTable.from_records(changed_records)
+    )
+    return latest, vectors, table
+
+
+def serve(name: str, interval: float, stop: Optional[threading.Event] = None):
+    """세그먼트를 만들고 interval마다 변경분을 게시한다. stop이 설정될 때까지(기본: SIGINT/SIGTERM) 돈다.
+
+    DB 연결·조회·게시가 실패해도 로더는 죽지 않는다. 오류를 기록하고 워커는 마지막 세대를 계속 쓰며,
+    다음 주기에 다시 시도한다. 첫 적재가 실패하면 세대 없이 기다리다가 재시도한다.
+    """
+    if stop is None:
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+    writer = SharedStoreWriter(name)
+    try:
+        state: Optional[Tuple[Dict, np.ndarray, RecordTable]] = None
+        while True:
+            if state is None or interval > 0:
+                try:
+                    loaded = load_catalog() if state is None else refresh_catalog(*state)
+                    if loaded is not None:
+                        generation = writer.publish(loaded[1], loaded[2], {"model_name": MODEL_NAME})
+                        state = loaded
+                        print(f"공유 메모리 {name} 세대 {generation} 게시: {len(state[2])}건, {state[1].shape[1]}차원", flush=True)
+                except Exception:  # 실패해도 현재 세대로 계속 서비스한다
+                    logger.exception("shared store %s failed", "load" if state is None else "refresh")
+            writer.reap()
+            if stop.wait(interval if interval > 0 else 1.0):
+                break
+    finally:
+        # 루프는 stop으로만 끝난다. 종료할 때만 세그먼트를 정리한다
+        writer.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="공유 메모리 벡터 스토어 로더")
+    parser.add_argument("command", choices=("serve", "status", "cleanup"))
+    parser.add_argument("--name", default=SHM_NAME or "food_matcher", help="공유 메모리 세그먼트 이름")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help="변경 확인 주기(초), 0이면 갱신하지 않음")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "serve":
+        serve(args.name, args.interval)
+        return
+    if args.command == "cleanup":
+        cleanup(args.name)
+        return
+
+    vectors, table, header, segment = attach_store(args.name)
+    header.pop("arrays")
+    print(json.dumps({**header, "bytes": segment.size}, ensure_ascii=False, indent=2))
+    del vectors, table
+    segment.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""food_embeddings 스냅샷 (mmap 가능한 .npy 행렬 + 컬럼형 레코드 .npy + manifest).
+
+uvicorn 워커들이 DB를 거치지 않고 같은 파일을 ``np.load(mmap_mode="r")``로 열어
+페이지 캐시를 공유하도록 한다. 레코드도 ``records.RecordTable``의 컬럼 배열을 그대로 저장해 mmap으로 열므로
+워커가 JSON을 해석하거나 테이블을 다시 만들지 않는다. 벡터 fingerprint는 manifest에 두어 근사 인덱스를 열 때 재사용한다.
+
+    python snapshot.py build            # DB -> 새 스냅샷 버전 생성
+    python snapshot.py verify           # 현재 버전 체크섬 검증
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from records import RecordTable
+
+load_dotenv()
+
+SNAPSHOT_FORMAT = 2
+# format 1은 레코드를 records.jsonl로 저장했다. 읽기만 지원한다
+READABLE_FORMATS = (1, SNAPSHOT_FORMAT)
+SNAPSHOT_DIR = os.getenv("MATCHER_SNAPSHOT_DIR", "")
+MODEL_NAME = os.getenv("MATCHER_MODEL_NAME", "BM-K/KoSimCSE-roberta-multitask")
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.jsonl"
+RECORDS_DIR = "records"
+PROJECTION_FILE = "projection.npz"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: str, text: str):
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    with os.fdopen(fd, "w", encoding="utf-8") as handle:
+        handle.write(text)
+    os.replace(temp_path, path)
+
+
+def current_version(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as handle:
+            return handle.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _column_file(key: str) -> str:
+    return f"{RECORDS_DIR}/{key}.npy"
+
+
+def write_snapshot(
+    root: str,
+    vectors: np.ndarray,
+    records: Union["RecordTable", List[Dict]],
+    model_name: str,
+    projection_path: str = "",
+) -> str:
+    """새 버전 디렉터리에 스냅샷을 쓰고 CURRENT를 원자적으로 교체한다.
+
+    ``projection_path``가 있으면 embed_foods.py가 만든 투영 행렬도 함께 복사한다.
+    """
+    # records와 indexes가 이 모듈을 가져다 쓰므로 순환 import를 피해 여기서 가져온다
+    from indexes import fingerprint
+    from records import RecordTable
+
+    if vectors.shape[0] != len(records):
+        raise RuntimeError("벡터 개수와 레코드 개수가 일치하지 않습니다.")
+    table = records if isinstance(records, RecordTable) else RecordTable.from_records(records)
+
+    os.makedirs(root, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    staging = tempfile.mkdtemp(dir=root, prefix=".staging-")
+
+    try:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        vectors_path = os.path.join(staging, VECTORS_FILE)
+        np.save(vectors_path, vectors)
+        checksums = {VECTORS_FILE: _sha256(vectors_path)}
+
+        os.makedirs(os.path.join(staging, RECORDS_DIR))
+        for key, column in table.columns.items():
+            name = _column_file(key)
+            np.save(os.path.join(staging, name), np.ascontiguousarray(column))
+            checksums[name] = _sha256(os.path.join(staging, name))
+
+        if projection_path and os.path.exists(projection_path):
+            shutil.copyfile(projection_path, os.path.join(staging, PROJECTION_FILE))
+            checksums[PROJECTION_FILE] = _sha256(os.path.join(staging, PROJECTION_FILE))
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": version,
+            "model_name": model_name,
+            "count": int(vectors.shape[0]),
+            "dimension": int(vectors.shape[1]),
+            "dtype": "float32",
+            "fingerprint": fingerprint(vectors),
+            "columns": list(table.columns),
+            "checksums": checksums,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as handle:
+            json.dump(manifest, handle, ensure_ascii=False, indent=2)
+
+        os.replace(staging, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_atomic(os.path.join(root, CURRENT_FILE), version + "\n")
+    return version
+
+
+def read_manifest(root: str, version: Optional[str] = None) -> Tuple[str, Dict]:
+    version = version or current_version(root)
+    if not version:
+        raise RuntimeError(f"스냅샷이 없습니다: {root} (python snapshot.py build를 먼저 실행하세요.)")
+
+    directory = os.path.join(root, version)
+    with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+
+    if manifest.get("format") not in READABLE_FORMATS:
+        raise RuntimeError(f"지원하지 않는 스냅샷 포맷입니다: {manifest.get('format')}")
+    return directory, manifest
+
+
+def verify_snapshot(directory: str, manifest: Dict):
+    for name, expected in manifest["checksums"].items():
+        actual = _sha256(os.path.join(directory, name))
+        if actual != expected:
+            raise RuntimeError(f"스냅샷 체크섬이 일치하지 않습니다: {name}")
+
+
+def read_snapshot(
+    root: str,
+    model_name: str,
+    verify: bool = False,
+) -> Tuple[np.ndarray, "RecordTable", Dict]:
+    """현재 스냅샷을 읽기 전용 mmap으로 연다. 벡터와 레코드 컬럼은 복사하지 않는다."""
+    from records import RecordTable
+
+    directory, manifest = read_manifest(root)
+
+    if manifest["model_name"] != model_name:
+        raise RuntimeError(
+            f"스냅샷 모델({manifest['model_name']})과 서버 모델({model_name})이 다릅니다. 스냅샷을 다시 생성하세요."
+        )
+    if verify:
+        verify_snapshot(directory, manifest)
+
+    vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+    if vectors.shape != (manifest["count"], manifest["dimension"]) or vectors.dtype != np.float32:
+        raise RuntimeError("스냅샷 벡터 형태가 manifest와 일치하지 않습니다.")
+
+    if manifest["format"] == 1:
+        with open(os.path.join(directory, RECORDS_FILE), encoding="utf-8") as handle:
+            table = RecordTable.from_records([json.loads(line) for line in handle])
+    else:
+        table = RecordTable(
+            {key: np.load(os.path.join(directory, _column_file(key)), mmap_mode="r") for key in manifest["columns"]}
+        )
+    if len(table) != manifest["count"]:
+        raise RuntimeError("스냅샷 레코드 개수가 manifest와 일치하지 않습니다.")
+
+    return vectors, table, manifest
+
+
+def prune_snapshots(root: str, keep: int):
+    """CURRENT를 제외하고 오래된 버전 디렉터리를 keep개만 남긴다."""
+    current = current_version(root)
+    versions = sorted(
+        name
+        for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isdir(os.path.join(root, name)) and name != current
+    )
+    for name in versions[: max(len(versions) - keep, 0)]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="food_embeddings 스냅샷을 관리합니다.")
+    parser.add_argument("command", choices=("build", "verify"))
+    parser.add_argument("--dir", default=SNAPSHOT_DIR or "snapshots", help="스냅샷 루트 디렉터리")
+    parser.add_argument("--keep", type=int, default=2, help="build 후 남겨 둘 이전 버전 수")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.command == "build":
+        from catalog import load_catalog
+        from projection import PROJECTION_PATH
+
+        vectors, records = load_catalog()
+        version = write_snapshot(args.dir, vectors, records, MODEL_NAME, PROJECTION_PATH)
+        prune_snapshots(args.dir, args.keep)
+        print(f"스냅샷 {version} 생성 완료: {len(records)}건, {vectors.shape[1]}차원")
+        return
+
+    directory, manifest = read_manifest(args.dir)
+    verify_snapshot(directory, manifest)
+    print(f"스냅샷 {manifest['version']} 검증 완료: {manifest['count']}건")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""카탈로그(foods + food_embeddings) 데이터 소스.
+
+``MATCHER_SOURCE``로 고른다. 어느 소스든 ``connect()``는 pymysql ``DictCursor``와 같은 방식(``%s`` 자리표시자,
+dict 행, ``with connection.cursor() as cursor``)으로 쓰는 연결을 돌려주므로 catalog.py의 SQL을 그대로 쓴다.
+
+    mysql (기본)              DB_* 환경 변수의 MySQL
+    sqlite:<파일>             export_source.py로 만든 SQLite 파일 (embed_foods.py로 갱신 가능)
+    parquet:<디렉터리>        foods.parquet + food_embeddings.parquet (읽기 전용, requirements-optional.txt의 pyarrow 필요)
+
+MySQL 없이 부하 테스트·프로파일링·CI를 돌릴 때는 ``python export_source.py sqlite catalog.db``로 내보낸 뒤
+``MATCHER_SOURCE=sqlite:catalog.db``로 서버를 띄운다.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SOURCE = os.getenv("MATCHER_SOURCE", "mysql")
+
+DB_CONFIG = {
+    "host": os.getenv("DB_HOST", "127.0.0.1"),
+    "port": int(os.getenv("DB_PORT", "3306")),
+    "user": os.getenv("DB_USER", "root"),
+    "password": os.getenv("DB_PASSWORD", ""),
+    "database": os.getenv("DB_NAME", "foodscan"),
+    "charset": "utf8mb4",
+    "cursorclass": pymysql.cursors.DictCursor,
+}
+
+# 내보낸 파일에 담는 컬럼. 매처와 임베딩 작업이 읽고 쓰는 것만 둔다
+FOOD_COLUMNS = (
+    ("id", "INTEGER PRIMARY KEY"),
+    ("food_code", "TEXT"),
+    ("food_name", "TEXT"),
+    ("common_name", "TEXT"),
+    ("serving_size", "TEXT"),
+    ("energy_kcal", "REAL"),
+    ("protein_g", "REAL"),
+    ("fat_g", "REAL"),
+    ("carbohydrate_g", "REAL"),
+    ("sugars_g", "REAL"),
+    ("dietary_fiber_g", "REAL"),
+    ("sodium_mg", "REAL"),
+    ("created_at", "TEXT"),
+    ("updated_at", "TEXT"),
+)
+
+EMBEDDING_COLUMNS = (
+    ("food_id", "INTEGER NOT NULL UNIQUE"),
+    ("dimension", "INTEGER"),
+    ("embedding", "TEXT"),
+    ("vector", "BLOB"),
+    ("vector_dtype", "TEXT"),
+    ("created_at", "TEXT"),
+    ("updated_at", "TEXT"),
+)
+
+TABLES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "foods": FOOD_COLUMNS,
+    "food_embeddings": EMBEDDING_COLUMNS,
+}
+
+
+def create_tables(connection: sqlite3.Connection):
+    for table, columns in TABLES.items():
+        definition = ", ".join(f"{name} {kind}" for name, kind in columns)
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+    connection.execute("CREATE INDEX IF NOT EXISTS foods_updated_at ON foods (updated_at)")
+    connection.execute("CREATE INDEX IF NOT EXISTS food_embeddings_updated_at ON food_embeddings (updated_at)")
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> Dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    def __init__(self, cursor: sqlite3.Cursor):
+        self._cursor = cursor
+
+    def __enter__(self) -> "SQLiteCursor":
+        return self
+
+    def __exit__(self, *_):
+        self._cursor.close()
+
+    def __iter__(self):
+        # sqlite3 커서는 원래 한 행씩 읽으므로 SSDictCursor처럼 스트리밍된다
+        return iter(self._cursor)
+
+    def execute(self, sql: str, args=None):
+        self._cursor.execute(sql.replace("%s", "?"), tuple(args or ()))
+
+    def executemany(self, sql: str, rows):
+        self._cursor.executemany(sql.replace("%s", "?"), rows)
+
+    def fetchone(self) -> Optional[Dict]:
+        return self._cursor.fetchone()
+
+    def fetchall(self) -> List[Dict]:
+        return self._cursor.fetchall()
+
+
+class SQLiteConnection:
+    """sqlite3 연결을 pymysql DictCursor 연결처럼 감싼다. ``cursor()``의 커서 클래스 인자는 무시한다."""
+
+    def __init__(self, connection: sqlite3.Connection, shared: bool = False):
+        connection.row_factory = _dict_row
+        self._connection = connection
+        self._shared = shared
+
+    def cursor(self, cursor_class=None) -> SQLiteCursor:
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def close(self):
+        # Parquet 소스는 메모리에 올린 연결 하나를 계속 쓴다
+        if not self._shared:
+            self._connection.close()
+
+
+class DataSource:
+    kind = ""
+    # embed_foods.py가 임베딩을 다시 쓸 수 있는지
+    writable = True
+
+    def connect(self):
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.kind
+
+
+class MySQLSource(DataSource):
+    kind = "mysql"
+
+    def connect(self):
+        return pymysql.connect(**DB_CONFIG)
+
+
+class SQLiteSource(DataSource):
+    kind = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def connect(self) -> SQLiteConnection:
+        if not os.path.exists(self.path):
+            raise RuntimeError(f"SQLite 파일이 없습니다: {self.path} (python export_source.py sqlite로 먼저 만드세요.)")
+        return SQLiteConnection(sqlite3.connect(self.path))
+
+    def describe(self) -> str:
+        return f"sqlite:{self.path}"
+
+
+class ParquetSource(DataSource):
+    """Parquet 두 파일을 메모리의 SQLite로 읽어 같은 SQL로 조회한다. 파일이 바뀌면 다시 읽는다."""
+
+    kind = "parquet"
+    writable = False
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._loaded: Optional[Tuple[Tuple[float, ...], sqlite3.Connection]] = None
+        self._lock = threading.Lock()
+
+    def _paths(self) -> List[str]:
+        return [os.path.join(self.directory, f"{table}.parquet") for table in TABLES]
+
+    def connect(self) -> SQLiteConnection:
+        with self._lock:
+            stamps = tuple(os.path.getmtime(path) for path in self._paths())
+            if self._loaded is None or self._loaded[0] != stamps:
+                if self._loaded is not None:
+                    self._loaded[1].close()
+                self._loaded = (stamps, self._read())
+            return SQLiteConnection(self._loaded[1], shared=True)
+
+    def _read(self) -> sqlite3.Connection:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("parquet 소스를 사용하려면 pyarrow가 필요합니다 (`pip install -r requirements-optional.txt`).") from exc
+
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        create_tables(connection)
+        for (table, columns), path in zip(TABLES.items(), self._paths()):
+            names = [name for name, _ in columns]
+            insert = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['?'] * len(names))})"
+            for batch in pq.ParquetFile(path).iter_batches(columns=names):
+                connection.executemany(insert, zip(*(batch.column(name).to_pylist() for name in names)))
+        connection.commit()
+        return connection
+
+    def describe(self) -> str:
+        return f"parquet:{self.directory}"
+
+
+def parse_source(spec: str) -> DataSource:
+    kind, _, location = spec.partition(":")
+    if kind == MySQLSource.kind and not location:
+        return MySQLSource()
+    if kind == SQLiteSource.kind and location:
+        return SQLiteSource(location)
+    if kind == ParquetSource.kind and location:
+        return ParquetSource(location)
+    raise RuntimeError(f"알 수 없는 데이터 소스입니다: {spec} (mysql, sqlite:<파일>, parquet:<디렉터리>)")
+
+
+_default: Optional[DataSource] = None
+
+
+def default_source() -> DataSource:
+    global _default
+    if _default is None:
+        _default = parse_source(SOURCE)
+    return _default
@@ -0,0 +1,80 @@
+import zlib
+
+import numpy as np
+import pytest
+
+from records import RecordTable
+
+
+def make_record(food_id, code, name, common=None, **nutrients):
+    return {
+        "id": food_id,
+        "food_code": code,
+        "food_name": name,
+        "common_name": common,
+        "serving_size": "100g",
+        "nutrients": nutrients,
+    }
+
+
+@pytest.fixture
+def records():
+    return RecordTable.from_records(
+        [
+            make_record(1, "D101-0001", "김치찌개", "김치 찌개", energy_kcal=120.0, sodium_mg=800.0),
+            make_record(2, "D101-0002", "된장국_아욱", "아욱국", energy_kcal=45.0),
+            make_record(3, "D202-0001", "피자_치킨 피자", None, energy_kcal=260.0, sodium_mg=600.0),
+            make_record(4, "D202-0002", "짜장면", "자장면"),
+            make_record(5, "D1010-0001", "비빔밥", None, energy_kcal=150.0),
+        ]
+    )
+
+
+def embed_text(text, dimension=64):
+    """음절 bigram 해시 벡터. 이름이 비슷할수록 내적이 크다 (서버 테스트용 가짜 인코더)."""
+    from catalog import name_key
+
+    compact = name_key(text).replace(" ", "")
+    vector = np.zeros(dimension, dtype=np.float32)
+    for gram in [compact[position : position + 2] for position in range(max(len(compact) - 1, 1))]:
+        vector[zlib.crc32(gram.encode("utf-8")) % dimension] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        self.calls.append(batch)
+        vectors = np.stack([embed_text(text) for text in batch])
+        return vectors[0] if isinstance(texts, str) else vectors
+
+
+@pytest.fixture
+def catalog_vectors(records):
+    return np.stack([embed_text(name) for name in records.strings("food_name")])
+
+
+@pytest.fixture
+def store(monkeypatch, records, catalog_vectors):
+    """레코드 fixture로 세대를 발행한 ``server.VectorStore``. 엔드포인트가 쓰는 전역 store를 바꿔 둔다."""
+    import server
+
+    store = server.VectorStore()
+    store.model = FakeEncoder()
+    monkeypatch.setattr(server, "store", store)
+    store._publish(catalog_vectors, records, "test", {"test": 1})
+    return store
+
+
+@pytest.fixture
+def client(store):
+    from fastapi.testclient import TestClient
+
+    import server
+
+    # with 블록 없이 만들어 startup 이벤트(모델/DB 로드)를 실행하지 않는다
+    return TestClient(server.app)
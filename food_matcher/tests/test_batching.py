@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def test_results_return_to_their_callers():
+    batches = []
+
+    def handler(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch=4, max_wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in range(10)))
+        finally:
+            await batcher.stop()
+
+    assert asyncio.run(run()) == [item * 10 for item in range(10)]
+    assert all(len(batch) <= 4 for batch in batches)
+    assert sorted(item for batch in batches for item in batch) == list(range(10))
+    assert len(batches) < 10
+
+
+def test_handler_error_reaches_every_request_in_batch():
+    def handler(items):
+        raise RuntimeError("boom")
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch=8, max_wait_ms=20)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in range(3)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_stop_drains_queued_requests():
+    def handler(items):
+        time.sleep(0.01)
+        return [item + 1 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch=2, max_wait_ms=1)
+        batcher.start()
+        pending = [asyncio.ensure_future(batcher.submit(item)) for item in range(7)]
+        await asyncio.sleep(0)
+        await batcher.stop()
+        assert all(future.done() for future in pending)
+        with pytest.raises(RuntimeError):
+            await batcher.submit(100)
+        return [future.result() for future in pending]
+
+    assert asyncio.run(run()) == [item + 1 for item in range(7)]
+
+
+def test_stop_fails_requests_it_cannot_finish():
+    release = threading.Event()
+
+    def handler(items):
+        release.wait(5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch=2, max_wait_ms=1)
+        batcher.start()
+        pending = [asyncio.ensure_future(batcher.submit(item)) for item in range(5)]
+        await asyncio.sleep(0.05)
+        try:
+            await batcher.stop(timeout=0.05)
+        finally:
+            release.set()
+        return await asyncio.gather(*pending, return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) and "중지" in str(result) for result in results)
@@ -0,0 +1,27 @@
+import unicodedata
+
+from cache import LRUCache, normalize_query
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_zero_size_disables_cache():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_normalize_query_merges_spacing_and_composition():
+    decomposed = unicodedata.normalize("NFD", "김치  찌개 ")
+    assert decomposed != "김치  찌개 "
+    assert normalize_query(decomposed) == normalize_query(" 김치 찌개") == "김치 찌개"
@@ -0,0 +1,103 @@
+import sqlite3
+
+import numpy as np
+import pytest
+
+import catalog
+from catalog import fetch_catalog, fetch_changes, fetch_signature, pack_vector
+from sources import SQLiteConnection, create_tables
+
+BATCH = "2026-01-01 00:00:00"
+
+
+@pytest.fixture
+def connection():
+    raw = sqlite3.connect(":memory:")
+    create_tables(raw)
+    connection = SQLiteConnection(raw)
+    for food_id in range(1, 8):
+        write(connection, food_id, float(food_id), "2025-12-31 00:00:00" if food_id == 7 else BATCH)
+    yield connection
+    raw.close()
+
+
+def write(connection, food_id, value, updated_at):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT OR REPLACE INTO foods (id, food_code, food_name, updated_at) VALUES (%s, %s, %s, %s)",
+            (food_id, f"D101-{food_id:04d}", f"음식{food_id}", updated_at),
+        )
+        cursor.execute(
+            "INSERT OR REPLACE INTO food_embeddings (food_id, dimension, vector, vector_dtype, updated_at)"
+            " VALUES (%s, %s, %s, %s, %s)",
+            (food_id, 2, pack_vector(np.array([value, 1.0])), "float32le", updated_at),
+        )
+    connection.commit()
+
+
+def changed_ids(connection, since, known):
+    _, _, records = fetch_changes(connection, since, known)
+    return [record["id"] for record in records]
+
+
+def test_unchanged_boundary_rows_are_not_read_again(connection):
+    signature = fetch_signature(connection)
+    _, table = fetch_catalog(connection)
+    assert fetch_signature(connection) == signature
+    assert signature["boundary_ids"] == [1, 2, 3, 4, 5, 6]
+
+    # 한 배치(같은 시각)로 쓰인 행 전체가 아니라 실제로 바뀐 행만 읽는다
+    write(connection, 2, 20.0, "2026-01-01 00:00:05")
+    assert fetch_signature(connection) != signature
+    assert changed_ids(connection, signature, table.ids) == [2]
+
+
+def test_late_write_in_boundary_second_is_found(connection):
+    signature = fetch_signature(connection)
+    _, table = fetch_catalog(connection)
+    assert 7 not in signature["boundary_ids"]
+
+    # 경계 시각과 같은 초에 나중에 쓰인 행: 최대 시각은 그대로지만 경계 목록이 늘어난다
+    write(connection, 7, 70.0, BATCH)
+    latest = fetch_signature(connection)
+    assert latest["embeddings_updated_at"] == signature["embeddings_updated_at"]
+    assert latest != signature
+    assert changed_ids(connection, signature, table.ids) == [7]
+
+
+def test_new_and_deleted_rows(connection):
+    signature = fetch_signature(connection)
+    _, table = fetch_catalog(connection)
+    write(connection, 9, 9.0, BATCH)
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM food_embeddings WHERE food_id = 3")
+    connection.commit()
+
+    current_ids, vectors, records = fetch_changes(connection, signature, table.ids)
+    assert current_ids.tolist() == [1, 2, 4, 5, 6, 7, 9]
+    assert [record["id"] for record in records] == [9]
+    np.testing.assert_array_equal(vectors, [[9.0, 1.0]])
+
+
+def test_fetch_catalog_uses_given_capacity(connection, monkeypatch):
+    calls = []
+    monkeypatch.setattr(catalog, "fetch_signature", lambda conn: calls.append(conn) or {"count": 7})
+    vectors, table = fetch_catalog(connection, capacity=2)
+    assert calls == []
+    # 행 수보다 작게 잡아도 배열을 늘려 모두 읽는다
+    assert table.ids.tolist() == [1, 2, 3, 4, 5, 6, 7]
+    assert vectors.shape == (7, 2)
+
+    fetch_catalog(connection)
+    assert calls == [connection]
+
+
+@pytest.mark.parametrize("name", ["EMBEDDING_CHANGES_SQL", "FOOD_CHANGES_SQL", "BOUNDARY_SQL", "SIGNATURE_SQL"])
+def test_refresh_queries_use_updated_at_indexes(connection, name):
+    sql = getattr(catalog, name).replace("%s", "?")
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, ("2026-01-01 00:00:00",) * sql.count("?"))
+        plan = [row["detail"] for row in cursor.fetchall()]
+    # 변경분은 updated_at 인덱스로 찾는다. 전체를 훑는 것은 행 수를 세는 food_id 인덱스뿐이다
+    assert any("updated_at" in step for step in plan)
+    assert [step for step in plan if step.startswith("SCAN") and "CONSTANT" not in step and "autoindex" not in step] == []
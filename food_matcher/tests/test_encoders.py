@@ -0,0 +1,87 @@
+import json
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from encoders import ONNX_META_FILE, OnnxEncoder
+
+DIMENSION = 4
+# 패딩 토큰(0)의 은닉 상태를 크게 두어 mean pooling이 attention mask를 무시하면 바로 드러나게 한다
+TABLE = np.vstack([np.full(DIMENSION, 100.0), np.random.default_rng(0).normal(size=(300, DIMENSION))]).astype(np.float32)
+
+
+class FakeTokenizer:
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        ids = [[1 + ord(char) % 299 for char in text][:max_length] for text in texts]
+        width = max(len(row) for row in ids)
+        input_ids = np.zeros((len(ids), width), dtype=np.int32)
+        mask = np.zeros((len(ids), width), dtype=np.int32)
+        for position, row in enumerate(ids):
+            input_ids[position, : len(row)] = row
+            mask[position, : len(row)] = 1
+        return {"input_ids": input_ids, "attention_mask": mask, "token_type_ids": np.zeros_like(mask)}
+
+
+class FakeSession:
+    def __init__(self, path, options, providers):
+        self.path = path
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="input_ids"), types.SimpleNamespace(name="attention_mask")]
+
+    def run(self, outputs, inputs):
+        assert all(value.dtype == np.int64 for value in inputs.values())
+        return [TABLE[inputs["input_ids"]]]
+
+
+@pytest.fixture
+def onnx_dir(tmp_path, monkeypatch):
+    onnxruntime = types.ModuleType("onnxruntime")
+    onnxruntime.SessionOptions = types.SimpleNamespace
+    onnxruntime.GraphOptimizationLevel = types.SimpleNamespace(ORT_ENABLE_ALL=99)
+    onnxruntime.InferenceSession = FakeSession
+    transformers = types.ModuleType("transformers")
+    transformers.AutoTokenizer = types.SimpleNamespace(from_pretrained=lambda directory: FakeTokenizer())
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    return tmp_path
+
+
+def make_encoder(directory, pooling, model_name="test-model"):
+    meta = {"model_name": "test-model", "pooling": pooling, "max_seq_length": 16}
+    (directory / ONNX_META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    return OnnxEncoder(str(directory), model_name)
+
+
+def test_mean_pooling_ignores_padding(onnx_dir):
+    encoder = make_encoder(onnx_dir, "mean")
+    batch = encoder.encode(["김치", "김치찌개 국물"])
+    single = encoder.encode("김치")
+
+    assert batch.shape == (2, DIMENSION) and batch.dtype == np.float32
+    assert single.shape == (DIMENSION,)
+    np.testing.assert_allclose(batch[0], single, rtol=1e-6)
+    tokens = FakeTokenizer()(["김치"], True, True, 16, "np")["input_ids"][0]
+    np.testing.assert_allclose(single, TABLE[tokens].mean(axis=0), rtol=1e-6)
+
+
+def test_cls_pooling_uses_first_token(onnx_dir):
+    encoder = make_encoder(onnx_dir, "cls")
+    batch = encoder.encode(["비빔밥", "밥"])
+    np.testing.assert_allclose(batch, TABLE[[1 + ord("비") % 299, 1 + ord("밥") % 299]], rtol=1e-6)
+
+
+@pytest.mark.parametrize("pooling", ["cls", "mean"])
+def test_normalized_output(onnx_dir, pooling):
+    encoder = make_encoder(onnx_dir, pooling)
+    batch = encoder.encode(["라면", "짜장면", "돈가스"], convert_to_numpy=True, normalize_embeddings=True)
+    np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(encoder.encode("라면", normalize_embeddings=True)), 1.0, rtol=1e-6)
+    assert not np.allclose(np.linalg.norm(encoder.encode(["라면"]), axis=1), 1.0)
+
+
+def test_rejects_model_mismatch(onnx_dir):
+    with pytest.raises(RuntimeError):
+        make_encoder(onnx_dir, "mean", model_name="other-model")
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+import evaluate
+import server
+
+
+def test_configured_restores_server_globals():
+    before = {key: getattr(server, key) for key in evaluate.BASELINE}
+    with evaluate.configured(evaluate.MODES["hybrid"]):
+        assert server.HYBRID is True and server.FUZZY is True
+    assert {key: getattr(server, key) for key in evaluate.BASELINE} == before
+
+    with pytest.raises(RuntimeError):
+        with evaluate.configured({"INDEX_BACKEND": "int8"}):
+            raise RuntimeError("build failed")
+    assert server.INDEX_BACKEND == before["INDEX_BACKEND"]
+
+    # 모르는 이름이 섞여 있으면 아무 전역도 바꾸지 않는다
+    with pytest.raises(AttributeError):
+        with evaluate.configured({"HYBRID": True, "NO_SUCH_SETTING": 1}):
+            pass
+    assert {key: getattr(server, key) for key in evaluate.BASELINE} == before
+    assert not hasattr(server, "NO_SUCH_SETTING")
+
+
+def test_bundled_labels_parse():
+    labeled = evaluate.read_labels(os.path.join(os.path.dirname(evaluate.__file__), "eval_queries.tsv"))
+    assert labeled and all(query and codes for query, codes in labeled)
+
@@ -0,0 +1,37 @@
+import numpy as np
+
+from filters import FilterColumns
+
+
+def rows(mask):
+    return mask.nonzero()[0].tolist()
+
+
+def test_family_and_free_prefixes(records):
+    columns = FilterColumns.from_records(records)
+    # D101은 첫 구간 전체라 비트마스크, D1010은 포함하지 않는다
+    assert rows(columns.mask(["D101"], {}, [])) == [0, 1]
+    assert rows(columns.mask(["D101", "D202"], {}, [])) == [0, 1, 2, 3]
+    assert rows(columns.mask(["D1010-"], {}, [])) == [4]
+    assert rows(columns.mask(["D101-000"], {}, [])) == [0, 1]
+    assert rows(columns.mask(["X"], {}, [])) == []
+
+
+def test_nutrient_ranges_and_presence(records):
+    columns = FilterColumns.from_records(records)
+    assert rows(columns.mask([], {}, [])) == [0, 1, 2, 3, 4]
+    assert rows(columns.mask([], {"energy_kcal": (100.0, 150.0)}, [])) == [0, 4]
+    # 값이 없는 행(짜장면)은 범위 조건에서 빠진다
+    assert rows(columns.mask([], {"energy_kcal": (None, 1000.0)}, [])) == [0, 1, 2, 4]
+    assert rows(columns.mask([], {}, ["sodium_mg"])) == [0, 2]
+    assert rows(columns.mask(["D202"], {"sodium_mg": (500.0, None)}, ["energy_kcal"])) == [2]
+
+
+def test_free_prefixes_read_the_record_buffer(records):
+    columns = FilterColumns.from_records(records)
+    assert columns.code_data is records.columns["food_code.data"]
+    codes = records.strings("food_code")
+    for prefix in ["", "D", "D10", "D1010-0001", "D1010-00011", "D202-000", "김"]:
+        expected = [row for row, code in enumerate(codes) if code.startswith(prefix)]
+        assert rows(columns.mask([prefix], {}, [])) == expected
+    assert FilterColumns.from_records(records.take(np.array([], dtype=np.int64))).mask(["D1"], {}, []).size == 0
@@ -0,0 +1,31 @@
+from fuzzy import FuzzyIndex, edit_distance, to_jamo
+
+
+def build():
+    return FuzzyIndex.build([["김치찌개", "김치 찌개"], ["된장찌개", None], ["라면", None], ["김치볶음밥", None]], 2)
+
+
+def test_edit_distance_limit():
+    assert edit_distance("kitten", "sitting", 5) == 3
+    assert edit_distance("kitten", "sitting", 2) == 3
+    assert edit_distance("abc", "abcdef", 1) == 2
+
+
+def test_jamo_typo_within_distance():
+    index = build()
+    # ㅔ/ㅐ 하나 차이
+    assert edit_distance(to_jamo("김치찌게"), to_jamo("김치찌개"), 2) == 1
+    assert index.search("김치찌게", 5)[0] == (0, 1)
+    assert index.search("김치 찌개", 5)[0] == (0, 0)
+
+
+def test_distance_bounds():
+    index = build()
+    # 자모 4개당 1 허용: "라먼"(자모 4개)은 거리 1까지
+    assert index.search("라먼", 5) == [(2, 1)]
+    # "라"(자모 2개)는 정확히 같아야 한다
+    assert index.search("라", 5) == []
+    for row, distance in index.search("김치찌게", 5):
+        assert distance <= 2
+    assert all(row != 3 for row, _ in index.search("김치찌게", 5))
+    assert index.search("김치찌게", 1) == [(0, 1)]
@@ -0,0 +1,172 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import indexes
+from indexes import (
+    DEFAULT_INDEX_DIR,
+    MAX_LIMIT,
+    ExactIndex,
+    HNSWIndex,
+    Int4QuantizedIndex,
+    QuantizedIndex,
+    ShardedIndex,
+    create_index,
+    index_directory,
+    sample_queries,
+    shard_pool,
+)
+
+
+def normalized(rows, dimension, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(rows, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_hnsw_ef_is_fixed_and_concurrent_searches_agree():
+    pytest.importorskip("hnswlib")
+    vectors = normalized(2000, 32)
+    queries = normalized(40, 32, seed=1)
+    index = HNSWIndex()
+    index.build(vectors)
+    assert index.graph.ef == HNSWIndex.ef_search() >= MAX_LIMIT
+
+    def run(k):
+        return [index.search(query[np.newaxis, :], k, -1.0)[0][0].tolist() for query in queries]
+
+    expected = {k: run(k) for k in (1, MAX_LIMIT, 200)}
+    with ThreadPoolExecutor(8) as pool:
+        for k, found in zip([1, MAX_LIMIT, 200] * 4, pool.map(run, [1, MAX_LIMIT, 200] * 4)):
+            assert found == expected[k]
+    # ef보다 큰 k도 k개를 모두 돌려준다
+    assert all(len(row) == 200 for row in expected[200])
+    assert index.graph.ef == HNSWIndex.ef_search()
+
+    exact = ExactIndex()
+    exact.build(vectors)
+    truth = [exact.search(query[np.newaxis, :], MAX_LIMIT, -1.0)[0][0].tolist() for query in queries]
+    assert np.mean([len(set(a) & set(b)) / MAX_LIMIT for a, b in zip(truth, expected[MAX_LIMIT])]) > 0.9
+
+
+@pytest.mark.parametrize("index_cls", [QuantizedIndex, Int4QuantizedIndex])
+@pytest.mark.parametrize("dimension", [64, 65])
+def test_quantized_codes_round_trip(index_cls, dimension):
+    index = index_cls()
+    levels = np.random.default_rng(0).integers(-index.levels, index.levels + 1, size=(50, dimension)).astype(np.int8)
+    codes = index._encode(levels)
+    assert codes.shape == (50, index._code_width(dimension))
+
+    decoded = np.empty(levels.shape, dtype=np.float32)
+    index._decode_into(codes, decoded)
+    np.testing.assert_array_equal(decoded, levels)
+
+
+@pytest.mark.parametrize("index_cls", [QuantizedIndex, Int4QuantizedIndex])
+@pytest.mark.parametrize("dimension", [64, 65])
+def test_quantized_scan_matches_decoded_dot(index_cls, dimension):
+    vectors = normalized(1000, dimension)
+    queries = normalized(3, dimension, seed=1)
+    index = index_cls()
+    index.build(vectors)
+
+    decoded = np.empty(vectors.shape, dtype=np.float32)
+    index._decode_into(index.codes, decoded)
+    np.testing.assert_allclose(index.approximate_scores(queries), (decoded * index.scales) @ queries.T, atol=1e-4)
+    # 양자화 오차 안에서 원래 내적에 가깝다
+    assert np.abs(index.approximate_scores(queries) - vectors @ queries.T).max() < 0.1
+
+
+@pytest.mark.parametrize("index_cls, floor", [(QuantizedIndex, 0.99), (Int4QuantizedIndex, 0.95)])
+def test_quantized_recall_and_rescored_scores(monkeypatch, index_cls, floor):
+    # 재채점 후보를 좁혀 1차 스캔의 순위 품질이 recall에 드러나게 한다
+    monkeypatch.setattr(indexes, "QUANT_RESCORE_POOL", 20)
+    vectors = normalized(5000, 65)
+    queries = sample_queries(vectors, 200, 0.1)
+
+    exact = ExactIndex()
+    exact.build(vectors)
+    index = index_cls()
+    index.build(vectors)
+
+    recalls = []
+    truth = exact.search(queries, 10, -1.0)
+    for query, (expected, expected_scores), (found, scores) in zip(queries, truth, index.search(queries, 10, -1.0)):
+        recalls.append(len(set(expected.tolist()) & set(found.tolist())) / 10)
+        # 반환 점수는 근사값이 아니라 float32 원본 벡터와의 내적이다
+        np.testing.assert_allclose(scores, vectors[found] @ query, rtol=1e-6, atol=1e-6)
+        if np.array_equal(expected, found):
+            np.testing.assert_allclose(scores, expected_scores, rtol=1e-6, atol=1e-6)
+    assert np.mean(recalls) >= floor
+
+
+def test_quantized_backends_always_map_float_vectors(tmp_path):
+    assert index_directory("", "int8") == os.path.join(DEFAULT_INDEX_DIR, "int8")
+    assert index_directory("", "exact") == ""
+    assert index_directory("idx", "hnsw") == os.path.join("idx", "hnsw")
+
+    vectors = normalized(300, 16)
+    index = create_index("int4", vectors, str(tmp_path / "int4"))
+    assert isinstance(index.vectors, np.memmap)
+    assert isinstance(index.codes, np.memmap)
+    np.testing.assert_array_equal(index.vectors, vectors)
+
+
+def test_sharded_matches_exact_and_pools_are_keyed_by_workers():
+    vectors = normalized(1003, 16)
+    queries = normalized(20, 16, seed=1)
+    exact = ExactIndex()
+    exact.build(vectors)
+    for shards in (2, 5):
+        sharded = ShardedIndex(shards)
+        sharded.build(vectors)
+        assert sharded.params() == {"shards": shards}
+        for k in (1, MAX_LIMIT, 300):
+            for (expected, expected_scores), (found, found_scores) in zip(
+                exact.search(queries, k, 0.1), sharded.search(queries, k, 0.1)
+            ):
+                assert found.tolist() == expected.tolist()
+                np.testing.assert_allclose(found_scores, expected_scores, rtol=1e-6)
+
+    # 먼저 만든 풀의 워커 수가 뒤 호출에 그대로 쓰이지 않는다
+    assert shard_pool(2) is shard_pool(2)
+    assert shard_pool(5) is not shard_pool(2)
+    assert shard_pool(5)._max_workers == 5
+
+
+def test_failed_replace_keeps_in_memory_arrays(monkeypatch, tmp_path):
+    directory = str(tmp_path / "int8")
+    # 다른 카탈로그로 만든 인덱스가 자리를 차지하고 있고, 이번 빌드의 교체는 실패한다
+    create_index("int8", normalized(300, 16, seed=5), directory)
+
+    def fail(source, target):
+        raise OSError("directory in use")
+
+    monkeypatch.setattr(indexes.os, "replace", fail)
+    vectors = normalized(200, 16)
+    index = create_index("int8", vectors, directory)
+    assert not isinstance(index.vectors, np.memmap)
+    assert not isinstance(index.codes, np.memmap)
+    assert index.codes.shape[0] == 200
+
+    query = normalized(1, 16, seed=1)
+    found, scores = index.search(query, 5, -1.0)[0]
+    np.testing.assert_allclose(scores, vectors[found] @ query[0], rtol=1e-6)
+    assert not [name for name in os.listdir(tmp_path) if ".tmp-" in name]
+
+
+def test_refresh_build_skips_fingerprint(monkeypatch, tmp_path):
+    def fail(vectors):
+        raise AssertionError("병합한 벡터는 해시하지 않는다")
+
+    monkeypatch.setattr(indexes, "fingerprint", fail)
+    vectors = normalized(200, 16)
+    index = create_index("int8", vectors, str(tmp_path / "int8"), reuse=False)
+    # mmap이 필요한 백엔드는 저장하되 다음 기동 때 재사용되지 않는다
+    assert isinstance(index.vectors, np.memmap)
+    assert indexes._read_meta(str(tmp_path / "int8"))["fingerprint"] is None
+
+    pytest.importorskip("hnswlib")
+    create_index("hnsw", vectors, str(tmp_path / "hnsw"), reuse=False)
+    assert not os.path.exists(tmp_path / "hnsw")
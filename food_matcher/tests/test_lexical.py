@@ -0,0 +1,27 @@
+from lexical import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_ignores_spacing_and_symbols():
+    assert tokenize("김치 찌개") == tokenize("김치찌개") == ["김치", "치찌", "찌개"]
+    assert tokenize("된장국_아욱") == tokenize("된장국 아욱")
+    assert tokenize("밥") == ["밥"]
+    assert tokenize(None) == []
+
+
+def test_bm25_ranks_overlapping_names(records):
+    texts = [" ".join(filter(None, names)) for names in zip(records.strings("food_name"), records.strings("common_name"))]
+    index = LexicalIndex.build(texts)
+
+    documents, scores = index.search("김치 찌개", 3)
+    assert documents.tolist() == [0]
+    assert scores[0] > 0
+
+    documents, _ = index.search("아욱 된장국", 5)
+    assert documents[0] == 1
+    assert index.search("없는음식", 5)[0].size == 0
+
+
+def test_reciprocal_rank_fusion():
+    # 두 목록 모두에 나온 2가 앞서고, 동점(1과 3)은 먼저 나온 목록 순서를 따른다
+    assert reciprocal_rank_fusion([[1, 2], [3, 2]], 60) == [2, 1, 3]
+    assert reciprocal_rank_fusion([[], [4]], 60) == [4]
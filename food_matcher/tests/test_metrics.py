@@ -0,0 +1,79 @@
+import math
+import re
+
+from fastapi.testclient import TestClient
+
+import server
+from batching import MicroBatcher
+
+LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"'
+SAMPLE = re.compile(rf"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{{{LABEL}(?:,{LABEL})*\}})? (\S+)$")
+
+
+def parse(text):
+    """Prometheus 텍스트 포맷을 검사하며 {(이름, 라벨 문자열): 값}으로 읽는다."""
+    assert text.endswith("\n")
+    types = {}
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert kind in ("gauge", "counter", "histogram") and name not in types
+            types[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name, labels, value = match.group(1), match.group(2) or "", match.group(3)
+        family = re.sub(r"_(bucket|sum|count)$", "", name) if name not in types else name
+        assert family in types, f"TYPE 없이 나온 샘플: {line}"
+        samples[(name, labels)] = math.inf if value == "+Inf" else float(value)
+    return types, samples
+
+
+def histogram(samples, name, labels=""):
+    buckets = [
+        value for (sample, sample_labels), value in samples.items() if sample == f"{name}_bucket" and labels in sample_labels
+    ]
+    assert buckets == sorted(buckets), "버킷은 누적값이어야 한다"
+    count = samples[(f"{name}_count", "{" + labels + "}" if labels else "")]
+    assert buckets[-1] == count
+    return count
+
+
+def test_metrics_move_with_requests(client, store):
+    before_types, before = parse(client.get("/metrics").text)
+    assert before_types["food_matcher_stage_seconds"] == "histogram"
+    assert before_types["food_matcher_cache_hits_total"] == "counter"
+    assert before[("food_matcher_ready", "")] == 1
+    assert before[("food_matcher_store_records", "")] == len(store.records)
+    requests_before = before.get(("food_matcher_stage_seconds_count", '{stage="request"}'), 0)
+
+    for _ in range(3):
+        assert client.post("/match", json={"query": "김치찌개", "limit": 2}).status_code == 200
+
+    _, after = parse(client.get("/metrics").text)
+    assert histogram(after, "food_matcher_stage_seconds", 'stage="request"') == requests_before + 3
+    response = '{cache="response"}'
+    assert after[("food_matcher_cache_hits_total", response)] == before[("food_matcher_cache_hits_total", response)] + 2
+    assert after[("food_matcher_cache_misses_total", response)] == before[("food_matcher_cache_misses_total", response)] + 1
+    assert after[("food_matcher_cache_entries", '{cache="response"}')] == 1
+
+
+def test_metrics_export_microbatch_queue(monkeypatch, store):
+    monkeypatch.setattr(server, "MICROBATCH", True)
+    monkeypatch.setattr(server, "batcher", MicroBatcher(store.match_bodies, 4, 1))
+    # 모델과 세대는 store 픽스처가 이미 올려 두었다
+    monkeypatch.setattr(store, "start_loading", lambda: [])
+
+    with TestClient(server.app) as running:
+        for query in ("비빔밥", "짜장면"):
+            assert running.post("/match", json={"query": query, "limit": 1}).status_code == 200
+        types, samples = parse(running.get("/metrics").text)
+
+    assert types["food_matcher_microbatch_queue_depth"] == "gauge"
+    assert samples[("food_matcher_microbatch_queue_depth", "")] == 0
+    assert histogram(samples, "food_matcher_microbatch_size") == 2
+    assert histogram(samples, "food_matcher_microbatch_queue_depth_at_dispatch") == 2
+    assert not server.batcher.running
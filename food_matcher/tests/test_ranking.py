@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from ranking import select_top_k
+
+
+def reference(scores, limit, threshold):
+    order = np.argsort(-scores, kind="stable")
+    return order[scores[order] >= threshold][:limit]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_full_sort_with_ties(seed):
+    rng = np.random.default_rng(seed)
+    # 값 종류를 적게 두어 경계 점수 동점이 자주 생기게 한다
+    scores = rng.integers(0, 6, size=200).astype(np.float32) / 5
+    for limit in (1, 3, 10, 200, 500):
+        for threshold in (-1.0, 0.0, 0.4, 1.0, 1.1):
+            np.testing.assert_array_equal(select_top_k(scores, limit, threshold), reference(scores, limit, threshold))
+
+
+def test_threshold_and_limit_edges():
+    scores = np.array([0.5, 0.9, 0.9, 0.1], dtype=np.float32)
+    assert select_top_k(scores, 2, 0.0).tolist() == [1, 2]
+    assert select_top_k(scores, 10, 0.5).tolist() == [1, 2, 0]
+    assert select_top_k(scores, 0, 0.0).size == 0
+    assert select_top_k(scores, 3, 0.95).size == 0
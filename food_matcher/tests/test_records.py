@@ -0,0 +1,42 @@
+import numpy as np
+
+from records import RecordTable, merge_tables
+from tests.conftest import make_record
+
+
+def test_take_gathers_rows_in_order(records):
+    taken = records.take(np.array([3, 0, 2]))
+    assert [records[row] for row in (3, 0, 2)] == list(taken)
+    assert taken[2]["common_name"] is None
+    assert records.take(np.array([], dtype=np.int64)).strings("food_name") == []
+
+
+def test_concat_keeps_strings_and_nulls(records):
+    combined = RecordTable.concat([records.take(np.array([4])), records.take(np.array([0, 2]))])
+    assert combined.ids.tolist() == [5, 1, 3]
+    assert combined.strings("common_name") == [None, "김치 찌개", None]
+    assert combined[1]["nutrients"] == {"energy_kcal": 120.0, "sodium_mg": 800.0}
+
+
+def test_merge_tables_applies_updates_inserts_and_deletes(records):
+    vectors = np.arange(len(records) * 2, dtype=np.float32).reshape(len(records), 2)
+    changed = RecordTable.from_records(
+        [
+            make_record(2, "D101-0002", "아욱된장국", "아욱국", energy_kcal=50.0),
+            make_record(9, "D303-0001", "냉면", None),
+            # 읽는 사이에 삭제된 행은 반영하지 않는다
+            make_record(7, "D303-0002", "사라진 음식", None),
+        ]
+    )
+    changed_vectors = np.array([[-1, -1], [-9, -9], [-7, -7]], dtype=np.float32)
+    current_ids = np.array([1, 2, 3, 5, 9])
+
+    merged_vectors, merged = merge_tables(vectors, records, current_ids, changed_vectors, changed)
+
+    assert merged.ids.tolist() == [1, 2, 3, 5, 9]
+    assert merged[1]["food_name"] == "아욱된장국"
+    assert merged[4]["food_name"] == "냉면"
+    assert merged[3] == records[4]
+    np.testing.assert_array_equal(merged_vectors, [[0, 1], [-1, -1], [4, 5], [8, 9], [-9, -9]])
+    # 입력 테이블은 그대로다
+    assert records[1]["food_name"] == "된장국_아욱"
@@ -0,0 +1,207 @@
+import json
+import threading
+import unicodedata
+
+import numpy as np
+import pytest
+
+import server
+from records import RecordTable
+from tests.conftest import embed_text, make_record
+
+
+def names(payload):
+    return [match["food"]["food_name"] for match in payload["matches"]]
+
+
+@pytest.mark.parametrize("fast_json", [False, True])
+def test_batch_keeps_order_and_per_item_options(monkeypatch, client, store, fast_json):
+    monkeypatch.setattr(server, "FAST_JSON", fast_json)
+    response = client.post(
+        "/match/batch",
+        json={
+            "queries": [
+                {"query": "비빔밥", "limit": 1, "threshold": 0.0},
+                {"query": "김치찌개", "limit": 3, "threshold": 0.0},
+                {"query": "짜장면", "limit": 2, "threshold": 0.0},
+                {"query": "전혀 다른 음식", "limit": 5, "threshold": 0.99},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 4
+    assert names(results[0]) == ["비빔밥"]
+    assert names(results[1])[0] == "김치찌개" and len(results[1]["matches"]) <= 3
+    assert names(results[2])[0] == "짜장면" and len(results[2]["matches"]) <= 2
+    assert results[3]["matches"] == []
+    assert all(match["score"] >= 0.0 for result in results for match in result["matches"])
+    # 배치 전체를 encode 한 번으로 처리한다
+    assert len(store.model.calls) == 1 and len(store.model.calls[0]) == 4
+
+
+def test_batch_matches_single_requests(client):
+    queries = [{"query": "된장국 아욱", "limit": 3, "threshold": 0.0}, {"query": "치킨피자", "limit": 3, "threshold": 0.0}]
+    batch = client.post("/match/batch", json={"queries": queries}).json()["results"]
+    assert batch == [client.post("/match", json=query).json() for query in queries]
+
+
+def test_batch_rejects_empty_and_oversized_requests(client):
+    assert client.post("/match/batch", json={"queries": []}).status_code == 422
+    too_many = [{"query": "비빔밥"}] * (server.MAX_BATCH_QUERIES + 1)
+    assert client.post("/match/batch", json={"queries": too_many}).status_code == 422
+    over_limit = {"queries": [{"query": "비빔밥", "limit": server.MAX_LIMIT + 1}]}
+    assert client.post("/match/batch", json=over_limit).status_code == 422
+
+    response = client.post("/match/batch", json={"queries": [{"query": "비빔밥"}, {"query": "  "}]})
+    assert response.status_code == 400
+    assert "queries[1]" in response.json()["detail"]
+
+
+def test_query_embeddings_are_cached_per_normalized_text(client, store):
+    client.post("/match", json={"query": "김치찌개", "limit": 1})
+    # limit이 달라 응답 캐시는 빗나가도 임베딩은 다시 계산하지 않는다
+    client.post("/match", json={"query": "  김치찌개 ", "limit": 2})
+    assert store.model.calls == [["김치찌개"]]
+    assert store.query_cache.stats()["hits"] == 1
+
+    # 배치는 캐시에 없는 문장만 중복 없이 한 번에 인코딩한다
+    client.post("/match/batch", json={"queries": [{"query": "김치찌개"}, {"query": "짜장면"}, {"query": "짜장면"}]})
+    assert store.model.calls[-1] == ["짜장면"]
+
+
+def test_response_cache_is_keyed_by_version_and_filters(client, store, records, catalog_vectors):
+    request = {"query": "피자", "limit": 3, "threshold": 0.0}
+    first = client.post("/match", json=request).content
+    assert "피자_치킨 피자" in names(client.post("/match", json=request).json())
+    assert client.post("/match", json=request).content == first
+    assert store.response_cache.stats()["hits"] == 2
+
+    # 필터가 다르면 다른 항목이다
+    filtered = {**request, "filters": {"food_code_prefixes": ["D101"]}}
+    body = client.post("/match", json=filtered).json()
+    assert all(match["food"]["food_code"].startswith("D101") for match in body["matches"])
+    assert len(store.response_cache) == 2
+
+    # 새 세대가 발행되면 이전 세대로 만든 응답은 나가지 않는다
+    changed = [dict(record) for record in records]
+    changed[2]["food_name"] = "피자_불고기 피자"
+    version = store.version
+    store._publish(catalog_vectors, RecordTable.from_records(changed), "test", {"test": 2})
+    assert store.version == version + 1
+    assert len(store.response_cache) == 0
+    assert "피자_불고기 피자" in names(client.post("/match", json=request).json())
+
+
+def test_fast_json_matches_pydantic_bytes_for_tiny_floats(monkeypatch, client, store, records, catalog_vectors):
+    tiny = [dict(record) for record in records]
+    tiny[0]["nutrients"] = {"energy_kcal": 1e-05, "sodium_mg": 1.5e-07}
+    tiny[4]["nutrients"] = {"energy_kcal": -2.5e-06, "sodium_mg": 3e-05}
+    store._publish(catalog_vectors, RecordTable.from_records(tiny), "test", {"test": 2})
+    hits = [[(0, 1e-05), (4, 1.2345678e-07)], [(4, 0.1234), (0, 1e-4)], []]
+
+    bodies = {}
+    for fast_json in (False, True):
+        monkeypatch.setattr(server, "FAST_JSON", fast_json)
+        store.response_cache.clear()
+        bodies[fast_json] = (
+            store._render_hits(store.generation, hits),
+            client.post("/match", json={"query": "비빔밥", "threshold": 0.0}).content,
+            client.post("/match/batch", json={"queries": [{"query": "김치찌개", "threshold": 0.0}]}).content,
+        )
+    assert bodies[True] == bodies[False]
+    assert b'"score":0.00001' in bodies[True][0][0] and b'"sodium_mg":1.5e-7' in bodies[True][0][0]
+
+
+def test_requests_get_503_with_retry_after_until_loaded(monkeypatch, client, store):
+    # store 픽스처가 만든 모델과 세대를 로딩 스레드가 늦게 올리는 상황을 만든다
+    loading = server.VectorStore()
+    monkeypatch.setattr(server, "store", loading)
+    released = {"model": threading.Event(), "vectors": threading.Event()}
+
+    def load_model():
+        released["model"].wait(5)
+        loading.model = store.model
+
+    def load():
+        released["vectors"].wait(5)
+        loading.generation = store.generation
+
+    loading.load_model, loading.load = load_model, load
+    threads = loading.start_loading()
+    request = {"query": "비빔밥", "limit": 1}
+
+    for component in ("model", "vectors"):
+        assert client.get("/health").json()["status"] == "loading"
+        for response in (
+            client.post("/match", json=request),
+            client.post("/match/batch", json={"queries": [request]}),
+        ):
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(server.STARTUP_RETRY_AFTER)
+        released[component].set()
+        threads[server.VectorStore.STARTUP_COMPONENTS.index(component)].join(5)
+
+    assert client.get("/health").json()["status"] == "ok"
+    response = client.post("/match", json=request)
+    assert response.status_code == 200
+    assert names(response.json()) == ["비빔밥"]
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+def test_exact_match_hits_normalized_names_and_follows_refresh(monkeypatch, client, store, records, catalog_vectors):
+    monkeypatch.setattr(server, "EXACT_MATCH", True)
+    extra = RecordTable.from_records([make_record(6, "D303-0001", "BLT 샌드위치")])
+    store._publish(
+        np.vstack([catalog_vectors, embed_text("BLT 샌드위치")]), RecordTable.concat([records, extra]), "test", {"test": 1}
+    )
+
+    # NFD로 분해된 입력, 대소문자, 공백·밑줄 차이는 같은 이름이다
+    for query, name in [
+        (unicodedata.normalize("NFD", "김치찌개"), "김치찌개"),
+        ("  김치   찌개 ", "김치찌개"),
+        ("된장국 아욱", "된장국_아욱"),
+        ("blt  샌드위치", "BLT 샌드위치"),
+    ]:
+        body = client.post("/match", json={"query": query, "limit": 3}).json()
+        assert names(body) == [name] and body["matches"][0]["score"] == 1.0
+    assert store.model.calls == []
+    assert store.exact_matches.stats()["hits"] == 4
+
+    # 이름이 없으면 벡터 검색으로 넘어간다
+    assert store.match_exact("김치 찌개 백반", 3) is None
+    body = client.post("/match", json={"query": "김치 찌개 백반", "limit": 3, "threshold": 0.0}).json()
+    assert store.model.calls == [["김치 찌개 백반"]]
+    assert "김치찌개" in names(body)
+
+    # 갱신으로 이름이 바뀌면 이전 이름은 더 이상 정확 일치하지 않는다
+    renamed = make_record(1, "D101-0001", "김치찌개_돼지고기", None, energy_kcal=120.0)
+    monkeypatch.setattr(server, "connect", lambda: FakeConnection())
+    monkeypatch.setattr(server, "fetch_signature", lambda connection: {"test": 2})
+    monkeypatch.setattr(
+        server,
+        "fetch_changes",
+        lambda connection, since, known_ids: (known_ids, embed_text("김치찌개 돼지고기")[np.newaxis, :], [renamed]),
+    )
+    assert store.refresh() == {"full": False, "changed": 1, "deleted": 0}
+    assert store.match_exact("김치찌개", 3) is None
+    body = client.post("/match", json={"query": "김치찌개 돼지고기", "limit": 3}).json()
+    assert names(body) == ["김치찌개_돼지고기"] and body["matches"][0]["score"] == 1.0
+
+
+def test_empty_filters_are_treated_as_no_filters(monkeypatch, client, store):
+    def fail(*args):
+        raise AssertionError("빈 필터로 마스크를 만들면 안 됩니다")
+
+    monkeypatch.setattr(server.VectorStore, "_filter_mask", staticmethod(fail))
+    request = {"query": "비빔밥", "limit": 2, "threshold": 0.0}
+    plain = client.post("/match", json=request).content
+    for filters in ({}, {"food_code_prefixes": [], "nutrients": {"energy_kcal": {}}, "has_nutrients": []}):
+        assert client.post("/match", json={**request, "filters": filters}).content == plain
+    assert len(store.response_cache) == 1 and store.response_cache.stats()["hits"] == 2
+    batch = client.post("/match/batch", json={"queries": [{**request, "filters": {}}]}).json()
+    assert batch["results"][0] == json.loads(plain)
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+import catalog
+import shared_store
+from records import RecordTable
+from shared_store import SharedStoreWriter, attach_store, read_generation, segment_name
+
+
+@pytest.fixture
+def shm_name():
+    name = f"fm-test-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    yield name
+    shared_store.cleanup(name)
+
+
+def catalog_vectors(count, dimension=4):
+    return np.arange(count * dimension, dtype=np.float32).reshape(count, dimension)
+
+
+def wait_for_generation(name, generation, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while read_generation(name) < generation:
+        assert time.monotonic() < deadline, f"세대 {generation}이 게시되지 않았습니다"
+        time.sleep(0.01)
+
+
+def test_generation_swap_and_cleanup(shm_name, records):
+    writer = SharedStoreWriter(shm_name, grace=0)
+    assert writer.publish(catalog_vectors(len(records)), records, {"model_name": "test"}) == 1
+
+    vectors, table, header, segment = attach_store(shm_name)
+    assert header["generation"] == 1 and header["model_name"] == "test"
+    np.testing.assert_array_equal(vectors, catalog_vectors(len(records)))
+    assert [table[row] for row in range(len(table))] == [records[row] for row in range(len(records))]
+    assert not vectors.flags.writeable
+
+    renamed = [dict(records[row]) for row in range(len(records))]
+    renamed[0]["food_name"] = "김치찌개_돼지고기"
+    assert writer.publish(catalog_vectors(len(records)) + 1, RecordTable.from_records(renamed), {}) == 2
+    assert read_generation(shm_name) == 2
+
+    # grace가 지난 이전 세대는 unlink되지만, 이미 붙어 있던 매핑은 계속 읽힌다
+    with pytest.raises(FileNotFoundError):
+        shared_store._attach(segment_name(shm_name, 1))
+    assert table.string("food_name", 0) == "김치찌개"
+    del vectors, table
+    segment.close()
+
+    vectors, table, header, segment = attach_store(shm_name)
+    assert header["generation"] == 2 and table.string("food_name", 0) == "김치찌개_돼지고기"
+    np.testing.assert_array_equal(vectors, catalog_vectors(len(records)) + 1)
+    del vectors, table
+    segment.close()
+
+    writer.close()
+    assert read_generation(shm_name) == 0
+    with pytest.raises(FileNotFoundError):
+        shared_store._attach(segment_name(shm_name, 2))
+
+
+class FakeConnection:
+    def close(self):
+        pass
+
+
+def test_loader_survives_failed_load_and_refresh(monkeypatch, shm_name, records):
+    failures = {"connect": 1, "changes": 1}
+    signatures = iter([{"count": len(records), "v": 1}] * 2 + [{"count": len(records), "v": 2}] * 100)
+
+    def connect():
+        if failures["connect"]:
+            failures["connect"] -= 1
+            raise ConnectionError("db down")
+        return FakeConnection()
+
+    def fetch_changes(connection, since, known_ids):
+        if failures["changes"]:
+            failures["changes"] -= 1
+            raise ConnectionError("db went away")
+        changed = dict(records[1])
+        changed["food_name"] = "된장국_시금치"
+        return records.ids, np.full((1, 4), 9, dtype=np.float32), [changed]
+
+    monkeypatch.setattr(catalog, "connect", connect)
+    monkeypatch.setattr(catalog, "fetch_signature", lambda connection: next(signatures))
+    monkeypatch.setattr(catalog, "fetch_catalog", lambda connection, capacity: (catalog_vectors(len(records)), records))
+    monkeypatch.setattr(catalog, "fetch_changes", fetch_changes)
+
+    stop = threading.Event()
+    loader = threading.Thread(target=shared_store.serve, args=(shm_name, 0.01, stop), daemon=True)
+    loader.start()
+    try:
+        wait_for_generation(shm_name, 2)
+    finally:
+        stop.set()
+        loader.join(5)
+    assert not loader.is_alive()
+    assert failures == {"connect": 0, "changes": 0}
+    # 종료하면 세그먼트를 정리한다
+    assert read_generation(shm_name) == 0
@@ -0,0 +1,63 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import indexes
+from indexes import create_index, fingerprint
+from snapshot import MANIFEST_FILE, RECORDS_FILE, read_manifest, read_snapshot, verify_snapshot, write_snapshot
+
+
+@pytest.fixture
+def vectors(records):
+    vectors = np.random.default_rng(0).normal(size=(len(records), 8)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_records_are_memory_mapped_columns(tmp_path, records, vectors):
+    root = str(tmp_path)
+    write_snapshot(root, vectors, records, "model")
+    directory, manifest = read_manifest(root)
+    verify_snapshot(directory, manifest)
+
+    loaded_vectors, table, manifest = read_snapshot(root, "model")
+    assert isinstance(loaded_vectors, np.memmap)
+    assert all(isinstance(column, np.memmap) for column in table.columns.values())
+    assert list(table) == list(records)
+    assert manifest["fingerprint"] == fingerprint(vectors)
+
+    with pytest.raises(RuntimeError):
+        read_snapshot(root, "other-model")
+
+
+def test_manifest_fingerprint_skips_rehash(monkeypatch, tmp_path, records, vectors):
+    write_snapshot(str(tmp_path), vectors, list(records), "model")
+    loaded, _, manifest = read_snapshot(str(tmp_path), "model")
+    directory = str(tmp_path / "index-int8")
+    built = create_index("int8", loaded, directory, vectors_fingerprint=manifest["fingerprint"])
+
+    def fail(vectors):
+        raise AssertionError("manifest의 fingerprint가 있으면 행렬을 해시하지 않는다")
+
+    monkeypatch.setattr(indexes, "fingerprint", fail)
+    reopened = create_index("int8", loaded, directory, vectors_fingerprint=manifest["fingerprint"])
+    np.testing.assert_array_equal(reopened.codes, built.codes)
+    assert isinstance(reopened.codes, np.memmap)
+
+
+def test_reads_format_1_jsonl_records(tmp_path, records, vectors):
+    root = str(tmp_path)
+    version = write_snapshot(root, vectors, records, "model")
+    directory = os.path.join(root, version)
+    with open(os.path.join(directory, RECORDS_FILE), "w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+    with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    manifest["format"] = 1
+    with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle)
+
+    _, table, _ = read_snapshot(root, "model")
+    assert list(table) == list(records)
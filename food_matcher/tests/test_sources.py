@@ -0,0 +1,86 @@
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+
+from catalog import fetch_catalog, fetch_changes, fetch_signature, pack_vector
+from export_source import export_parquet, export_sqlite
+from sources import ParquetSource, SQLiteSource, create_tables
+
+FOODS = [
+    # (id, food_code, food_name, common_name, energy_kcal, sodium_mg, updated_at)
+    (1, "D101-0001", "김치찌개", "김치 찌개", 120.0, 800.5, "2026-01-01 00:00:00"),
+    (2, "D101-0002", "된장국_아욱", None, 45.0, None, "2026-01-01 00:00:00"),
+    (3, "D202-0001", "피자_치킨 피자", None, None, None, "2026-01-02 00:00:00"),
+    (5, "D1010-0001", "비빔밥", "돌솥 비빔밥", 150.25, 1e-05, None),
+]
+
+
+@pytest.fixture
+def origin(tmp_path):
+    path = str(tmp_path / "origin.db")
+    connection = sqlite3.connect(path)
+    create_tables(connection)
+    for position, (food_id, code, name, common, energy, sodium, updated_at) in enumerate(FOODS):
+        connection.execute(
+            "INSERT INTO foods (id, food_code, food_name, common_name, serving_size, energy_kcal, sodium_mg, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (food_id, code, name, common, "100g", energy, sodium, updated_at),
+        )
+        vector = np.array([position, 1.0, -0.5], dtype=np.float32)
+        if position == 1:
+            # 마이그레이션 전 행처럼 JSON 텍스트로만 둔다
+            row = (food_id, 3, json.dumps(vector.tolist()), None, None, updated_at)
+        else:
+            row = (food_id, 3, None, pack_vector(vector), "float32le", updated_at)
+        connection.execute(
+            "INSERT INTO food_embeddings (food_id, dimension, embedding, vector, vector_dtype, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            row,
+        )
+    connection.commit()
+    connection.close()
+    return SQLiteSource(path)
+
+
+def read(source, since=None):
+    connection = source.connect()
+    try:
+        signature = fetch_signature(connection)
+        vectors, table = fetch_catalog(connection)
+        # 아는 id가 없다고 하면 수정 시각이 없는 행까지 모두 새 행으로 읽는다
+        changes = fetch_changes(connection, since, np.array([], dtype=np.int64)) if since is not None else None
+    finally:
+        connection.close()
+    return signature, vectors, list(table), changes
+
+
+def assert_same_catalog(origin, exported):
+    signature, vectors, records, _ = read(origin)
+    exported_signature, exported_vectors, exported_records, _ = read(exported)
+    assert exported_signature == signature
+    np.testing.assert_array_equal(exported_vectors, vectors)
+    assert exported_records == records
+
+    # 변경분 조회도 같은 결과다
+    since = {"embeddings_updated_at": None, "foods_updated_at": None, "boundary_ids": []}
+    ids, changed_vectors, changed = read(origin, since)[3]
+    exported_ids, exported_changed_vectors, exported_changed = read(exported, since)[3]
+    np.testing.assert_array_equal(exported_ids, ids)
+    np.testing.assert_array_equal(exported_changed_vectors, changed_vectors)
+    assert exported_changed == changed and len(changed) == len(FOODS)
+
+
+def test_sqlite_export_round_trip(tmp_path, origin):
+    target = str(tmp_path / "catalog.db")
+    assert export_sqlite(origin, target) == {"foods": len(FOODS), "food_embeddings": len(FOODS)}
+    assert_same_catalog(origin, SQLiteSource(target))
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith(".export-")] == []
+
+
+def test_parquet_export_round_trip(tmp_path, origin):
+    pytest.importorskip("pyarrow")
+    directory = str(tmp_path / "catalog_parquet")
+    assert export_parquet(origin, directory) == {"foods": len(FOODS), "food_embeddings": len(FOODS)}
+    assert_same_catalog(origin, ParquetSource(directory))